@@ -0,0 +1,80 @@
+"""Benchmark parsing an MFF event track and auditing it
+
+Run from the repository root with
+    python -m benchmarks.bench_audit
+
+Writes a synthetic event track of --number events to a temporary file,
+with a simulated recording delay and jitter, then times iter_mff_events
+and audit against matching sent-event records.
+"""
+
+import os
+import random
+import tempfile
+import time
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+
+from egi_pynetstation.audit import audit, iter_mff_events
+from egi_pynetstation.history import EventRecord
+
+header = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<eventTrack xmlns="http://www.egi.com/event_mff" '
+    'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">\n'
+    '<name>ECI TCP/IP 55513</name>\n<trackType>EVNT</trackType>\n'
+)
+event = (
+    '<event><beginTime>{}</beginTime><duration>1000</duration>'
+    '<code>{}</code><label>{}</label><description></description>'
+    '<sourceDevice>Multi-Port ECI</sourceDevice><keys/></event>\n'
+)
+
+
+def write_track(path: str, n: int, delay: float, jitter: float) -> list:
+    """Write n events and return the sent records they came from"""
+    t0 = 1.7e9
+    sent = []
+    with open(path, 'w') as f:
+        f.write(header)
+        for i in range(n):
+            code = ('STIM', 'RESP', 'FRAM')[i % 3]
+            stamp = t0 + i * 0.01
+            recorded = stamp + delay + random.gauss(0, jitter)
+            begin = datetime.fromtimestamp(recorded, timezone.utc)
+            f.write(event.format(
+                begin.isoformat(timespec='microseconds'), code, 'trial'
+            ))
+            sent.append(EventRecord(
+                i, stamp - t0, 0.001, code, 'trial', '', {}, stamp,
+                0.0001, 0.0, t0
+            ))
+        f.write('</eventTrack>\n')
+    return sent
+
+
+def main():
+    p = ArgumentParser(description='Benchmark the MFF event audit')
+    p.add_argument('-n', '--number', type=int, default=300000)
+    p.add_argument('--delay', type=float, default=0.002)
+    p.add_argument('--jitter', type=float, default=0.0002)
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'Events_ECI.xml')
+        sent = write_track(path, args.number, args.delay, args.jitter)
+        t0 = time.perf_counter()
+        n = sum(1 for _ in iter_mff_events(path))
+        parse = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        report = audit(sent, path)
+        total = time.perf_counter() - t0
+    print(f'events:       {n}')
+    print(f'parse:        {parse:.2f} s ({n / parse:.0f} events/s)')
+    print(f'parse+audit:  {total:.2f} s')
+    print(f'median (ms):  {report["median"] * 1000:.3f}')
+    print(f'jitter (ms):  {report["jitter"] * 1000:.3f}')
+
+
+if __name__ == '__main__':
+    main()
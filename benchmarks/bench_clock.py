@@ -0,0 +1,64 @@
+"""Benchmark simple (ClockSync) against NTP clock synchronization
+
+Run from the repository root with
+    python -m benchmarks.bench_clock
+
+The NTP request is replaced with a sleep of --ntp-latency seconds and the
+ECI server is a local stand-in replying after --eci-latency seconds.
+Reports the time for connect plus begin_rec and for each resync.
+"""
+
+import time
+from argparse import ArgumentParser
+from statistics import mean
+
+import egi_pynetstation.NetStation as netstation_module
+from egi_pynetstation.NetStation import NetStation
+
+from .bench_connect import fake_ntp_client
+from .fake_eci import FakeECIServer
+
+
+def run(port: int, clock: str, n_resync: int) -> tuple:
+    """Time session startup and resyncs for one clock mode"""
+    t0 = time.perf_counter()
+    ns = NetStation('127.0.0.1', port)
+    ns.connect(clock=clock, ntp_ip='127.0.0.1')
+    ns.begin_rec()
+    startup = time.perf_counter() - t0
+    resyncs = []
+    for _ in range(n_resync):
+        t0 = time.perf_counter()
+        ns.resync()
+        resyncs.append(time.perf_counter() - t0)
+    ns.end_rec()
+    ns.disconnect()
+    return startup, mean(resyncs)
+
+
+def main():
+    p = ArgumentParser(description='Benchmark clock synchronization modes')
+    p.add_argument('-n', '--number', type=int, default=10)
+    p.add_argument('--resyncs', type=int, default=20)
+    p.add_argument('--ntp-latency', type=float, default=0.005)
+    p.add_argument('--eci-latency', type=float, default=0.001)
+    args = p.parse_args()
+
+    netstation_module.NTPClient = fake_ntp_client(args.ntp_latency)
+    server = FakeECIServer(delay=args.eci_latency)
+    try:
+        print(f'{"clock":<8}{"startup (ms)":>14}{"resync (ms)":>14}')
+        for clock in ('ntp', 'simple'):
+            results = [
+                run(server.port, clock, args.resyncs)
+                for _ in range(args.number)
+            ]
+            startup = mean(r[0] for r in results) * 1000
+            resync = mean(r[1] for r in results) * 1000
+            print(f'{clock:<8}{startup:>14.2f}{resync:>14.2f}')
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
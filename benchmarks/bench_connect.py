@@ -0,0 +1,68 @@
+"""Benchmark startup-to-first-event time for serial and fast connect
+
+Run from the repository root with
+    python -m benchmarks.bench_connect
+
+The NTP request is replaced with a sleep of --ntp-latency seconds and the
+ECI server is a local stand-in replying after --eci-latency seconds, so
+the numbers reflect how the round trips overlap rather than any network.
+"""
+
+import time
+from argparse import ArgumentParser
+from statistics import mean, stdev
+from types import SimpleNamespace
+
+import egi_pynetstation.NetStation as netstation_module
+from egi_pynetstation.NetStation import NetStation
+
+from .fake_eci import FakeECIServer
+
+
+def fake_ntp_client(latency: float):
+    """Build an NTPClient stand-in whose request takes latency seconds"""
+    class FakeNTPClient(object):
+        def request(self, host, version=3):
+            time.sleep(latency)
+            return SimpleNamespace(offset=0.0, delay=latency)
+    return FakeNTPClient
+
+
+def startup(port: int, fast: bool) -> float:
+    """Time from construction to the first acknowledged event"""
+    t0 = time.perf_counter()
+    ns = NetStation('127.0.0.1', port)
+    ns.connect(ntp_ip='127.0.0.1', fast=fast)
+    ns.begin_rec()
+    ns.send_event(event_type='STRT')
+    elapsed = time.perf_counter() - t0
+    ns.end_rec()
+    ns.disconnect()
+    return elapsed
+
+
+def main():
+    p = ArgumentParser(description='Benchmark session startup')
+    p.add_argument('-n', '--number', type=int, default=20)
+    p.add_argument('--ntp-latency', type=float, default=0.005)
+    p.add_argument('--eci-latency', type=float, default=0.001)
+    args = p.parse_args()
+
+    netstation_module.NTPClient = fake_ntp_client(args.ntp_latency)
+    server = FakeECIServer(delay=args.eci_latency)
+    try:
+        for fast in (False, True):
+            timings = [
+                startup(server.port, fast) * 1000
+                for _ in range(args.number)
+            ]
+            name = 'fast' if fast else 'serial'
+            print(
+                f'{name:<8}{mean(timings):8.2f} +/- {stdev(timings):.2f} ms'
+            )
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark the memory and query cost of the sent-event history
+
+Run from the repository root with
+    python -m benchmarks.bench_history
+
+Records --number events, as NetStation(record=True) does, in an
+EventHistory and as a list of EventRecords, and reports the memory per
+event of each (measured with tracemalloc) and the time of type and time
+range lookups on the EventHistory.
+"""
+
+import time
+import tracemalloc
+from argparse import ArgumentParser
+
+from egi_pynetstation.eci import package_event_buffers
+from egi_pynetstation.history import EventHistory, EventRecord
+
+types = ('STIM', 'RESP', 'FIXN', 'BLNK')
+
+
+def events(number: int):
+    """Yield the fields of number events, as send_event has them"""
+    for i in range(number):
+        event_type = types[i % len(types)]
+        data = {'cond': 'left' if i % 2 else 'right', 'rt  ': 0.001 * i}
+        _, block, key_block = package_event_buffers(
+            0.01 * i, 0.001, event_type, 'trial', 'desc', data
+        )
+        yield i, event_type, data, block, key_block
+
+
+def fill_history(number: int) -> EventHistory:
+    history = EventHistory()
+    for i, _, _, block, key_block in events(number):
+        history.add(
+            i, 0.01 * i, 0.001, block, key_block, 1e9 + 0.01 * i, 0.0002,
+            0.0, 1e9
+        )
+    return history
+
+
+def fill_records(number: int) -> list:
+    return [
+        EventRecord(
+            i, 0.01 * i, 0.001, event_type, 'trial', 'desc', data,
+            1e9 + 0.01 * i, 0.0002, 0.0, 1e9
+        )
+        for i, event_type, data, _, _ in events(number)
+    ]
+
+
+def measure(fill, number: int) -> tuple:
+    """Get what fill returns and the bytes it allocated per event"""
+    tracemalloc.start()
+    result = fill(number)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size / number
+
+
+def main():
+    p = ArgumentParser(description='Benchmark the event history')
+    p.add_argument('-n', '--number', type=int, default=200_000)
+    args = p.parse_args()
+
+    history, history_bytes = measure(fill_history, args.number)
+    records, records_bytes = measure(fill_records, args.number)
+    del records
+    print(f'EventHistory      {history_bytes:8.1f} bytes/event')
+    print(f'EventRecord list  {records_bytes:8.1f} bytes/event')
+
+    t0 = time.perf_counter()
+    stims = history.of_type('STIM')
+    t1 = time.perf_counter()
+    window = history.between(1e9 + 100.0, 1e9 + 110.0)
+    t2 = time.perf_counter()
+    print(f'of_type   {len(stims):>8} events in {(t1 - t0) * 1e3:8.3f} ms')
+    print(f'between   {len(window):>8} events in {(t2 - t1) * 1e3:8.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
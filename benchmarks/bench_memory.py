@@ -0,0 +1,42 @@
+"""Benchmark simulated sessions with the in-memory backend
+
+Run from the repository root with
+    python -m benchmarks.bench_memory
+
+Runs --sessions dry-run sessions of --events events each (connect,
+begin_rec, send_event, end_rec, disconnect) and reports the sessions and
+events per minute.
+"""
+
+import time
+from argparse import ArgumentParser
+
+from egi_pynetstation.NetStation import NetStation
+
+
+def session(events: int) -> int:
+    """Run one dry-run session; get the number of events logged"""
+    with NetStation.session('localhost', 0, backend='memory') as ns:
+        for i in range(events):
+            ns.send_event(event_type='STIM', label='trial', data={'n   ': i})
+    return len(ns.memory_log())
+
+
+def main():
+    p = ArgumentParser(description='Benchmark dry-run sessions')
+    p.add_argument('-s', '--sessions', type=int, default=1000)
+    p.add_argument('-e', '--events', type=int, default=100)
+    args = p.parse_args()
+
+    t0 = time.perf_counter()
+    logged = sum(session(args.events) for _ in range(args.sessions))
+    elapsed = time.perf_counter() - t0
+    assert logged == args.sessions * args.events
+    print(f'{args.sessions} sessions of {args.events} events '
+          f'in {elapsed:.2f} s')
+    print(f'{args.sessions / elapsed * 60:,.0f} sessions/min, '
+          f'{logged / elapsed * 60:,.0f} events/min')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark scalar and vectorized NTP timestamp conversion
+
+Run from the repository root with
+    python -m benchmarks.bench_ntp
+
+Converts --number random timestamps to packed NTP records and back, one
+at a time with get_ntp_byte/get_ntp_float and as arrays with
+get_ntp_records/get_ntp_floats, checks the results are bit-identical and
+reports the time per timestamp.
+"""
+
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+
+from egi_pynetstation.util import (
+    get_ntp_byte, get_ntp_float, get_ntp_records, get_ntp_floats
+)
+
+
+def timed(func, *args) -> tuple:
+    """Get the result of func and the seconds it took"""
+    t0 = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    p = ArgumentParser(description='Benchmark NTP conversion')
+    p.add_argument('-n', '--number', type=int, default=1_000_000)
+    args = p.parse_args()
+
+    # Timestamps in the current era of the NTP epoch
+    rng = np.random.default_rng(0)
+    values = rng.uniform(3.9e9, 4.2e9, args.number)
+    floats = values.tolist()
+
+    packed, t_pack = timed(lambda: b''.join(map(get_ntp_byte, floats)))
+    records, t_pack_np = timed(get_ntp_records, values)
+    assert records.tobytes() == packed
+
+    unpacked, t_unpack = timed(lambda: [
+        get_ntp_float(packed[i:i + 8]) for i in range(0, len(packed), 8)
+    ])
+    converted, t_unpack_np = timed(get_ntp_floats, packed)
+    assert converted.tolist() == unpacked
+
+    n = args.number
+    print(f'{"direction":<12}{"scalar (ns)":>13}{"vector (ns)":>13}'
+          f'{"speedup":>10}')
+    for name, scalar, vector in (
+        ('to NTP', t_pack, t_pack_np), ('from NTP', t_unpack, t_unpack_np)
+    ):
+        print(f'{name:<12}{scalar / n * 1e9:>13.1f}{vector / n * 1e9:>13.1f}'
+              f'{scalar / vector:>9.0f}x')
+
+
+if __name__ == '__main__':
+    main()
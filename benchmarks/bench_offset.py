@@ -0,0 +1,62 @@
+"""Benchmark offset measurement by NTP request and by ECI round trips
+
+Run from the repository root with
+    python -m benchmarks.bench_offset
+
+The NTP request is replaced with a sleep of --ntp-latency seconds and the
+ECI server is a local stand-in replying after --eci-latency seconds with
+its time.time(), so the true offset is 0. For each method, reports the
+time taken per estimate and the mean and worst absolute offset measured.
+"""
+
+import time
+from argparse import ArgumentParser
+from statistics import mean
+
+import egi_pynetstation.NetStation as netstation_module
+from egi_pynetstation.NetStation import NetStation
+
+from .bench_connect import fake_ntp_client
+from .fake_eci import FakeECIServer
+
+
+def run(estimate, number: int) -> tuple:
+    """Get the milliseconds taken and the offsets of number estimates"""
+    times, offsets = [], []
+    for _ in range(number):
+        t0 = time.perf_counter()
+        offsets.append(abs(estimate().offset))
+        times.append((time.perf_counter() - t0) * 1000)
+    return times, offsets
+
+
+def main():
+    p = ArgumentParser(description='Benchmark offset estimation')
+    p.add_argument('-n', '--number', type=int, default=50)
+    p.add_argument('-s', '--samples', type=int, default=8)
+    p.add_argument('--ntp-latency', type=float, default=0.005)
+    p.add_argument('--eci-latency', type=float, default=0.0)
+    args = p.parse_args()
+
+    netstation_module.NTPClient = fake_ntp_client(args.ntp_latency)
+    server = FakeECIServer(delay=args.eci_latency)
+    ns = NetStation('127.0.0.1', server.port)
+    try:
+        ns.connect(ntp_ip='127.0.0.1')
+        methods = (
+            ('ntp', ns._ntp_estimate),
+            (f'eci x{args.samples}', lambda: ns.eci_offset(args.samples)),
+        )
+        print(f'{"method":<10}{"time (ms)":>11}{"mean |offset| (us)":>20}'
+              f'{"max |offset| (us)":>19}')
+        for name, estimate in methods:
+            times, offsets = run(estimate, args.number)
+            print(f'{name:<10}{mean(times):>11.2f}'
+                  f'{mean(offsets) * 1e6:>20.1f}{max(offsets) * 1e6:>19.1f}')
+        ns.disconnect()
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Benchmark eci.package_event with and without the encoding cache
+
+Run from the repository root with
+    python -m benchmarks.bench_package_event
+"""
+
+from argparse import ArgumentParser
+from timeit import repeat
+
+from egi_pynetstation.eci import encoding_cache, package_event
+
+events = {
+    'bare': ('STIM', ' ' * 4, ' ' * 4, {}),
+    'labelled': ('STIM', 'congruent trial', 'left target', {}),
+    'text data': (
+        'TRSP', 'response', 'button box',
+        {'cond': 'congruent', 'side': 'left', 'resp': 'correct'},
+    ),
+    'mixed data': (
+        'TRSP', 'response', 'button box',
+        {'cond': 'congruent', 'rt  ': 0.4321, 'corr': True, 'tria': 12},
+    ),
+}
+
+
+def main():
+    p = ArgumentParser(description='Benchmark event packaging')
+    p.add_argument('-n', '--number', type=int, default=100000)
+    args = p.parse_args()
+
+    maxsize = encoding_cache.maxsize
+    print(f'{"event":<14}{"uncached (ns)":>15}{"cached (ns)":>13}')
+    for name, (event_type, label, desc, data) in events.items():
+        timings = []
+        for size in (0, maxsize):
+            encoding_cache.maxsize = size
+            encoding_cache.clear()
+            best = min(repeat(
+                lambda: package_event(
+                    1.0, 0.001, event_type, label, desc, data
+                ),
+                number=args.number,
+                repeat=5,
+            ))
+            timings.append(best / args.number * 1e9)
+        print(f'{name:<14}{timings[0]:>15.1f}{timings[1]:>13.1f}')
+    print(encoding_cache.info())
+
+
+if __name__ == '__main__':
+    main()
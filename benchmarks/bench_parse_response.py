@@ -0,0 +1,52 @@
+"""Benchmark eci.parse_response for each kind of amp response
+
+Run from the repository root with
+    python -m benchmarks.bench_parse_response
+"""
+
+from argparse import ArgumentParser
+from timeit import repeat
+
+from egi_pynetstation.eci import parse_response
+from egi_pynetstation.exceptions import ECIResponseFailure
+from egi_pynetstation.util import get_ntp_byte
+
+ntp = get_ntp_byte(3849000000.25)
+
+responses = {
+    'success': b'Z',
+    'failure': b'F',
+    'identify': b'I\x04',
+    'ntp': ntp,
+    'ntp (leading S)': b'S' + ntp,
+    'ntp (trailing Z)': ntp + b'Z',
+}
+
+
+def parse_failure(response):
+    try:
+        parse_response(response)
+    except ECIResponseFailure:
+        pass
+
+
+def main():
+    p = ArgumentParser(description='Benchmark ECI response parsing')
+    p.add_argument('-n', '--number', type=int, default=200000)
+    args = p.parse_args()
+
+    print(f'{"response":<20}{"bytes (ns)":>12}{"memoryview (ns)":>18}')
+    for name, response in responses.items():
+        func = parse_failure if name == 'failure' else parse_response
+        view = memoryview(bytearray(response))
+        timings = []
+        for arg in (response, view):
+            best = min(repeat(
+                lambda: func(arg), number=args.number, repeat=5
+            ))
+            timings.append(best / args.number * 1e9)
+        print(f'{name:<20}{timings[0]:>12.1f}{timings[1]:>18.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Benchmark the sans-I/O ECI protocol core
+
+Run from the repository root with
+    python -m benchmarks.bench_protocol
+
+First measures ECIProtocol alone: EventData commands are sent and their
+acknowledgements received in chunks, with no socket. Then sends the same
+events to a local stand-in ECI server three ways: one blocking round trip
+per event (NetStation.send_event), and pipelined windows of events from
+a thread and from asyncio, both driven by ECIProtocol.
+"""
+
+import asyncio
+import socket
+import time
+from argparse import ArgumentParser
+from timeit import repeat
+
+from egi_pynetstation.NetStation import NetStation
+from egi_pynetstation.eci import package_event_buffers
+from egi_pynetstation.protocol import ECIProtocol
+
+from .fake_eci import FakeECIServer
+
+
+def event_buffers() -> list:
+    return package_event_buffers(0.5, 0.001, 'TEST', 'label', 'desc', {})
+
+
+def in_memory(n: int, chunk: int) -> None:
+    """Send n events and receive their acks chunk bytes at a time"""
+    protocol = ECIProtocol()
+    protocol.connection_made()
+    buffers = event_buffers()
+    acks = b'Z' * chunk
+    for _ in range(n // chunk):
+        for _ in range(chunk):
+            protocol.send('EventData', buffers)
+        protocol.receive(acks)
+
+
+def blocking(port: int, n: int) -> float:
+    ns = NetStation('127.0.0.1', port)
+    ns.connect(clock='simple', fast=True)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        ns.send_event(0.5, event_type='TEST', label='label', desc='desc')
+    elapsed = time.perf_counter() - t0
+    ns.disconnect()
+    return elapsed
+
+
+def threaded(port: int, n: int, window: int) -> float:
+    """Pipeline windows of events over a plain blocking socket"""
+    protocol = ECIProtocol()
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    protocol.connection_made()
+    buffers = event_buffers()
+    t0 = time.perf_counter()
+    for _ in range(n // window):
+        frames = []
+        for _ in range(window):
+            frames += protocol.send('EventData', buffers)
+        sock.sendall(b''.join(frames))
+        while len(protocol):
+            protocol.receive(sock.recv(65536))
+    elapsed = time.perf_counter() - t0
+    sock.close()
+    return elapsed
+
+
+async def asyncio_pipelined(port: int, n: int, window: int) -> float:
+    """Pipeline windows of events with asyncio streams"""
+    protocol = ECIProtocol()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    protocol.connection_made()
+    buffers = event_buffers()
+    t0 = time.perf_counter()
+    for _ in range(n // window):
+        for _ in range(window):
+            writer.writelines(protocol.send('EventData', buffers))
+        await writer.drain()
+        while len(protocol):
+            protocol.receive(await reader.read(65536))
+    elapsed = time.perf_counter() - t0
+    writer.close()
+    await writer.wait_closed()
+    return elapsed
+
+
+def main():
+    p = ArgumentParser(description='Benchmark the ECI protocol core')
+    p.add_argument('-n', '--number', type=int, default=2000)
+    p.add_argument('--window', type=int, default=32)
+    p.add_argument('--chunk', type=int, default=64)
+    args = p.parse_args()
+
+    n = 100000
+    best = min(repeat(lambda: in_memory(n, args.chunk), number=1, repeat=5))
+    print(f'in-memory: {n / best / 1e6:.2f} M events/s')
+
+    server = FakeECIServer()
+    try:
+        runs = (
+            ('blocking', lambda: blocking(server.port, args.number)),
+            ('threaded', lambda: threaded(
+                server.port, args.number, args.window
+            )),
+            ('asyncio', lambda: asyncio.run(asyncio_pipelined(
+                server.port, args.number, args.window
+            ))),
+        )
+        print(f'{"front end":<12}{"events/s":>12}')
+        for name, run in runs:
+            elapsed = min(run() for _ in range(3))
+            print(f'{name:<12}{args.number / elapsed:>12.0f}')
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
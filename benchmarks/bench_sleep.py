@@ -0,0 +1,66 @@
+"""Benchmark the hybrid precision sleep against pure spinning
+
+Run from the repository root with
+    python -m benchmarks.bench_sleep
+
+For each method, waits --number times for --duration seconds and reports
+the median, mean and worst wake-up error and the CPU time used as a
+percentage of the wall time spent waiting.
+"""
+
+import time
+from argparse import ArgumentParser
+from statistics import mean, median
+
+from egi_pynetstation.util import PrecisionSleeper
+
+
+def spin_until(deadline: float) -> float:
+    """Busy-wait until deadline, as example.py used to"""
+    while time.perf_counter() < deadline:
+        pass
+    return time.perf_counter() - deadline
+
+
+def os_sleep_until(deadline: float) -> float:
+    """Wait with the OS timer alone"""
+    remaining = deadline - time.perf_counter()
+    if remaining > 0:
+        time.sleep(remaining)
+    return time.perf_counter() - deadline
+
+
+def run(wait, duration: float, number: int) -> tuple:
+    """Get the wake-up errors and CPU fraction of one wait method"""
+    errors = []
+    cpu0 = time.process_time()
+    wall0 = time.perf_counter()
+    for _ in range(number):
+        errors.append(wait(time.perf_counter() + duration))
+    cpu = (time.process_time() - cpu0) / (time.perf_counter() - wall0)
+    return errors, cpu
+
+
+def main():
+    p = ArgumentParser(description='Benchmark precision sleep methods')
+    p.add_argument('-n', '--number', type=int, default=200)
+    p.add_argument('-d', '--duration', type=float, default=0.01)
+    args = p.parse_args()
+
+    methods = (
+        ('spin', spin_until),
+        ('sleep', os_sleep_until),
+        ('hybrid', PrecisionSleeper().sleep_until),
+    )
+    print(f'{"method":<8}{"median err (us)":>17}{"mean err (us)":>15}'
+          f'{"max err (us)":>15}'
+          f'{"cpu (%)":>10}')
+    for name, wait in methods:
+        errors, cpu = run(wait, args.duration, args.number)
+        print(f'{name:<8}{median(errors) * 1e6:>17.1f}'
+              f'{mean(errors) * 1e6:>15.1f}'
+              f'{max(errors) * 1e6:>15.1f}{cpu * 100:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Minimal threaded stand-in for the NetStation ECI server
+
+Used by the benchmarks so they can run without an amplifier. The server
+frames each command from the stream, optionally sleeps to simulate the
+NetStation host's processing time, and replies as NetStation does.
+"""
+
+import socket
+import struct
+import threading
+import time
+
+# Bytes following each command byte; EventData carries its own length
+payload_sizes = {
+    b'Q': 4, b'Y': 0, b'X': 0, b'B': 0, b'E': 0, b'A': 0,
+    b'T': 4, b'N': 8, b'S': 8,
+}
+
+
+class FakeECIServer(object):
+    """Accepts one connection at a time on localhost and acknowledges
+    every command
+
+    Attributes
+    ----------
+    port: int
+        The port the server is listening on
+    delay: float
+        Seconds to sleep before each reply
+    commands: list
+        The command bytes received, in order
+    """
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.commands = []
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind(('127.0.0.1', 0))
+        self._listener.listen(1)
+        self.port = self._listener.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with conn:
+                self._handle(conn)
+
+    def _handle(self, conn: socket.socket) -> None:
+        buffer = bytearray()
+        while True:
+            chunk = conn.recv(65536)
+            if not chunk:
+                return
+            buffer += chunk
+            replies = bytearray()
+            while buffer:
+                cmd = bytes(buffer[:1])
+                if cmd == b'D':
+                    if len(buffer) < 3:
+                        break
+                    size = 3 + struct.unpack_from('H', buffer, 1)[0]
+                else:
+                    size = 1 + payload_sizes.get(cmd, 0)
+                if len(buffer) < size:
+                    break
+                del buffer[:size]
+                self.commands.append(cmd)
+                if cmd == b'Q':
+                    replies += b'I\x04'
+                elif cmd == b'S':
+                    t = time.time() + 2208988800
+                    replies += b'S' + struct.pack(
+                        'II', int(t), int(t % 1 * 2 ** 32)
+                    )
+                else:
+                    replies += b'Z'
+                if cmd == b'X':
+                    conn.sendall(replies)
+                    return
+            if replies:
+                if self.delay:
+                    time.sleep(self.delay)
+                conn.sendall(replies)
+
+    def close(self) -> None:
+        self._listener.close()
@@ -4,18 +4,40 @@
 """Abstraction of the NetStation SDK as an object"""
 
 import time
+import threading
+from time import perf_counter, perf_counter_ns
+from contextlib import contextmanager
 from math import floor
 from typing import Union
 
-from ntplib import system_to_ntp_time, NTPClient
+from ntplib import system_to_ntp_time, ntp_to_system_time, NTPClient
 
-from .eci import build_command, parse_response, allowed_endians, package_event
+from .checkpoint import save_checkpoint, load_checkpoint
+from .clocks import ClockMapper
+from .eci import (
+    build_command_buffers, allowed_endians,
+    package_event_buffers, stamp_event, EVENT_BLOCK_INDEX,
+)
+from .event_queue import EventQueue, priorities
+from .export import export_events
+from .heartbeat import ConnectionHealth, Heartbeat, DEAD
+from .history import EventHistory, ACKED, UNACKED
+from .memory import MemorySocket, MemoryEventLog
+from .protocol import ECIProtocol, CLOSED
 from .socket_wrapper import Socket
-from .util import format_time
+from .sync import (
+    SyncState, DriftEstimator, SyncPolicy, OffsetEstimate,
+    estimate_offset, combine_offsets,
+)
+from .trace import tracer, WRITE, READ, PARSE, NTP, SYNC
+from .util import wrap_ms, wait_until
+from .watchdog import (
+    LatencyWatchdog, NORMAL, DROP_BULK, BATCH, FIRE_AND_FORGET,
+)
 from .exceptions import *
 
-cyan = '\u001b[36;1m'
-reset = '\u001b[0m'
+# Transports selectable with the backend argument of NetStation
+backends = {'socket': Socket, 'memory': MemorySocket}
 
 
 class NetStation(object):
@@ -29,16 +51,44 @@ class NetStation(object):
         Whether this instance is connected
     _endian: str
         The endianness of this machine
+    _clock: str
+        The clock sync method, 'ntp', 'eci' or 'simple'
     _mstime: float
-        Time in milliseconds last retrieved; NOT IMPLEMENTED CORRECTLY
+        The time.time() origin of the millisecond clock sent with
+        ClockSync when using the simple clock
     _ntp_ip: str
         The IP address of the NTP server on the amplifier
+    _sync: SyncState
+        The most recent clock synchronization; replaced atomically
+    _eci_lock: threading.RLock
+        Held for the duration of each ECI command/response exchange
+    _queue: EventQueue
+        Events queued with queue_event, waiting for flush
+    _drift: DriftEstimator
+        Estimates clock drift from the offsets of NTP synchronizations
+    _error_budget: float
+        The timing error, in seconds, above which a resync is started
+        automatically; None to never resync automatically
+    _seq: int
+        The sequence number of the next event sent
+    _history: EventHistory
+        The record of sent events, or None if not recording them
+    _watchdog: LatencyWatchdog
+        The ack latency SLO and degraded mode, or None if no SLO is set
+    _deferred: bool
+        Whether send_event has queued events in the high lane while
+        degraded, to be flushed before the next event is sent
+    _checkpoint: str
+        The file the session state is saved to on every sync, or None
 
     Notes
     -----
-    ADMONITION: currently non-NTP clock is not implemented; failing to
-    supply an NTP IP address during connection will result in an error at
-    runtime.
+    The simple clock sends ClockSync with a 32-bit count of milliseconds
+    since connect, and every event start is sent on that same clock, so
+    synchronizing costs a single round trip and needs no NTP server. It
+    trades NTP's sub-millisecond alignment for millisecond resolution.
+    The count wraps around after about 49.7 days, which the amp handles
+    as long as a resync happens at least that often.
 
     Some behavior is not properly documented in the SDK guide. You may
     need to refer to docstrings, code comments, and the README in order
@@ -63,8 +113,33 @@ class NetStation(object):
     authors of the appropriate endianness for other platforms so that
     we can add that to the documentation!
     """
-    # TODO: implement simple clock using _mstime
-    def __init__(self, ipv4: str, port: int, endian: str = 'NTEL') -> None:
+    # Default age in seconds, and estimated error in seconds, below which
+    # begin_rec reuses the current sync; see sync.SyncPolicy
+    sync_freshness = 10.0
+    sync_tolerance = 0.0005
+    # Fraction of the error budget at which an automatic resync starts,
+    # leaving headroom for the resync to complete
+    resync_margin = 0.5
+    # Seconds without a command that a background resync waits for before
+    # each of its round trips, so they go in the gaps between events, and
+    # the most seconds it waits for such a gap
+    resync_idle = 0.005
+    resync_patience = 1.0
+    # NTPReturnClock round trips per offset estimate with the eci clock
+    eci_samples = 8
+    # Event sequence numbers reserved by each checkpoint; a resumed
+    # session continues after the reservation, so none is ever reused
+    checkpoint_seq_block = 1024
+
+    def __init__(
+        self,
+        ipv4: str,
+        port: int,
+        endian: str = 'NTEL',
+        record: bool = False,
+        tx_timestamps: bool = False,
+        backend: str = 'socket',
+    ) -> None:
         """Constructor for NetStation
 
         Parameters
@@ -72,19 +147,205 @@ class NetStation(object):
         ipv4: the ipv4 address to use for the amplifier
         port: the port number to use for the amplifier
         endian: the endianness of the machine; see eci.allowed_endians
+        record: whether to keep a record of every event sent, for
+            history() and export_events()
+        tx_timestamps: whether to record, with each event, the time the
+            kernel transmitted it (Linux only; requires record)
+        backend: 'socket' to talk to NetStation, or 'memory' for a dry run
+            with no network: commands are validated, packed and answered
+            in-process, events are kept for memory_log(), and the NTP
+            offset is always 0
+
+        Raises
+        ------
+        NetStationIllegalArgument
+            If the endian or backend is invalid, or tx_timestamps is set
+            without record
 
 
         See Also
         --------
         eci.eci: module for parsing eci commands/responses
         """
-        self._socket = Socket(ipv4, port)
-        self._connected = False
         if not (endian in allowed_endians):
             raise NetStationIllegalArgument(endian)
+        if tx_timestamps and not record:
+            raise NetStationIllegalArgument('tx_timestamps without record')
+        if backend not in backends:
+            raise NetStationIllegalArgument(backend)
+        self._socket = backends[backend](ipv4, port, tx_timestamps)
+        self._address = (ipv4, port)
+        self._backend = backend
+        self._dry_run = backend == 'memory'
+        self._connected = False
         self._endian = endian
+        self._clock = None
         self._mstime = None
         self._recording_start = None
+        self._ntpsynced = False
+        self._sync = None
+        self._eci_lock = threading.RLock()
+        self._resync_thread = None
+        self._resync_error = None
+        self._last_stamp = None
+        self._queue = EventQueue()
+        self._sync_policy = SyncPolicy(0.0)
+        self._n_skipped = 0
+        self._n_failed = 0
+        self._drift = DriftEstimator()
+        self._error_budget = None
+        self._n_syncs = 0
+        self._worst_error = 0.0
+        self._seq = 0
+        self._seq_reserved = 0
+        self._state_lock = threading.Lock()
+        self._history = EventHistory() if record else None
+        self._health = ConnectionHealth()
+        self._protocol = ECIProtocol()
+        self._clocks = ClockMapper()
+        self._heartbeat = None
+        self._last_activity = 0.0
+        self._watchdog = None
+        self._deferred = False
+        self._checkpoint = None
+
+    @classmethod
+    @contextmanager
+    def session(
+        cls,
+        ipv4: str,
+        port: int,
+        clock: str = 'ntp',
+        ntp_ip: str = None,
+        error_budget: float = None,
+        endian: str = 'NTEL',
+        fast: bool = False,
+        record: bool = False,
+        tx_timestamps: bool = False,
+        backend: str = 'socket',
+    ):
+        """Context manager for a connected, recording NetStation
+
+        Connects and begins recording on entry; ends recording and
+        disconnects on exit, even if the block raises.
+
+        Parameters
+        ----------
+        ipv4, port, endian, record, tx_timestamps, backend: see the
+            constructor
+        clock, ntp_ip, fast: see connect
+        error_budget: the estimated timing error, in seconds, to stay
+            under by resyncing automatically; e.g. 0.0005 to keep error
+            under half a millisecond. Default None, never resync
+            automatically.
+
+        Yields
+        ------
+        The NetStation
+
+        Examples
+        --------
+        >>> with NetStation.session(IP_ns, port_ns, ntp_ip=IP_amp,
+        ...                         error_budget=0.0005) as ns:
+        ...     ns.send_event(event_type="STIM")
+        >>> ns.sync_report()
+        """
+        ns = cls(ipv4, port, endian, record, tx_timestamps, backend)
+        ns.connect(clock=clock, ntp_ip=ntp_ip, fast=fast)
+        try:
+            ns.set_error_budget(error_budget)
+            ns.begin_rec()
+            yield ns
+        finally:
+            if ns._resync_thread is not None:
+                ns._resync_thread.join()
+            if ns._connected:
+                if (
+                    ns._recording_start is not None
+                    and ns.session_state() != CLOSED
+                ):
+                    ns.end_rec()
+                ns.disconnect()
+
+    @classmethod
+    def resume(
+        cls,
+        checkpoint: str,
+        record: bool = False,
+        tx_timestamps: bool = False,
+        backend: str = None,
+        resync: bool = False,
+    ) -> 'NetStation':
+        """Reconnect and carry on a session from its checkpoint
+
+        Parameters
+        ----------
+        checkpoint: the file given to set_checkpoint by the crashed script;
+            the resumed NetStation keeps saving to it
+        record, tx_timestamps: see the constructor
+        backend: see the constructor; default the checkpoint's
+        resync: if True, synchronize afresh instead of restoring the
+            checkpointed sync; default False
+
+        Returns
+        -------
+        The connected NetStation, recording if the session was
+
+        Notes
+        -----
+        Only the Query and Attention handshake is repeated. The NTP sync
+        of the checkpoint is then sent again as it was: the amp takes its
+        NTP timestamp as absolute, so event starts keep the same epoch as
+        the events already recorded. The simple clock resyncs on its
+        original millisecond clock, which likewise keeps event times
+        consistent. The drift history is restored, so an error budget
+        still triggers resyncs on time. Sequence numbers continue after
+        those reserved by the last checkpoint (checkpoint_seq_block at a
+        time), so some may be skipped but none is reused.
+
+        Examples
+        --------
+        >>> ns = NetStation(IP_ns, port_ns)
+        >>> ns.connect(ntp_ip=IP_amp)
+        >>> ns.set_checkpoint('session.ckpt')
+        >>> # ... the script crashes; in the restarted script:
+        >>> ns = NetStation.resume('session.ckpt')
+        """
+        state = load_checkpoint(checkpoint)
+        ipv4, port = state['address']
+        ns = cls(
+            ipv4, port, state['endian'], record, tx_timestamps,
+            backend or state['backend'],
+        )
+        ns._clock = state['clock']
+        ns._ntp_ip = state['ntp_ip']
+        ns._mstime = state['mstime']
+        ns._seq = state['seq']
+        ns._n_syncs = state['syncs']
+        ns._n_skipped = state['skipped_syncs']
+        ns._n_failed = state.get('failed_resyncs', 0)
+        ns._worst_error = state['worst_error']
+        ns._error_budget = state['error_budget']
+        ns._sync_policy = SyncPolicy(*state['sync_policy'])
+        for epoch, offset in state['offsets']:
+            ns._drift.add(SyncState(epoch, offset))
+        ns._socket.connect()
+        ns._protocol.connection_made()
+        ns._connected = True
+        ns._handshake()
+        sync = state['sync']
+        if ns._clock == 'simple':
+            ns._simple_sync()
+        elif resync or sync is None:
+            ns._clock_sync(ns._ntp_offset())
+        else:
+            ns._restore_sync(SyncState(*sync))
+        ns._checkpoint = checkpoint
+        if state['recording_start'] is not None:
+            ns._command('BeginRecording')
+            ns._recording_start = state['recording_start']
+        ns._save_checkpoint()
+        return ns
 
     def check_connected(func) -> None:
         """Decorator to raise exception if not connected
@@ -101,7 +362,7 @@ class NetStation(object):
         def wrapper(*args, **kwargs):
             if args[0]._connected:
                 try:
-                    func(*args, **kwargs)
+                    return func(*args, **kwargs)
                 except ConnectionResetError:
                     raise RuntimeError(
                         "The server forcibly reset the connection, this "
@@ -117,66 +378,616 @@ class NetStation(object):
                 raise NetStationUnconnected()
         return wrapper
 
-    def connect(self, clock: str = 'ntp', ntp_ip: str = None) -> None:
+    def connect(
+        self,
+        clock: str = 'ntp',
+        ntp_ip: str = None,
+        fast: bool = False,
+        sync_freshness: float = None,
+    ) -> None:
         """Connect to the Netstation machine via TCP/IP
 
         Parameters
         ----------
-        clock: either 'ntp' or 'simple', indicating clock sync method
-        ntp_ip: the IP address of the NTP server on the amplifier
+        clock: the clock sync method: 'ntp' to measure the offset with an
+            NTP request to the amp, 'eci' to measure it with NTPReturnClock
+            round trips over the ECI connection (see eci_offset), or
+            'simple'
+        ntp_ip: the IP address of the NTP server on the amplifier; not
+            needed with the eci clock or the memory backend
+        fast: if True, request the NTP offset concurrently with the TCP
+            connection and ECI handshake and synchronize immediately
+            afterwards (immediately after the handshake for the eci and
+            simple clocks); default False
+        sync_freshness: the age in seconds below which begin_rec may
+            reuse the current synchronization instead of repeating it;
+            default NetStation.sync_freshness. See set_sync_policy.
 
         Raises
         ------
         NetStationIllegalArgument
-            If clock is not 'ntp' or 'simple'
+            If clock is not 'ntp', 'eci' or 'simple'
         ConnectionRefusedError
             If the server is not listening
-        RuntimeError
-            If you are a poor soul trying to use the simple clock
+        ValueError
+            If the NTP clock is requested without an NTP server IP
         """
-        if clock not in ('ntp', 'simple'):
+        if clock not in ('ntp', 'eci', 'simple'):
             raise NetStationIllegalArgument(clock)
+        if self._dry_run and ntp_ip is None:
+            # A dry run never contacts the NTP server
+            ntp_ip = 'localhost'
         if clock == 'ntp' and ntp_ip is None:
             raise ValueError('NTP sync requires an NTP server IP')
-        if clock == 'simple':
-            raise RuntimeError(
-                'You have requested the simple clock. '
-                'We are perplexed by this choice when NTP is an option. '
-                'Nonetheless, the real problem is that the author has not '
-                'had time to implement simple clock as of this release. '
-                'Stay tuned for more information, and sorry for the '
-                'inconvenience.'
+
+        self._clock = clock
+        self._mstime = time.time()
+        if sync_freshness is None:
+            sync_freshness = NetStation.sync_freshness
+        self._sync_policy = SyncPolicy(
+            sync_freshness, NetStation.sync_tolerance
+        )
+        self._ntp_ip = ntp_ip
+        fast_ntp = fast and clock == 'ntp'
+        if fast_ntp:
+            sample = {}
+            worker = threading.Thread(
+                target=self._sample_ntp_offset, args=(sample,), daemon=True
             )
+            worker.start()
 
         self._socket.connect()
+        self._protocol.connection_made()
         self._connected = True
-        self._ntp_ip = ntp_ip
+        self._handshake()
+
+        if fast_ntp:
+            worker.join()
+            if 'error' in sample:
+                raise sample['error']
+            self._clock_sync(sample['offset'])
+        elif fast and clock == 'eci':
+            self._clock_sync(self._ntp_offset())
+        elif fast:
+            self._simple_sync()
+
+    def _handshake(self) -> None:
+        """Send the Query and Attention opening every connection"""
         self._command('Query', self._endian)
         self._command('Attention')
 
+    def _sample_ntp_offset(self, sample: dict) -> None:
+        """Worker for connect(fast=True); stores the offset or the error
+
+        Parameters
+        ----------
+        sample: the dictionary to store 'offset' or 'error' in
+        """
+        try:
+            sample['offset'] = self._ntp_offset()
+        except Exception as e:
+            sample['error'] = e
+
     @check_connected
     def ntpsync(self):
         """Perform an NTP synchronization"""
         self._ntpsynced = True
         self._command('Attention')
-        if not self._ntp_ip:
+        if not self._ntp_ip and self._clock != 'eci':
             raise NetStationNoNTPIP()
+        self._clock_sync(self._ntp_offset())
+
+    def set_error_budget(self, error_budget: float) -> None:
+        """Set the timing error budget for automatic resyncs
+
+        Parameters
+        ----------
+        error_budget: the estimated timing error, in seconds, to stay under;
+            None to disable automatic resyncs
+
+        Notes
+        -----
+        After each event is sent, the error it may carry is estimated from
+        the measured drift and the time since the last sync. Once that
+        reaches resync_margin of the budget, a background resync is
+        started, so the sync happens in the gap after an event rather than
+        delaying the next one. If it fails, e.g. on an NTP timeout, the
+        event is unaffected: the failure is counted in sync_report, its
+        error is raised by the next call to resync or wait_resync, and
+        the next event over the margin tries again.
+        """
+        self._error_budget = error_budget
+
+    def set_latency_slo(
+        self,
+        threshold: float,
+        strategy: str = DROP_BULK,
+        window: int = 20,
+        quantile: float = 0.9,
+        recover: float = 0.8,
+        batch_size: int = 8,
+        probe_every: int = 10,
+        on_change=None,
+    ) -> None:
+        """Set the ack latency objective and the mode used when breached
+
+        Parameters
+        ----------
+        threshold: the ack latency in seconds to stay under; None to
+            remove the objective
+        strategy: what to do while the objective is breached:
+            - 'drop_bulk': drop bulk-priority events, queued or new
+            - 'batch': queue send_event's events in the high lane and
+              send them batch_size at a time
+            - 'fire_and_forget': send events without waiting for their
+              acknowledgements, except every probe_every-th
+        window, quantile, recover: the rolling latency compared with the
+            threshold is the quantile of the last window latencies; it
+            must fall below recover * threshold to leave degraded mode
+        batch_size, probe_every: see strategy
+        on_change: called with the new mode ('normal' or strategy) and the
+            rolling latency whenever the mode changes; it must not block
+
+        Raises
+        ------
+        ValueError
+            If strategy is unknown or a parameter is out of range
+
+        Notes
+        -----
+        The latency of every command is observed, and of every batch
+        written by flush, measured from writing it to reading its last
+        reply. Acknowledgements skipped in fire-and-forget mode are read
+        before the next command is written, and failures among them are
+        counted rather than raised. Events queued in batch mode are sent
+        before the next event sent in normal mode, and by end_rec. A
+        "transmit" event queued in batch mode is stamped as its batch is
+        written, and last_stamp() only reflects it from then.
+
+        See Also
+        --------
+        latency_report: for the current mode and counters
+        watchdog.LatencyWatchdog: for the switching rules
+        """
+        if threshold is None:
+            watchdog = None
+        else:
+            watchdog = LatencyWatchdog(
+                threshold, strategy, window, quantile, recover,
+                batch_size=batch_size, probe_every=probe_every,
+                on_change=on_change,
+            )
+        with self._eci_lock:
+            if self._connected and len(self._protocol):
+                self._drain_unacked()
+            self._watchdog = watchdog
+
+    def latency_report(self) -> dict:
+        """Report on the ack latency objective
+
+        Returns
+        -------
+        Dictionary from LatencyWatchdog.report: the mode, rolling latency,
+        breaches, recoveries, time degraded and the dropped, deferred and
+        unacknowledged event counts; None if no objective is set
+        """
+        if self._watchdog is None:
+            return None
+        return self._watchdog.report()
+
+    def sync_report(self) -> dict:
+        """Report on synchronization over this session
+
+        Returns
+        -------
+        Dictionary with the number of syncs performed, the number skipped
+        by begin_rec because the current one was fresh, the estimated
+        drift in seconds per second, the largest estimated error of any
+        event sent in seconds, the error budget, and the number of
+        automatic resyncs (see set_error_budget) which failed
+        """
+        return {
+            'syncs': self._n_syncs,
+            'skipped_syncs': self._n_skipped,
+            'failed_resyncs': self._n_failed,
+            'drift': self._drift.drift(),
+            'worst_error': self._worst_error,
+            'error_budget': self._error_budget,
+        }
+
+    def set_checkpoint(self, path: str) -> None:
+        """Save the session state to a file on every sync
+
+        Parameters
+        ----------
+        path: the checkpoint file, replaced atomically on every sync, at
+            the beginning and end of every recording, and whenever the
+            event sequence numbers it reserved run out; None to stop
+            checkpointing
+
+        See Also
+        --------
+        resume: to carry on a session from its checkpoint
+        """
+        self._checkpoint = path
+        if self._sync is not None:
+            self._save_checkpoint()
+
+    def _save_checkpoint(self) -> None:
+        """Write the checkpoint, if one is set
+
+        The state lock is held while the state is read and written, so
+        the resync worker and the sending thread never interleave their
+        checkpoints.
+        """
+        if self._checkpoint is None:
+            return
+        with self._state_lock:
+            self._seq_reserved = self._seq + NetStation.checkpoint_seq_block
+            self._write_checkpoint()
+
+    def _write_checkpoint(self) -> None:
+        """Write the checkpoint; the state lock must be held"""
+        sync = self._sync
+        policy = self._sync_policy
+        save_checkpoint(self._checkpoint, {
+            'address': list(self._address),
+            'backend': self._backend,
+            'endian': self._endian,
+            'clock': self._clock,
+            'ntp_ip': self._ntp_ip,
+            'mstime': self._mstime,
+            'sync': None if sync is None else list(sync),
+            'offsets': self._drift.samples(),
+            'sync_policy': [policy.max_age, policy.max_error],
+            'error_budget': self._error_budget,
+            'recording_start': self._recording_start,
+            'seq': self._seq_reserved,
+            'syncs': self._n_syncs,
+            'skipped_syncs': self._n_skipped,
+            'failed_resyncs': self._n_failed,
+            'worst_error': self._worst_error,
+        })
+
+    def _restore_sync(self, sync: SyncState) -> None:
+        """Send NTPClockSync for a previous sync and publish it again
+
+        Parameters
+        ----------
+        sync: the sync to restore, from a checkpoint
+        """
+        with self._eci_lock:
+            self._command(
+                'NTPClockSync', system_to_ntp_time(sync.epoch + sync.offset)
+            )
+            self._ntpsynced = True
+            self._sync = sync
+            self._clocks.capture()
+
+    def _check_error_budget(self, t: float) -> None:
+        """Track event error and start a resync if it nears the budget
+
+        Parameters
+        ----------
+        t: the time.time() of the event just sent
+        """
+        error = self._drift.error_at(t, self._sync)
+        with self._state_lock:
+            if error > self._worst_error:
+                self._worst_error = error
+        if error >= self._error_budget * NetStation.resync_margin:
+            # Never raises: a failure is counted and kept for resync or
+            # wait_resync, and the next event over the margin retries
+            self._start_resync(automatic=True)
+
+    @check_connected
+    def clocksync(self) -> None:
+        """Perform a simple (ClockSync) synchronization"""
+        self._command('Attention')
+        self._simple_sync()
+
+    @check_connected
+    def resync(self, background: bool = False) -> threading.Thread:
+        """Ensure clocks are synchronized
+
+        Parameters
+        ----------
+        background: bool
+            If True, perform the NTP exchange on a worker thread and
+            return immediately; the worker holds the ECI connection for
+            one round trip at a time: each NTPReturnClock sample with the
+            eci clock, then NTPClockSync (or ClockSync), each started once
+            no command has been sent for resync_idle seconds. Default
+            False.
+
+        Returns
+        -------
+        The worker thread if background is True, otherwise None
+
+        Notes
+        -----
+        The new synchronization is published while the ECI connection is
+        still held for its round trip, and every event start is stamped
+        against the synchronization current when the event is written, so
+        an event sent while a background resync is in flight is always
+        relative to the sync the amp last received. Errors raised by the
+        worker are re-raised by the next call to resync or wait_resync.
+        """
+        self._raise_resync_error()
+        if not background:
+            if self._clock == 'simple':
+                self.clocksync()
+            else:
+                self.ntpsync()
+            return None
+        if self._clock == 'ntp' and not self._ntp_ip:
+            raise NetStationNoNTPIP()
+        return self._start_resync()
+
+    def _start_resync(self, automatic: bool = False) -> threading.Thread:
+        """Start the resync worker unless it is already running
+
+        Parameters
+        ----------
+        automatic: whether the resync was started by the error budget, so
+            a failure is counted in sync_report
+
+        Returns
+        -------
+        The worker thread
+        """
+        if self._resync_thread is not None and self._resync_thread.is_alive():
+            return self._resync_thread
+        self._resync_thread = threading.Thread(
+            target=self._background_resync, args=(automatic,), daemon=True
+        )
+        self._resync_thread.start()
+        return self._resync_thread
+
+    def wait_resync(self, timeout: float = None) -> None:
+        """Wait for a background resync to finish
+
+        Parameters
+        ----------
+        timeout: float
+            Maximum number of seconds to wait; default wait forever
+
+        Raises
+        ------
+        Any exception raised by the background resync
+        """
+        if self._resync_thread is not None:
+            self._resync_thread.join(timeout)
+        self._raise_resync_error()
+
+    def _background_resync(self, automatic: bool = False) -> None:
+        """Worker for resync(background=True); see _start_resync"""
+        try:
+            if self._clock == 'simple':
+                with self._idle_lock():
+                    self._simple_sync()
+            else:
+                offset = self._ntp_offset(idle=True)
+                with self._idle_lock():
+                    self._clock_sync(offset)
+        except Exception as e:
+            self._resync_error = e
+            if automatic:
+                with self._state_lock:
+                    self._n_failed += 1
+
+    @contextmanager
+    def _idle_lock(self):
+        """Hold the ECI lock, taken in a gap between commands
+
+        Waits until no command has been sent for resync_idle seconds, so a
+        background round trip does not start just as an event is about to
+        be sent; after resync_patience seconds without such a gap the lock
+        is taken regardless.
+        """
+        lock = self._eci_lock
+        deadline = perf_counter() + NetStation.resync_patience
+        while perf_counter() < deadline:
+            if lock.acquire(blocking=False):
+                idle = perf_counter() - self._last_activity
+                if idle >= NetStation.resync_idle:
+                    break
+                lock.release()
+            else:
+                idle = 0.0
+            time.sleep(NetStation.resync_idle - idle)
+        else:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def _raise_resync_error(self) -> None:
+        """Re-raise, once, an error recorded by the resync worker"""
+        error = self._resync_error
+        if error is not None:
+            self._resync_error = None
+            raise error
+
+    def _ntp_offset(self, idle: bool = False) -> float:
+        """Measure the offset of the amp's NTP clock for a sync
+
+        Parameters
+        ----------
+        idle: if True, take each ECI round trip of the eci clock in a gap
+            between commands; see _idle_lock
+
+        Returns
+        -------
+        The offset of the amp's NTP clock from the local clock in seconds,
+        from NTPReturnClock round trips with the eci clock and from the
+        amp's NTP server otherwise; always 0 for NTP with the memory
+        backend
+        """
+        if self._clock == 'eci':
+            return self._eci_estimate(NetStation.eci_samples, idle).offset
+        return self._ntp_estimate().offset
+
+    def _ntp_estimate(self) -> OffsetEstimate:
+        """Request the offset from the amplifier's NTP server
+
+        Returns
+        -------
+        OffsetEstimate from a single NTP exchange, with half its delay as
+        the error bound
+        """
+        if self._dry_run:
+            return OffsetEstimate(0.0, 0.0, 0.0, 1)
+        tracing = tracer.enabled
+        if tracing:
+            t0 = perf_counter_ns()
         c = NTPClient()
         response = c.request(self._ntp_ip, version=3)
-        t = time.time()
-        ntp_t = system_to_ntp_time(t + response.offset)
-        cresponse = self._command('NTPClockSync', ntp_t)
-        self._offset = response.offset
-        self._syncepoch = t
-        # TODO: Turn into a debug option
-        # print('Sent local time: ' + format_time(t))
-        # print(f'NTP offset is approx {self._offset}')
-        # print(f'Syncepoch is approx {self._syncepoch}')
+        if tracing:
+            tracer.span(NTP, t0, perf_counter_ns(), response.offset)
+        return OffsetEstimate(
+            response.offset, response.delay / 2, response.delay, 1
+        )
+
+    @check_connected
+    def eci_offset(self, samples: int = 8) -> OffsetEstimate:
+        """Estimate the amp clock's offset over the ECI connection
+
+        Sends NTPReturnClock with the local time samples times, timing
+        each round trip, and filters the amp's replies with
+        sync.estimate_offset. No NTP server or UDP exchange is needed.
+
+        Parameters
+        ----------
+        samples: the number of round trips
+
+        Returns
+        -------
+        OffsetEstimate of the amp clock minus the local clock
+
+        Raises
+        ------
+        ValueError
+            If samples is less than 1
+
+        Notes
+        -----
+        The round trips are timed around the whole command, so the error
+        bound includes the few microseconds spent building and parsing
+        it. The ECI connection is released between round trips, so an
+        event waits for at most one of them. Replies are taken to carry
+        the amp's NTP time when it answered.
+
+        See Also
+        --------
+        compare_offsets: to cross-check the estimate against NTP
+        """
+        if samples < 1:
+            raise ValueError('At least one round trip is required')
+        return self._eci_estimate(samples)
+
+    def _eci_estimate(
+        self, samples: int, idle: bool = False
+    ) -> OffsetEstimate:
+        """Take the NTPReturnClock round trips for eci_offset
+
+        Parameters
+        ----------
+        samples: the number of round trips
+        idle: if True, take each round trip in a gap between commands; see
+            _idle_lock
+
+        Returns
+        -------
+        OffsetEstimate of the amp clock minus the local clock
+        """
+        readings = []
+        for _ in range(samples):
+            # Released between round trips, so events are not held up
+            with self._idle_lock() if idle else self._eci_lock:
+                sent = time.time()
+                remote = self._command(
+                    'NTPReturnClock', system_to_ntp_time(sent)
+                )
+                received = time.time()
+            readings.append((sent, received, ntp_to_system_time(remote)))
+        return estimate_offset(readings)
 
     @check_connected
-    def resync(self):
-        """Ensure clocks are synchronized"""
-        self.ntpsync()
+    def compare_offsets(self, samples: int = 8) -> dict:
+        """Cross-check the ECI round-trip offset against NTP
+
+        Parameters
+        ----------
+        samples: the number of ECI round trips
+
+        Returns
+        -------
+        Dictionary with the 'eci' and 'ntp' OffsetEstimates, their
+        'difference' (eci minus ntp) in seconds, and the 'combined'
+        estimate weighting each by its error bound
+
+        Raises
+        ------
+        NetStationNoNTPIP
+            If connected without an NTP server IP
+        """
+        if not self._ntp_ip:
+            raise NetStationNoNTPIP()
+        eci = self.eci_offset(samples)
+        ntp = self._ntp_estimate()
+        return {
+            'eci': eci,
+            'ntp': ntp,
+            'difference': eci.offset - ntp.offset,
+            'combined': combine_offsets(eci, ntp),
+        }
+
+    def _simple_sync(self) -> None:
+        """Send ClockSync with the millisecond clock and publish the result
+
+        The epoch is the instant the (floored) millisecond count was taken,
+        so that event starts computed from it land on the same clock.
+        """
+        tracing = tracer.enabled
+        if tracing:
+            t0 = perf_counter_ns()
+        with self._eci_lock:
+            ms = floor((time.time() - self._mstime) * 1000)
+            clock_ms = wrap_ms(ms)
+            self._command('ClockSync', clock_ms)
+            self._sync = SyncState(self._mstime + ms / 1000, 0.0, clock_ms)
+            self._clocks.capture()
+        if tracing:
+            tracer.span(SYNC, t0, perf_counter_ns(), self._sync)
+        with self._state_lock:
+            self._n_syncs += 1
+        self._save_checkpoint()
+
+    def _clock_sync(self, offset: float) -> None:
+        """Send NTPClockSync for the given offset and publish the result
+
+        Parameters
+        ----------
+        offset: the NTP offset, in seconds, to synchronize with
+        """
+        tracing = tracer.enabled
+        if tracing:
+            t0 = perf_counter_ns()
+        with self._eci_lock:
+            t = time.time()
+            ntp_t = system_to_ntp_time(t + offset)
+            self._command('NTPClockSync', ntp_t)
+            self._ntpsynced = True
+            self._sync = SyncState(t, offset)
+            self._drift.add(self._sync)
+            self._clocks.capture()
+        with self._state_lock:
+            self._n_syncs += 1
+        if tracing:
+            tracer.span(SYNC, t0, perf_counter_ns(), self._sync)
+        self._save_checkpoint()
 
     @check_connected
     def resync_do_not_use_not_recommended(self):
@@ -191,37 +1002,219 @@ class NetStation(object):
         ntp_t = system_to_ntp_time(t)
         response = self._command('NTPReturnClock', ntp_t + response.offset)
         self.send_event(event_type="RESY")
-        # TODO: Turn into a debug option
-        # print('Sent local time: ' + format_time(t))
-        # print(f'NTP offset is approx {self._offset}')
-        # print(f'Response is {response} (or {format_time(response)}')
 
     @check_connected
     def disconnect(self) -> None:
-        """Close the TCP/IP connection."""
-        self._command('Exit')
+        """Close the TCP/IP connection.
+
+        Events deferred by a latency objective's 'batch' strategy are sent
+        first, as by end_rec. If the connection was lost, the socket is
+        only closed.
+        """
+        self.stop_heartbeat()
+        if self._protocol.state != CLOSED:
+            if self._deferred:
+                self.flush('high')
+            self._command('Exit')
         self._socket.disconnect()
+        self._protocol.connection_lost()
         self._connected = False
 
     @check_connected
-    def begin_rec(self) -> None:
-        """Begin Recording; also performs NTP sync"""
-        if self._ntp_ip:
+    def start_heartbeat(
+        self, interval: float = 1.0, reconnect: bool = False
+    ) -> None:
+        """Probe the connection with Attention whenever it is idle
+
+        Parameters
+        ----------
+        interval: seconds between probes; a probe is only sent if no
+            command has been sent for this long
+        reconnect: if True, re-establish a dead connection from the
+            heartbeat thread, so it is fixed before the next event is sent
+            rather than during it; default False
+
+        Notes
+        -----
+        A probe is never interleaved with another command: it is skipped
+        if any command is in flight. A command started while a probe is in
+        flight waits for the probe's round trip. The state of the
+        connection is available from health().
+        """
+        self.stop_heartbeat()
+        self._heartbeat = Heartbeat(
+            self._beat, self._health, interval,
+            self._reconnect if reconnect else None
+        )
+        self._heartbeat.start()
+
+    def stop_heartbeat(self) -> None:
+        """Stop the heartbeat, if one is running"""
+        if self._heartbeat is not None:
+            self._heartbeat.stop()
+            self._heartbeat = None
+
+    def health(self) -> dict:
+        """Get the health of the connection
+
+        Returns
+        -------
+        Dictionary with the state ('unknown', 'healthy' or 'dead'), the
+        seconds spent in that state, the error that marked the connection
+        dead, and the number of heartbeats sent
+
+        See Also
+        --------
+        heartbeat.ConnectionHealth
+        """
+        return self._health.report()
+
+    def session_state(self) -> str:
+        """Get the ECI session state
+
+        Returns
+        -------
+        One of 'closed', 'connected', 'queried', 'attentive', 'synced' or
+        'recording'; see protocol.ECIProtocol
+        """
+        return self._protocol.state
+
+    @check_connected
+    def ensure_connected(self) -> bool:
+        """Re-establish the connection if it is known to be dead
+
+        Call between trials to avoid a failure at the next event. The new
+        connection is resynchronized, and recording is begun again if it
+        was in progress.
+
+        Returns
+        -------
+        True if the connection was re-established
+        """
+        if self._health.state != DEAD:
+            return False
+        self._reconnect()
+        return True
+
+    def _beat(self, idle: float) -> bool:
+        """Send Attention if the connection is idle and no command is in
+        flight
+
+        Parameters
+        ----------
+        idle: the seconds without a command after which to probe
+
+        Returns
+        -------
+        Whether the probe was sent
+        """
+        if perf_counter() - self._last_activity < idle:
+            return False
+        if not self._eci_lock.acquire(blocking=False):
+            return False
+        try:
+            self._command('Attention')
+        finally:
+            self._eci_lock.release()
+        return True
+
+    def _reconnect(self) -> None:
+        """Open a new connection, repeat the handshake and resync
+
+        Recording is begun again if it was in progress, as by resume.
+        """
+        offset = None
+        if self._sync is not None and self._clock == 'ntp':
+            # The NTP exchange does not need the ECI connection; the eci
+            # clock's round trips must wait for the new one
+            offset = self._ntp_offset()
+        with self._eci_lock:
+            self._socket.disconnect()
+            self._socket.connect()
+            self._protocol.connection_made()
+            self._handshake()
+            if self._sync is not None:
+                if self._clock == 'simple':
+                    self._simple_sync()
+                else:
+                    if offset is None:
+                        offset = self._ntp_offset()
+                    self._clock_sync(offset)
+            if self._recording_start is not None:
+                self._command('BeginRecording')
+
+    def set_sync_policy(
+        self, max_age: float = None, max_error: float = None
+    ) -> None:
+        """Set when begin_rec reuses the current sync instead of syncing
+
+        Parameters
+        ----------
+        max_age: the age in seconds at which the sync is always redone;
+            0 to sync at every begin_rec. Default unchanged.
+        max_error: the estimated timing error in seconds, from the drift
+            since the sync, at which it is redone. Default unchanged.
+
+        Notes
+        -----
+        If an error budget is set, the sync is also redone once the
+        estimated error reaches the point where an automatic resync would
+        start; see set_error_budget.
+        """
+        if max_age is not None:
+            self._sync_policy.max_age = max_age
+        if max_error is not None:
+            self._sync_policy.max_error = max_error
+
+    @check_connected
+    def begin_rec(self) -> bool:
+        """Begin Recording; also performs NTP sync
+
+        The sync is skipped if the current one is still fresh: younger
+        than the policy's maximum age and within its error tolerance. Back
+        to back recordings then start with a single round trip.
+
+        Returns
+        -------
+        True if the current sync was reused, False if a sync was performed
+
+        See Also
+        --------
+        set_sync_policy: to change the age and error tolerance
+        """
+        skipped = self._sync_is_fresh()
+        if skipped:
+            with self._state_lock:
+                self._n_skipped += 1
+        elif self._clock == 'simple':
+            self.clocksync()
+        elif self._ntp_ip or self._clock == 'eci':
             self.ntpsync()
-        # TODO: verify simple clock works correctly
-        elif clock == 'simple':
-            t = floor(time.time() * 1000)
-            self._command('ClockSync', t)
-            self._syncepoch = t
 
         self._recording_start = time.time()
         self._command('BeginRecording')
+        self._save_checkpoint()
+        return skipped
+
+    def _sync_is_fresh(self) -> bool:
+        """Whether the current sync is within the sync policy"""
+        sync = self._sync
+        t = time.time()
+        if not self._sync_policy.is_fresh(sync, t, self._drift):
+            return False
+        if self._error_budget is None:
+            return True
+        error = self._drift.error_at(t, sync)
+        return error < self._error_budget * NetStation.resync_margin
 
     @check_connected
     def end_rec(self) -> None:
         """End Recording"""
+        if self._deferred:
+            self.flush('high')
         self._command('EndRecording')
         self._recording_start = None
+        self._save_checkpoint()
 
     @check_connected
     def send_event(
@@ -238,9 +1231,9 @@ class NetStation(object):
         Parameters
         ----------
         start: str, float, int
-            The start time for the event; if string, use "now" only.
-            Otherwise state the amount of time since recording in seconds.
-            Default "now".
+            The start time for the event; if string, use "now" or
+            "transmit". Otherwise state the amount of time since recording
+            in seconds. Default "now".
         duration: float
             The duration of the event in seconds; default 0.001
         event_type: str
@@ -259,6 +1252,16 @@ class NetStation(object):
         latency in real time is about 54 +/- 3 ms for a short experiment.
         More data to come; stay tuned.
 
+        "now" takes the time before the event is validated and packed.
+        "transmit" instead packs the event with a placeholder start and
+        patches the time into the datagram immediately before it is
+        written to the socket, so validation and packing time does not
+        become timing error. Either way, the time send_event was called
+        and the time actually stamped are available from last_stamp().
+        While events are batched (see set_latency_slo), a "transmit"
+        event is stamped as its batch is written by flush, and
+        last_stamp() is only updated then.
+
         It is not necessary to send any data; in fact, this is recommended
         as it takes some (admittedly small) amount of time to package the
         data.
@@ -275,23 +1278,346 @@ class NetStation(object):
         - The dictionary representing the data must be shallow; no nested
           dictionaries.
 
+        While a latency objective is breached, the event may be queued,
+        or sent without waiting for its acknowledgement; see
+        set_latency_slo.
+
         See Also
         --------
         eci.eci for explanations of the internals of the packaging
         """
+        watchdog = self._watchdog
+        mode = NORMAL if watchdog is None else watchdog.mode
+        sync = self._sync
+        late = False
         if start == 'now':
-            start = time.time() - self._syncepoch
+            intended = time.time()
+            start = intended - sync.epoch
+        elif start == 'transmit':
+            intended = time.time()
+            late = True
+            start = 0
         elif isinstance(start, float):
-            start = start
+            intended = sync.epoch + start
         else:
             t_start = type(start)
             return TypeError(
                 f'Start is type {t_start}, should be str "now" or float'
             )
-        data = package_event(
-            start, duration, event_type, label, desc, data
+        buffers = package_event_buffers(
+            start, duration, event_type, label, desc, data, sync.clock_ms
+        )
+        recording = self._history is not None
+        if mode == BATCH:
+            # A "transmit" start is left for flush to stamp as it writes
+            self._queue.put(
+                build_command_buffers('EventData', buffers), 'high',
+                (None if late else start, duration, sync, intended)
+            )
+            self._deferred = True
+            watchdog.deferred += 1
+            if self._queue.pending('high') >= watchdog.batch_size:
+                self.flush('high')
+            return
+        if self._deferred:
+            self.flush('high')
+        if recording:
+            t_write = perf_counter()
+        acked = not (mode == FIRE_AND_FORGET and watchdog.skip_ack())
+        stamp = (None if late else start, sync)
+        if acked:
+            (start, sync, tx_key) = self._command(
+                'EventData', buffers, stamp=stamp
+            )
+        else:
+            (start, sync, tx_key) = self._send_unacked(buffers, stamp)
+        stamp_time = sync.epoch + start
+        self._last_stamp = (intended, stamp_time)
+        seq = self._take_seq(1)
+        if recording:
+            ack_latency = perf_counter() - t_write if acked else float('nan')
+            with self._eci_lock:
+                tx_time = self._socket.tx_time(tx_key)
+            self._history.add(
+                seq, start, duration, buffers[1], buffers[2], stamp_time,
+                ack_latency, sync.offset, sync.epoch, tx_time,
+                ACKED if acked else UNACKED, intended
+            )
+        if self._error_budget is not None:
+            self._check_error_budget(stamp_time)
+
+    @check_connected
+    def queue_event(
+        self,
+        start='now',
+        duration: float = 0.001,
+        event_type: str = ' ' * 4,
+        label: str = ' ' * 4,
+        desc: str = ' ' * 4,
+        data: dict = {},
+        priority: str = 'bulk',
+    ) -> None:
+        """Queue an event to be sent in a batch by flush
+
+        Parameters
+        ----------
+        start, duration, event_type, label, desc, data:
+            As for send_event; "now" is the time the event is queued, and
+            "transmit" is not supported
+        priority: str
+            Either "high" or "bulk". High-priority events are sent before
+            any pending bulk events and are never batched with them.
+            Default "bulk".
+
+        Raises
+        ------
+        NetStationIllegalArgument
+            If priority is not one of event_queue.priorities
+        TypeError
+            If the event is invalid; see send_event
+
+        Notes
+        -----
+        The event is validated and packed immediately, so queueing is
+        cheap to do during a trial and flushing can wait for an idle gap.
+        Its start is stamped again when it is written if a sync has been
+        published since, so it stays at the same time.
+        Bulk events are dropped while a latency objective is breached with
+        the 'drop_bulk' strategy; see set_latency_slo.
+        """
+        if priority not in priorities:
+            raise NetStationIllegalArgument(priority)
+        watchdog = self._watchdog
+        if (
+            priority == 'bulk' and watchdog is not None
+            and watchdog.mode == DROP_BULK
+        ):
+            watchdog.dropped += 1
+            return
+        sync = self._sync
+        if start == 'now':
+            intended = time.time()
+            start = intended - sync.epoch
+        elif isinstance(start, float):
+            intended = sync.epoch + start
+        else:
+            t_start = type(start)
+            raise TypeError(
+                f'Start is type {t_start}, should be str "now" or float'
+            )
+        buffers = package_event_buffers(
+            start, duration, event_type, label, desc, data, sync.clock_ms
         )
-        self._command('EventData', data)
+        self._queue.put(
+            build_command_buffers('EventData', buffers), priority,
+            (start, duration, sync, intended)
+        )
+
+    @check_connected
+    def flush(self, priority: str = None) -> int:
+        """Send all queued events, highest priority first
+
+        Parameters
+        ----------
+        priority: only send the events of this lane; default all lanes
+
+        Returns
+        -------
+        The number of events sent
+
+        Raises
+        ------
+        NetStationIllegalArgument
+            If priority is not None or one of event_queue.priorities
+
+        Notes
+        -----
+        Each batch is written with a single scatter-gather write before
+        its acknowledgements are read. A high-priority event queued from
+        another thread during a flush is sent before the next bulk batch.
+        While a latency objective is breached with the 'drop_bulk'
+        strategy, pending bulk events are dropped instead of sent.
+        """
+        if priority is None:
+            lanes = priorities
+        elif priority in priorities:
+            lanes = (priority,)
+        else:
+            raise NetStationIllegalArgument(priority)
+        watchdog = self._watchdog
+        if (
+            watchdog is not None and watchdog.mode == DROP_BULK
+            and 'bulk' in lanes
+        ):
+            watchdog.dropped += self._queue.discard('bulk')
+        n_sent = 0
+        while True:
+            lane, batch = self._queue.take_batch(lanes)
+            if not batch:
+                if not self._queue.pending('high'):
+                    self._deferred = False
+                if n_sent and self._error_budget is not None:
+                    self._check_error_budget(time.time())
+                return n_sent
+            frames = [b for event in batch for b in event.buffers]
+            tracing = tracer.enabled
+            with self._eci_lock:
+                if len(self._protocol):
+                    self._drain_unacked()
+                stamps = [
+                    self._stamp(
+                        event.buffers[EVENT_BLOCK_INDEX],
+                        event.record[0], event.record[2]
+                    )
+                    for event in batch
+                ]
+                self._queue.record_sent(lane, batch)
+                (start, sync) = stamps[-1]
+                self._last_stamp = (batch[-1].record[3], sync.epoch + start)
+                self._protocol.expect('EventData', len(batch))
+                t_batch = perf_counter()
+                if tracing:
+                    t_write = perf_counter_ns()
+                try:
+                    self._socket.write(frames)
+                    if tracing:
+                        t_read = perf_counter_ns()
+                        tracer.span(WRITE, t_write, t_read, len(batch))
+                    self._read_acks(len(batch))
+                except OSError as e:
+                    self._connection_failed(e)
+                    raise
+                self._last_activity = perf_counter()
+                if tracing:
+                    tracer.span(READ, t_read, perf_counter_ns(), len(batch))
+                tx_time = None
+                if self._history is not None:
+                    tx_time = self._socket.tx_time(self._socket.last_tx_key)
+            latency = self._last_activity - t_batch
+            seq = self._take_seq(len(batch))
+            if self._history is not None:
+                self._record_batch(batch, seq, stamps, latency, tx_time)
+            n_sent += len(batch)
+            watchdog = self._watchdog
+            if watchdog is not None:
+                watchdog.observe(latency)
+
+    def _take_seq(self, n: int) -> int:
+        """Number n events which have just been sent
+
+        Once the numbers reserved by the checkpoint run out, it is saved
+        again to reserve the next checkpoint_seq_block.
+
+        Parameters
+        ----------
+        n: the number of events
+
+        Returns
+        -------
+        The sequence number of the first event
+        """
+        with self._state_lock:
+            seq = self._seq
+            self._seq = seq + n
+            exhausted = self._seq >= self._seq_reserved
+        if exhausted and self._checkpoint is not None:
+            self._save_checkpoint()
+        return seq
+
+    def _record_batch(
+        self, batch: list, seq: int, stamps: list, ack_latency: float,
+        tx_time: float = None
+    ) -> None:
+        """Record a batch of queued events which has just been sent
+
+        Parameters
+        ----------
+        batch: the list of QueuedEvent
+        seq: the sequence number of the first event
+        stamps: the (start, sync) written into each event; see _stamp
+        ack_latency: the time from writing the batch to reading all of its
+            acknowledgements
+        tx_time: the kernel transmit time of the batch, if known
+        """
+        history = self._history
+        for (event, (start, sync)) in zip(batch, stamps):
+            (_, duration, _, intended) = event.record
+            buffers = event.buffers
+            history.add(
+                seq, start, duration, buffers[EVENT_BLOCK_INDEX],
+                buffers[EVENT_BLOCK_INDEX + 1], sync.epoch + start,
+                ack_latency, sync.offset, sync.epoch, tx_time, ACKED,
+                intended
+            )
+            seq += 1
+
+    def history(self) -> EventHistory:
+        """Get the record of sent events
+
+        Returns
+        -------
+        The EventHistory of every event sent, or None if the NetStation
+        was not constructed with record=True
+        """
+        return self._history
+
+    def memory_log(self) -> MemoryEventLog:
+        """Get the commands and events received by the memory backend
+
+        Returns
+        -------
+        The MemoryEventLog of the dry run
+
+        Raises
+        ------
+        NetStationIllegalArgument
+            If the NetStation was not constructed with backend='memory'
+        """
+        if not self._dry_run:
+            raise NetStationIllegalArgument('memory_log without dry run')
+        return self._socket.log
+
+    def export_events(self, path: str, **kwargs) -> None:
+        """Export the record of sent events to a columnar file
+
+        Parameters
+        ----------
+        path: the .npz or .parquet file to write
+        kwargs: passed to export.export_events
+
+        Raises
+        ------
+        NetStationIllegalArgument
+            If the NetStation was not constructed with record=True
+        """
+        if self._history is None:
+            raise NetStationIllegalArgument('record=False')
+        export_events(self._history, path, **kwargs)
+
+    def queue_stats(self) -> dict:
+        """Get queue-wait latency for each priority lane
+
+        Returns
+        -------
+        Dictionary mapping "high" and "bulk" to the number of events sent
+        and pending and the mean and max queue wait in seconds
+        """
+        return self._queue.stats()
+
+    def last_stamp(self) -> tuple:
+        """Get the stamp times of the last event sent
+
+        Returns
+        -------
+        Tuple of (intended, actual) times from time.time(); intended is
+        when send_event was called (or the requested start), actual is the
+        time written into the event. These only differ for
+        start="transmit", or for an event from before a sync published
+        while it waited to be written, which is written as the sync's
+        epoch. Queued and batched events count as sent once flush writes
+        them.
+        """
+        return self._last_stamp
 
     def rec_start(self) -> float:
         """Get recording start time from time.time()
@@ -314,7 +1640,197 @@ class NetStation(object):
         else:
             return None
 
-    def _command(self, cmd: str, data=None) -> Union[bool, float, int]:
+    def wait_until(self, start: float) -> float:
+        """Wait precisely until an event start time
+
+        Parameters
+        ----------
+        start: the time to wait for, in the same units as a float start
+            passed to send_event (seconds since the last sync)
+
+        Returns
+        -------
+        The wake-up error in seconds
+
+        Notes
+        -----
+        Pair with send_event(start=start) to mark a scheduled stimulus;
+        the wait sleeps with the OS timer and spins only for the final
+        fraction of a millisecond, see util.PrecisionSleeper.
+        """
+        return wait_until(self._sync.epoch + start, clock=time.time)
+
+    def register_clock(self, name: str, clock) -> None:
+        """Register a clock that event times may be given in
+
+        Parameters
+        ----------
+        name: the name to pass to to_start
+        clock: a function returning the clock's time in seconds, e.g.
+            psychopy.core.getTime or pylsl.local_clock
+
+        Notes
+        -----
+        perf_counter and monotonic are registered already. A paired
+        reading of every registered clock and time.time() is taken at
+        each sync, so conversions stay within the drift between the
+        clocks since the last sync.
+        """
+        self._clocks.register(name, clock)
+
+    def to_start(self, t, clock: str = 'perf_counter'):
+        """Convert times from a registered clock into event starts
+
+        Parameters
+        ----------
+        t: a time, or a NumPy array or sequence of times, read from clock
+        clock: the name of a registered clock; default 'perf_counter'
+
+        Returns
+        -------
+        The start (or array of starts) to pass to send_event or
+        queue_event: seconds since the last sync
+
+        Raises
+        ------
+        KeyError
+            If the clock is not registered
+        NetStationUnsynced
+            If no sync has been performed yet
+
+        Examples
+        --------
+        >>> flips = np.array(frame_flip_times)  # from perf_counter
+        >>> for start in ns.to_start(flips):
+        ...     ns.queue_event(start=float(start), event_type="FRAM")
+        >>> ns.flush()
+        """
+        sync = self._sync
+        if sync is None:
+            raise NetStationUnsynced()
+        return self._clocks.to_time(t, clock) - sync.epoch
+
+    def _read_acks(self, n: int) -> None:
+        """Read and check the single-byte acknowledgements of n events
+
+        Parameters
+        ----------
+        n: the number of EventData commands awaiting acknowledgement
+
+        Raises
+        ------
+        ECIResponseFailure if any event was not acknowledged
+        """
+        error = None
+        while n > 0:
+            chunk = self._socket.read()
+            if not chunk:
+                raise ConnectionResetError()
+            for reply in self._protocol.receive(chunk):
+                n -= 1
+                if error is None:
+                    error = reply.error
+        if error is not None:
+            raise error
+
+    def _send_unacked(self, buffers: list, stamp: tuple) -> tuple:
+        """Write an EventData command without waiting for its reply
+
+        The reply is read, and counted if it is a failure, before the next
+        command is written; see _drain_unacked.
+
+        Parameters
+        ----------
+        buffers: the event buffers from eci.package_event_buffers
+        stamp: the (start, sync) the event was packed with, as for
+            _command
+
+        Returns
+        -------
+        The (start, sync, tx_key) of the event, as for _command
+        """
+        with self._eci_lock:
+            eci_cmd = self._protocol.send('EventData', buffers)
+            stamp = self._stamp(eci_cmd[EVENT_BLOCK_INDEX], *stamp)
+            try:
+                self._socket.write(eci_cmd)
+            except OSError as e:
+                self._connection_failed(e)
+                raise
+            self._last_activity = perf_counter()
+            if self._watchdog is not None:
+                self._watchdog.unacked += 1
+            return stamp + (self._socket.last_tx_key,)
+
+    def _stamp(self, block: bytearray, start: float, sync: SyncState) -> tuple:
+        """Stamp an event block against the current sync before writing
+
+        The ECI lock must be held, so no sync can be published between
+        the stamp and the write.
+
+        Parameters
+        ----------
+        block: the mutable event block from package_event_buffers
+        start: the start the block was packed with, in seconds since
+            sync; None to stamp the current time
+        sync: the SyncState the block was packed against
+
+        Returns
+        -------
+        The (start, sync) written into the block; starts from before a
+        newer sync are written as 0, the earliest start it can express
+        """
+        current = self._sync
+        if start is None:
+            start = time.time() - current.epoch
+        elif current is sync:
+            return (start, sync)
+        else:
+            start = max(0.0, start + sync.epoch - current.epoch)
+        stamp_event(block, 0, start, current.clock_ms)
+        return (start, current)
+
+    def _connection_failed(self, error: Exception) -> None:
+        """Mark the connection dead after a failed write or read
+
+        Commands still awaiting a reply are dropped with the session: a
+        reply arriving after a read timeout would otherwise be taken for
+        the reply to the next command. The ECI lock must be held.
+
+        Parameters
+        ----------
+        error: the error that ended the connection
+        """
+        self._health.mark_dead(error)
+        self._protocol.connection_lost()
+
+    def _drain_unacked(self) -> None:
+        """Read the replies to every command still awaiting one
+
+        Only events sent by _send_unacked are ever left awaiting a reply.
+        Failures are counted by the watchdog rather than raised, since
+        the caller chose not to wait for them. The ECI lock must be held.
+        """
+        n = len(self._protocol)
+        failures = 0
+        try:
+            while n > 0:
+                chunk = self._socket.read()
+                if not chunk:
+                    raise ConnectionResetError()
+                for reply in self._protocol.receive(chunk):
+                    n -= 1
+                    if reply.error is not None:
+                        failures += 1
+        except OSError as e:
+            self._connection_failed(e)
+            raise
+        if failures and self._watchdog is not None:
+            self._watchdog.unacked_failures += failures
+
+    def _command(
+        self, cmd: str, data=None, stamp: SyncState = None
+    ) -> Union[bool, float, int]:
         """Send a command to the amplifier; please do not use as this is
         internal.
 
@@ -322,10 +1838,15 @@ class NetStation(object):
         ----------
         cmd: the command to send
         data: the data to send with it
+        stamp: for EventData only, the (start, sync) the event was packed
+            with; the start is re-stamped against the sync current when
+            the event is written, and None stamps the time of writing. See
+            send_event.
 
         Returns
         -------
-        The server response
+        The server response, or, if stamp is given, the (start, sync)
+        written into the event and the socket's last_tx_key for its write
 
         Raises
         ------
@@ -335,11 +1856,53 @@ class NetStation(object):
         See Also
         --------
         eci.eci: module for building commands and parsing responses
+        protocol.ECIProtocol: the state machine framing the responses
         """
         if not self._connected:
             raise NetStationUnconnected()
-        eci_cmd = build_command(cmd, data)
-        # TODO: turn into a debug option
-        # print(f'{cyan}Sending command: {eci_cmd}{reset}')
-        self._socket.write(eci_cmd)
-        return parse_response(self._socket.read())
+        tracing = tracer.enabled
+        with self._eci_lock:
+            if len(self._protocol):
+                self._drain_unacked()
+            eci_cmd = self._protocol.send(cmd, data)
+            if stamp is not None:
+                # The event block from package_event_buffers is mutable
+                stamp = self._stamp(eci_cmd[EVENT_BLOCK_INDEX], *stamp)
+            if tracing:
+                t_write = perf_counter_ns()
+            t_sent = perf_counter()
+            try:
+                self._socket.write(eci_cmd)
+                if tracing:
+                    t_read = perf_counter_ns()
+                    tracer.span(WRITE, t_write, t_read, eci_cmd[0])
+                response = self._socket.read()
+            except OSError as e:
+                self._connection_failed(e)
+                raise
+            self._last_activity = perf_counter()
+            if response:
+                self._health.mark_healthy()
+            else:
+                self._health.mark_dead(ConnectionResetError())
+            if tracing:
+                t_parse = perf_counter_ns()
+                tracer.span(READ, t_read, t_parse, response)
+            if not response:
+                self._protocol.connection_lost()
+                raise InvalidECIResponse(response)
+            replies = self._protocol.receive(response, whole=True)
+            if stamp is not None:
+                stamp += (self._socket.last_tx_key,)
+            if tracing:
+                tracer.span(PARSE, t_parse, perf_counter_ns(), replies)
+        watchdog = self._watchdog
+        if watchdog is not None:
+            watchdog.observe(self._last_activity - t_sent)
+        for reply in replies:
+            if reply.error is not None:
+                raise reply.error
+        result = replies[0].value
+        if stamp is not None:
+            return stamp
+        return result
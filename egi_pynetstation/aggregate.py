@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Aggregation of high-rate markers into one summary event per window
+
+Sending an event for every eye-tracker or response-box sample at
+hundreds of hertz would overwhelm NetStation. MarkerAggregator keeps a
+running summary per stream instead, and sends a single event per window
+carrying the summary in its data fields.
+
+Examples
+--------
+>>> agg = MarkerAggregator(ns, window=0.1)
+>>> agg.add('FIXN', value=x_position)  # from the eye-tracker callback
+>>> agg.poll()                          # once per frame
+>>> agg.flush()                         # at the end of the block
+"""
+
+import threading
+import time
+from math import floor
+
+from .exceptions import *
+
+# Data keys of a summary event; all are exactly 4 characters, as ECI
+# requires
+COUNT_KEY = 'cnt '
+FIRST_KEY = 'frst'
+LAST_KEY = 'last'
+MIN_KEY = 'min '
+MAX_KEY = 'max '
+
+# The shortest event duration ECI accepts, in seconds
+MIN_DURATION = 0.001
+
+
+class WindowSummary(object):
+    """Running summary of the samples of one stream in one window
+
+    Attributes
+    ----------
+    window_start: float
+        The time.time() the window began
+    start: float
+        The time.time() the summary event starts: the window's start, or
+        the end of the previous summary of a window sent early
+    end: float
+        The time.time() the summary event ends if it was sent early, or
+        None for the end of the window
+    count: int
+        The number of samples
+    first: float
+        The time.time() of the first sample
+    last: float
+        The time.time() of the last sample
+    low: float
+        The smallest sample value, or None if no sample had a value
+    high: float
+        The largest sample value, or None if no sample had a value
+    """
+    __slots__ = (
+        'window_start', 'start', 'end', 'count', 'first', 'last', 'low',
+        'high'
+    )
+
+    def __init__(
+        self, window_start: float, t: float, start: float = None
+    ) -> None:
+        self.window_start = window_start
+        self.start = window_start if start is None else start
+        self.end = None
+        self.count = 0
+        self.first = t
+        self.last = t
+        self.low = None
+        self.high = None
+
+    def add(self, t: float, value: float = None) -> None:
+        """Fold one sample into the summary"""
+        self.count += 1
+        if t < self.first:
+            self.first = t
+        if t > self.last:
+            self.last = t
+        if value is not None:
+            if self.low is None or value < self.low:
+                self.low = value
+            if self.high is None or value > self.high:
+                self.high = value
+
+    def data(self, start: float) -> dict:
+        """Get the summary as event data
+
+        Parameters
+        ----------
+        start: the time.time() of the summary event's start
+
+        Returns
+        -------
+        Dictionary with the sample count, the offsets in seconds of the
+        first and last samples from start, and the minimum and maximum
+        values if any sample had one
+        """
+        data = {
+            COUNT_KEY: self.count,
+            FIRST_KEY: self.first - start,
+            LAST_KEY: self.last - start,
+        }
+        if self.low is not None:
+            data[MIN_KEY] = float(self.low)
+            data[MAX_KEY] = float(self.high)
+        return data
+
+
+class MarkerAggregator(object):
+    """Sends one summary event per stream per window of samples
+
+    Windows are aligned to multiples of window seconds, so summaries of
+    different streams line up. A window's summary is sent once a sample
+    of the same stream arrives in a later window, once it holds
+    max_count samples, or once poll or flush finds it has ended. Each
+    stream holds one summary at a time, so memory does not grow with the
+    sample rate.
+
+    The window sets the tradeoff: a summary is sent at most window
+    seconds (plus the polling interval) after its first sample, and each
+    stream sends at most 1 / window events per second. A window sent
+    early because it reached max_count ends at its last sample, and the
+    next summary of that window starts there, so summary events never
+    overlap.
+
+    Attributes
+    ----------
+    window: float
+        The window length in seconds
+    max_count: int
+        The number of samples after which a window is sent early, or None
+    queue: bool
+        Whether summaries are queued (bulk priority) for the next
+        NetStation.flush rather than sent immediately
+    """
+    def __init__(
+        self,
+        ns,
+        window: float = 0.1,
+        max_count: int = None,
+        queue: bool = False,
+        label: str = 'summary',
+    ) -> None:
+        """Constructor for MarkerAggregator
+
+        Parameters
+        ----------
+        ns: the connected NetStation to send summaries with
+        window: the window length in seconds
+        max_count: the number of samples after which a window is sent
+            before it ends; default None, never early
+        queue: if True, queue summaries with NetStation.queue_event
+            instead of sending them with send_event
+        label: the label of every summary event
+
+        Raises
+        ------
+        ValueError
+            If window is not positive or max_count is less than 1
+        """
+        if window <= 0:
+            raise ValueError(f'Window must be positive, is {window}')
+        if max_count is not None and max_count < 1:
+            raise ValueError(f'max_count must be at least 1, is {max_count}')
+        self.window = window
+        self.max_count = max_count
+        self.queue = queue
+        self.label = label
+        self._ns = ns
+        self._open = {}
+        self._samples = {}
+        self._sent = {}
+        self._early_ends = {}
+        self._lock = threading.Lock()
+
+    def add(self, stream: str, value: float = None, t: float = None) -> None:
+        """Record one sample
+
+        Parameters
+        ----------
+        stream: the stream's event type; exactly 4 characters
+        value: the sample's value, summarized by its minimum and maximum;
+            default None, count the sample only
+        t: the time of the sample, in the same terms as a float start to
+            send_event; default now
+
+        Raises
+        ------
+        TypeError
+            If stream is not 4 characters
+        NetStationUnsynced
+            If the NetStation has not synchronized yet, since summaries
+            could not be sent
+        """
+        epoch = self._epoch()
+        if t is None:
+            t = time.time()
+        else:
+            t += epoch
+        window_start = floor(t / self.window) * self.window
+        done = None
+        with self._lock:
+            summary = self._open.get(stream)
+            if summary is not None and summary.window_start != window_start:
+                done = summary
+                summary = None
+            if summary is None:
+                if len(stream) != 4:
+                    raise TypeError(
+                        f'Stream should have 4 characters, has {len(stream)}'
+                    )
+                start = None
+                early = self._early_ends.get(stream)
+                if early is not None and early[0] == window_start:
+                    start = early[1]
+                summary = WindowSummary(window_start, t, start)
+                self._open[stream] = summary
+            summary.add(t, value)
+            self._samples[stream] = self._samples.get(stream, 0) + 1
+            if self.max_count is not None and summary.count >= self.max_count:
+                del self._open[stream]
+                full = summary
+                full.end = max(full.last, full.start + MIN_DURATION)
+                self._early_ends[stream] = (window_start, full.end)
+            else:
+                full = None
+        if done is not None:
+            self._send(stream, done)
+        if full is not None:
+            self._send(stream, full)
+
+    def poll(self) -> int:
+        """Send the summaries of every window that has ended
+
+        Returns
+        -------
+        The number of summaries sent
+        """
+        now = time.time()
+        with self._lock:
+            ended = [
+                (stream, s) for stream, s in self._open.items()
+                if s.window_start + self.window <= now
+            ]
+            for stream, _ in ended:
+                del self._open[stream]
+        for stream, summary in ended:
+            self._send(stream, summary)
+        return len(ended)
+
+    def flush(self) -> int:
+        """Send every open summary, whether or not its window has ended
+
+        Returns
+        -------
+        The number of summaries sent
+        """
+        with self._lock:
+            pending = list(self._open.items())
+            self._open.clear()
+        for stream, summary in pending:
+            self._send(stream, summary)
+        return len(pending)
+
+    def stats(self) -> dict:
+        """Get the samples received and summaries sent for each stream
+
+        Returns
+        -------
+        Dictionary mapping each stream to a dictionary with the number
+        of samples and the number of events sent
+        """
+        with self._lock:
+            return {
+                stream: {'samples': n, 'events': self._sent.get(stream, 0)}
+                for stream, n in self._samples.items()
+            }
+
+    def _epoch(self) -> float:
+        """Get the epoch of the NetStation's current sync"""
+        sync = self._ns._sync
+        if sync is None:
+            raise NetStationUnsynced()
+        return sync.epoch
+
+    def _send(self, stream: str, summary: WindowSummary) -> None:
+        """Send one window's summary as an event"""
+        epoch = self._epoch()
+        start = summary.start
+        if start < epoch:
+            # Event starts cannot precede the sync they are relative to
+            start = max(summary.first, epoch)
+        end = summary.end
+        if end is None:
+            end = summary.window_start + self.window
+        send = self._ns.queue_event if self.queue else self._ns.send_event
+        send(
+            start=float(start - epoch),
+            duration=max(end - start, MIN_DURATION),
+            event_type=stream,
+            label=self.label,
+            data=summary.data(start),
+        )
+        with self._lock:
+            self._sent[stream] = self._sent.get(stream, 0) + 1
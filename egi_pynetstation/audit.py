@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Audit of sent events against the events NetStation recorded
+
+NetStation writes the events of a recording into Events_*.xml files in
+the .mff directory. iter_mff_events parses them incrementally, clearing
+each element once read, so memory stays constant however long the
+recording. audit matches the recorded events to the records kept by
+NetStation(record=True) and summarizes the timing offsets.
+
+NumPy is required for audit, and imported on use.
+
+Examples
+--------
+>>> from egi_pynetstation.audit import audit
+>>> report = audit(ns.history(), 'session.mff')
+>>> report['median'], report['jitter']
+"""
+
+import glob
+import os
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Iterable, Iterator, NamedTuple, Union
+from xml.etree.ElementTree import iterparse
+
+from .history import EventRecord
+
+# Percentiles of the offsets included in the audit report
+percentiles = (1, 5, 50, 95, 99)
+
+fromisoformat = datetime.fromisoformat
+
+
+class RecordedEvent(NamedTuple):
+    """An event as NetStation recorded it
+
+    Attributes
+    ----------
+    begin_time: float
+        The start of the event as a POSIX timestamp, on the amp clock
+    duration: int
+        The duration exactly as written in the file
+    code: str
+        The four-character event type
+    label: str
+        The event label
+    desc: str
+        The event description
+    track: str
+        The name of the event track the event was read from
+    """
+    begin_time: float
+    duration: int
+    code: str
+    label: str
+    desc: str
+    track: str
+
+
+def _event_files(path: str) -> list:
+    """Get the event track files of an .mff directory, or path itself"""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, 'Events_*.xml')))
+    return [path]
+
+
+def iter_mff_events(path: str) -> Iterator[RecordedEvent]:
+    """Stream the recorded events of an MFF recording
+
+    Parameters
+    ----------
+    path: an .mff directory, whose Events_*.xml tracks are all read, or a
+        single event track file
+
+    Yields
+    ------
+    RecordedEvent, in file order
+    """
+    for filename in _event_files(path):
+        context = iterparse(filename, events=('start', 'end'))
+        _, root = next(context)
+        # Child tags carry the namespace of the root, if any
+        ns = root.tag[:root.tag.index('}') + 1] if '}' in root.tag else ''
+        event_tag = ns + 'event'
+        name_tag = ns + 'name'
+        begin_tag = ns + 'beginTime'
+        duration_tag = ns + 'duration'
+        code_tag = ns + 'code'
+        label_tag = ns + 'label'
+        desc_tag = ns + 'description'
+        track = ''
+        for kind, elem in context:
+            if kind != 'end':
+                continue
+            tag = elem.tag
+            if tag == event_tag:
+                yield RecordedEvent(
+                    fromisoformat(elem.findtext(begin_tag)).timestamp(),
+                    int(elem.findtext(duration_tag) or 0),
+                    elem.findtext(code_tag) or '',
+                    elem.findtext(label_tag) or '',
+                    elem.findtext(desc_tag) or '',
+                    track,
+                )
+                # Drop the event, and its reference from the root
+                root.clear()
+            elif tag == name_tag and not track:
+                track = elem.text or ''
+
+
+def match_events(
+    sent: Iterable[EventRecord], recorded: Iterable[RecordedEvent]
+) -> tuple:
+    """Pair sent events with the recorded events they became
+
+    Events are grouped by type and label (ignoring surrounding spaces);
+    within a group, the n-th event sent is paired with the n-th recorded,
+    in time order.
+
+    Parameters
+    ----------
+    sent: the sent events, e.g. NetStation.history()
+    recorded: the recorded events, e.g. from iter_mff_events
+
+    Returns
+    -------
+    Tuple of (list of (EventRecord, RecordedEvent) pairs in the order
+    sent, list of unmatched EventRecord, list of unmatched RecordedEvent)
+    """
+    groups = defaultdict(list)
+    for event in recorded:
+        groups[(event.code.strip(), event.label.strip())].append(event)
+    queues = {
+        key: deque(sorted(events, key=lambda e: e.begin_time))
+        for key, events in groups.items()
+    }
+    pairs = []
+    unmatched_sent = []
+    for record in sorted(sent, key=lambda r: r.seq):
+        queue = queues.get((record.event_type.strip(), record.label.strip()))
+        if queue:
+            pairs.append((record, queue.popleft()))
+        else:
+            unmatched_sent.append(record)
+    unmatched_recorded = [e for queue in queues.values() for e in queue]
+    return pairs, unmatched_sent, unmatched_recorded
+
+
+def audit(
+    sent: Iterable[EventRecord],
+    recorded: Union[str, Iterable[RecordedEvent]],
+) -> dict:
+    """Compare sent events with the recording
+
+    Parameters
+    ----------
+    sent: the sent events, e.g. NetStation.history()
+    recorded: an .mff directory or event track file, or RecordedEvents
+
+    Returns
+    -------
+    Dictionary with the numbers of matched events, unmatched sent events
+    and unmatched recorded events; the array of offsets, in seconds, of
+    each matched event's recorded start from its sent start (stamp_time
+    plus the NTP offset of its sync), in the order sent; and the mean,
+    median, jitter (standard deviation), min, max and percentiles (from
+    audit.percentiles, keyed 'p<n>') of the offsets. Statistics are NaN
+    if nothing matched.
+
+    Raises
+    ------
+    ImportError
+        If numpy is not installed
+
+    See Also
+    --------
+    match_events: for how sent and recorded events are paired
+    """
+    import numpy as np
+
+    if isinstance(recorded, str):
+        recorded = iter_mff_events(recorded)
+    pairs, unmatched_sent, unmatched_recorded = match_events(sent, recorded)
+    expected = np.fromiter(
+        (r.stamp_time + r.sync_offset for r, _ in pairs),
+        dtype=float, count=len(pairs)
+    )
+    actual = np.fromiter(
+        (e.begin_time for _, e in pairs), dtype=float, count=len(pairs)
+    )
+    offsets = actual - expected
+    report = {
+        'matched': len(pairs),
+        'unmatched_sent': len(unmatched_sent),
+        'unmatched_recorded': len(unmatched_recorded),
+        'offsets': offsets,
+    }
+    if not len(offsets):
+        for name in ('mean', 'median', 'jitter', 'min', 'max'):
+            report[name] = float('nan')
+        for p in percentiles:
+            report[f'p{p}'] = float('nan')
+        return report
+    report['mean'] = float(offsets.mean())
+    report['median'] = float(np.median(offsets))
+    report['jitter'] = float(offsets.std())
+    report['min'] = float(offsets.min())
+    report['max'] = float(offsets.max())
+    for p, value in zip(percentiles, np.percentile(offsets, percentiles)):
+        report[f'p{p}'] = float(value)
+    return report
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Session checkpoints for resuming after a crash
+
+A checkpoint is a small JSON file holding what NetStation needs to carry
+on where a crashed script left off: the connection settings, the current
+sync and the offset history behind the drift estimate, the recording
+start and the first event sequence number a resumed session may use.
+It is replaced atomically, so a crash while writing leaves the previous
+checkpoint intact.
+"""
+
+import json
+import os
+
+# Version of the checkpoint format; bumped on incompatible changes
+CHECKPOINT_VERSION = 1
+
+
+def save_checkpoint(path: str, state: dict) -> None:
+    """Atomically replace the checkpoint at path
+
+    The state is written to a temporary file beside path, which then
+    replaces it with os.replace. The file is not fsynced: a checkpoint
+    survives the script crashing, not the machine.
+
+    Parameters
+    ----------
+    path: the checkpoint file
+    state: the JSON-serializable session state
+    """
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(dict(state, version=CHECKPOINT_VERSION), f)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path: str) -> dict:
+    """Read a checkpoint written by save_checkpoint
+
+    Parameters
+    ----------
+    path: the checkpoint file
+
+    Returns
+    -------
+    The session state
+
+    Raises
+    ------
+    ValueError
+        If the file was written by an incompatible version
+    """
+    with open(path) as f:
+        state = json.load(f)
+    version = state.pop('version', None)
+    if version != CHECKPOINT_VERSION:
+        raise ValueError(
+            f'Checkpoint version {version}, expected {CHECKPOINT_VERSION}'
+        )
+    return state
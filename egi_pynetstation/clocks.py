@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Conversion of timestamps from other clocks into time.time() terms
+
+Stimulus software reports flip times on its own clock, such as
+perf_counter, PsychoPy's core.getTime or LSL's local_clock. ClockMapper
+keeps a paired reading of each registered clock and time.time(), so
+timestamps from any of them, single or in NumPy arrays, can be converted
+with one subtraction and one addition.
+"""
+
+import time
+from typing import Callable
+
+
+class ClockMapper(object):
+    """Paired readings of registered clocks against time.time()
+
+    Each pair is taken by reading time.time() immediately before and
+    after the clock and using the midpoint, so the pairing error is at
+    most half the time taken by the clock call. Pairs should be
+    refreshed with capture() regularly, since clocks drift apart.
+
+    Attributes
+    ----------
+    clocks: dict
+        The registered clock functions by name; perf_counter and
+        monotonic are always registered
+    """
+    def __init__(self) -> None:
+        self.clocks = {
+            'perf_counter': time.perf_counter,
+            'monotonic': time.monotonic,
+        }
+        self._pairs = {}
+
+    def register(self, name: str, clock: Callable[[], float]) -> None:
+        """Register a clock and take its first paired reading
+
+        Parameters
+        ----------
+        name: the name to convert from it by
+        clock: a function returning the clock's time in seconds
+        """
+        self.clocks[name] = clock
+        self._pairs[name] = self._pair(clock)
+
+    def capture(self) -> None:
+        """Take a fresh paired reading of every registered clock"""
+        # A copy, since clocks may be registered from another thread
+        for name, clock in list(self.clocks.items()):
+            self._pairs[name] = self._pair(clock)
+
+    def to_time(self, t, clock: str = 'perf_counter'):
+        """Convert timestamps from a registered clock to time.time()
+
+        Parameters
+        ----------
+        t: a timestamp, a NumPy array of them, or a sequence of them
+        clock: the name of the clock t was read from
+
+        Returns
+        -------
+        The corresponding time.time() values: a float for a scalar, an
+        array otherwise
+
+        Raises
+        ------
+        KeyError
+            If the clock is not registered
+        """
+        if clock not in self._pairs:
+            if clock not in self.clocks:
+                raise KeyError(f'Clock {clock} is not registered')
+            self._pairs[clock] = self._pair(self.clocks[clock])
+        reading, wall = self._pairs[clock]
+        if isinstance(t, (list, tuple)):
+            import numpy as np
+            t = np.asarray(t, dtype=float)
+        return t - reading + wall
+
+    def pairs(self) -> dict:
+        """Get the latest paired readings
+
+        Returns
+        -------
+        Dictionary mapping clock names to (clock reading, time.time())
+        """
+        return dict(self._pairs)
+
+    @staticmethod
+    def _pair(clock: Callable[[], float]) -> tuple:
+        """Read a clock bracketed by time.time()"""
+        before = time.time()
+        reading = clock()
+        after = time.time()
+        return reading, (before + after) / 2
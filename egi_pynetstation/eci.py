@@ -3,15 +3,15 @@
 
 """ECI controls and returns; mostly for internal use"""
 
-from struct import pack, unpack
-from typing import Union
+import threading
+from collections import OrderedDict
+from struct import Struct, pack
+from time import perf_counter_ns
+from typing import Callable, Union
 
 from .exceptions import *
-from .util import sys_from_bytes, get_ntp_byte, get_ntp_float, sys_to_bytes
-
-# Color codes for printing debug information
-blue = '\u001b[34;1m'
-reset = '\u001b[0m'
+from .trace import tracer, VALIDATE, PACK
+from .util import get_ntp_byte, sys_to_bytes, ntp_res, ms_wrap, wrap_ms
 
 # Variable to map API documentation to the byte representation
 byte_table = {
@@ -36,12 +36,43 @@ allowed_endians = ("NTEL", "MAC-", "UNIX")
 
 # Python converts the bytes to ints when indexing; this is more legible
 # This is admittedly hacky but it works.
+INT_VAL_F = 70
 INT_VAL_I = 73
+INT_VAL_R = 82
 INT_VAL_S = 83
+INT_VAL_Z = 90
+
+# Precompiled layout of an NTPv4 timestamp (seconds, fraction) as the amp
+# sends it; see util.get_ntp_float
+NTP_STRUCT = Struct('II')
 
 # compactly named for convenience; milliseconds per second
 MPS = 1000
 
+# Byte offset and layout of the start field in a package_event datagram,
+# which follows the 2-byte block length. Starts are never negative, so
+# the field is packed unsigned to allow the full 32-bit clock range.
+EVENT_START_OFFSET = 2
+EVENT_START_STRUCT = Struct('I')
+# Layout of the start and duration fields which begin the event block
+EVENT_TIMES_STRUCT = Struct('II')
+# Index of the event block (which holds the start field) in the buffers
+# returned by build_command_buffers for EventData from package_event_buffers
+EVENT_BLOCK_INDEX = 2
+# Byte offsets, within the event block, of the event type and of the
+# length-prefixed label which follows it
+EVENT_TYPE_OFFSET = 8
+EVENT_LABEL_OFFSET = 12
+# Layout of the length of a datagram, and of a data value
+LENGTH_STRUCT = Struct('H')
+# Decoders for the data values which are not TEXT, by type code
+value_structs = {
+    b'bool': Struct('?'), b'doub': Struct('d'), b'long': Struct('i'),
+}
+
+# Types that can be sent or parsed without copying
+bytes_like = (bytes, bytearray, memoryview)
+
 
 def build_command(cmd: str, data: object = None) -> bytes:
     """
@@ -84,7 +115,7 @@ def build_command(cmd: str, data: object = None) -> bytes:
     # data is valid.
     if cmd == "Query":
         if data in allowed_endians:
-            tx += data.encode("ASCII")
+            tx += encoding_cache.encode(_encode_ascii, data)
         else:
             raise ECIIllegalEndian(data)
     elif cmd == "ClockSync":
@@ -100,115 +131,368 @@ def build_command(cmd: str, data: object = None) -> bytes:
     # TODO: add package_event to the command builder so that it is all
     # validated automatically
     elif cmd == "EventData":
-        if isinstance(data, bytes):
-            tx += data
-        else:
-            raise ECIDataNotBytes(data)
+        tx = b''.join(build_command_buffers(cmd, data))
     else:
         raise ECIUnknownException()
     return tx
 
 
-def parse_response(bytearr: bytes) -> Union[bool, float, int]:
+def build_command_buffers(cmd: str, data: object = None) -> list:
+    """
+    Builds a list of buffers for ECI without joining them
+
+    Parameters
+    ----------
+    cmd: the command to send
+    data: the data associated with the command; for EventData this may be
+        the bytes from package_event or the list from package_event_buffers
+
+    Returns
+    -------
+    A list of bytes-like objects which, sent in order, form the command;
+    suitable for Socket.write
+
+    Raises
+    ------
+    InvalidECICommand if the command is invalid
+
+    Notes
+    -----
+    For EventData the command byte and the data buffers are returned as
+    separate items so that the event does not need to be copied; for
+    package_event_buffers data the event block is at EVENT_BLOCK_INDEX.
+    """
+    if cmd != "EventData":
+        return [build_command(cmd, data)]
+    if data is None:
+        raise ECIDataRequired(cmd)
+    if isinstance(data, bytes_like):
+        return [byte_table[cmd], data]
+    if not isinstance(data, (list, tuple)):
+        raise ECIDataNotBytes(data)
+    for part in data:
+        if not isinstance(part, bytes_like):
+            raise ECIDataNotBytes(part)
+    return [byte_table[cmd], *data]
+
+
+def _parse_success(view: Union[bytes, memoryview]) -> bool:
+    """Single-byte acknowledgement"""
+    return True
+
+
+def _parse_failure(view: Union[bytes, memoryview]) -> None:
+    """Single-byte failure"""
+    raise ECIFailure()
+
+
+def _parse_no_recording(view: Union[bytes, memoryview]) -> None:
+    """Single-byte failure indicating a missing recording device"""
+    raise ECINoRecordingDeviceFailure()
+
+
+def _parse_identity(view: Union[bytes, memoryview]) -> int:
+    """'I' followed by the one-byte identity/version number"""
+    # NOTE: this deviates from the SDK documentation, which
+    # indicates a 1-byte response
+    return view[1]
+
+
+def _parse_ntp(view: Union[bytes, memoryview]) -> float:
+    """Bare NTPv4-formatted timestamp"""
+    (seconds, subseconds) = NTP_STRUCT.unpack_from(view, 0)
+    return seconds + subseconds * ntp_res
+
+
+def _parse_ntp_leading(view: Union[bytes, memoryview]) -> float:
+    """'S' followed by an NTPv4-formatted timestamp"""
+    # Note: we can't unpack cII because integer alignment forces the
+    # char to occupy four bytes, rather than just one, so we unpack
+    # the timestamp from an offset instead.
+    (seconds, subseconds) = NTP_STRUCT.unpack_from(view, 1)
+    return seconds + subseconds * ntp_res
+
+
+def _parse_invalid(view: Union[bytes, memoryview]) -> None:
+    """Anything not in the dispatch tables"""
+    raise InvalidECIResponse(bytes(view))
+
+
+# Dispatch tables for parse_response. Responses are identified by their
+# length and a type byte; the trailing table is consulted first because
+# the 9-byte NTPReturnClock response sometimes arrives as the timestamp
+# followed by 'Z' rather than 'S' followed by the timestamp.
+# NOTE: this return of size 9 bytes rather than 8 is not properly
+# documented in the SDK guide. The reason for the two layouts is unclear.
+response_by_tail = {
+    (9, INT_VAL_Z): _parse_ntp,
+}
+response_by_head = {
+    (1, INT_VAL_Z): _parse_success,
+    (1, INT_VAL_I): _parse_success,
+    (1, INT_VAL_S): _parse_success,
+    (1, 1): _parse_success,
+    (1, INT_VAL_F): _parse_failure,
+    (1, INT_VAL_R): _parse_no_recording,
+    (2, INT_VAL_I): _parse_identity,
+    (9, INT_VAL_S): _parse_ntp_leading,
+}
+response_by_length = {
+    8: _parse_ntp,
+}
+
+
+def parse_response(
+    bytearr: Union[bytes, bytearray, memoryview]
+) -> Union[bool, float, int]:
     """Parses ECI response
 
     Parameters
     ----------
-    bytearr: the byte array to parse
+    bytearr: the byte array to parse; a memoryview slice of a receive
+        buffer may be passed to avoid copying
 
     Returns
     -------
-    Either True or the value of the ECI Identity
+    Either True, the value of the ECI Identity, or an NTP timestamp
 
     Raises
     ------
     ECIResponseFailure for all failures
     ECIFailure if the amp responds with failure
     ECINoRecordingDeviceFailure if the failure is a result of no recording
-    TypeError if the object passed isn't type bytes
+    InvalidECIResponse if the object passed isn't a bytes-like object or
+    the response is not recognized
 
     Notes
     -----
     The documentation on how the server should respond is somewhat sketchy.
     These validations were determined mostly through trial and error.
-    To view deviations from documentation, please view the source code.
+    To view deviations from documentation, please view the dispatch
+    tables and their handlers in the source code.
     """
-    arrlength = 0
-    # TODO: turn into a debug option
-    # print(f'{blue}Received amp response: {bytearr}{reset}')
-    if isinstance(bytearr, bytes):
-        arrlength = len(bytearr)
-        if arrlength == 1:
-            if bytearr == b'Z' or bytearr == b'I':
-                return True
-            if bytearr == b'F':
-                raise ECIFailure()
-            if bytearr == b'R':
-                raise ECINoRecordingDeviceFailure()
-            if bytearr == b'\x01':
-                # TODO: turn into a debug option
-                # print('NetStation says 1')
-                return True
-            if bytearr == b'S':
-                # TODO: turn into a debug option
-                # print('NetStation says S')
-                return True
-            else:
-                raise InvalidECIResponse(bytearr)
-        elif arrlength == 2:
-            # Identify version number
-            # NOTE: this deviates from the SDK documentation, which
-            # indicates a 1-byte response
-            if bytearr[0] == INT_VAL_I:
-                return sys_from_bytes(bytearr[1:])
-            else:
-                raise InvalidECIResponse(bytearr)
-        elif arrlength == 8:
-            # We've been given an NTPv4-formatted bytearr
-            return get_ntp_float(bytearr)
-        elif arrlength == 9:
-            # We got back an NTP timestamp or failed
-
-            # NOTE: this return of size 9 bytes rather than 8 is not
-            # properly documented in the SDK guide. Sometimes the amp
-            # responds with "S" and other times "Z". The reason for this
-            # behavior is unclear.
-            (seconds, subseconds, char) = unpack('IIc', bytearr)
-            if char == b'Z':
-                # Amp
-                # TODO: turn into a debug option
-                # print(
-                #     f'Above response is: NTP of {seconds} seconds and '
-                #     f'{subseconds} subseconds'
-                # )
-                return seconds + subseconds * 2**-32
-            else:
-                # Try S start (amp or app)
-                char = bytearr[0]
-                # Note: we can't unpack cII because integer alignment
-                # forces the char to occupy four bytes, rather than just
-                # one. Since unpack is designed to unpack C-structures,
-                # this alignment ends up being accounted for.
-                (seconds, subseconds) = unpack('II', bytearr[1:])
-                if char == INT_VAL_S:
-                    return seconds + subseconds * 2**-32
-                else:
-                    raise InvalidECIResponse(bytearr)
-        else:
-            raise InvalidECIResponse(bytearr)
-    else:
+    if not isinstance(bytearr, bytes_like):
         raise InvalidECIResponse(bytearr)
+    arrlength = len(bytearr)
+    if not arrlength:
+        raise InvalidECIResponse(bytes(bytearr))
+    handler = (
+        response_by_tail.get((arrlength, bytearr[-1])) or
+        response_by_head.get((arrlength, bytearr[0])) or
+        response_by_length.get(arrlength, _parse_invalid)
+    )
+    return handler(bytearr)
 
 
-def package_event(
+def _encode_ascii(text: str) -> bytes:
+    """Encodes text as ASCII"""
+    return bytes(text, 'ascii')
+
+
+def _encode_event_type(event_type: str) -> bytes:
+    """Validates and encodes an event type"""
+    if not isinstance(event_type, str):
+        type_etype = type(event_type)
+        raise TypeError(f'Event type should be str, is {type_etype}')
+    len_etype = len(event_type)
+    if not len_etype == 4:
+        raise TypeError(
+            f'Event type should have 4 characters, has {len_etype}'
+        )
+    return bytes(event_type, 'ascii')
+
+
+def _encode_label(label: str) -> bytes:
+    """Validates and encodes a length-prefixed event label"""
+    if not isinstance(label, str):
+        type_label = type(label)
+        raise TypeError(f'Event label should be str, is {type_label}')
+    len_label = len(label)
+    if not len_label <= 256:
+        raise TypeError(
+            f'Event label should be <= 256 characters, is {len_label}'
+        )
+    return pack('B', len_label) + bytes(label, 'ascii')
+
+
+def _encode_desc(desc: str) -> bytes:
+    """Validates and encodes a length-prefixed event description"""
+    if not isinstance(desc, str):
+        type_desc = type(desc)
+        raise TypeError(
+            f'Event description should be str, is {type_desc}'
+        )
+    len_desc = len(desc)
+    if not len_desc <= 256:
+        raise TypeError(
+            'Event description should be <= 256 characters, is' +
+            f'{len_desc}'
+        )
+    return pack('B', len_desc) + bytes(desc, 'ascii')
+
+
+def _encode_key(key: str) -> bytes:
+    """Validates and encodes an event data key"""
+    if not isinstance(key, str):
+        type_key = type(key)
+        raise TypeError(
+            f'Event data keys should be str, but {key} is {type_key}'
+        )
+    elif len(key) != 4:
+        len_key = len(key)
+        raise TypeError(
+            'Event data keys should have 4 characters;'
+            f' {key} has {len_key}'
+        )
+    return bytes(key, 'ascii')
+
+
+def _encode_text_pair(item: tuple) -> bytes:
+    """Validates and encodes a key and TEXT value with its type and length
+    """
+    (key, value) = item
+    return (
+        _encode_key(key) +
+        b'TEXT' + pack('H', len(value)) + bytes(value, 'ascii')
+    )
+
+
+class EncodingCache(object):
+    """Bounded LRU cache of validated ASCII encodings of strings
+
+    Each entry is the output of an encoder function, such as the
+    length-prefixed label block, for one string or tuple of strings.
+    Encoders validate their input and raise for invalid strings, which are
+    never cached, so a hit skips both validation and encoding.
+
+    Attributes
+    ----------
+    hits: int
+        The number of lookups served from the cache
+    misses: int
+        The number of lookups that called the encoder
+    evictions: int
+        The number of entries evicted to stay within maxsize
+    """
+    def __init__(self, maxsize: int = 2**18) -> None:
+        """Constructor for EncodingCache
+
+        Parameters
+        ----------
+        maxsize: the most bytes of encodings to keep; 0 disables caching
+        """
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._maxsize = maxsize
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def maxsize(self) -> int:
+        """The most bytes of encodings kept in the cache"""
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize: int) -> None:
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    def encode(
+        self, encoder: Callable[[str], bytes], text: Union[str, tuple]
+    ) -> bytes:
+        """Get the encoding of text, calling encoder on a miss
+
+        Parameters
+        ----------
+        encoder: a function validating and encoding a string
+        text: the string, or tuple of strings, to encode
+
+        Returns
+        -------
+        The bytes returned by encoder(text)
+
+        Raises
+        ------
+        Whatever encoder raises for invalid text
+        """
+        key = (encoder, text)
+        entries = self._entries
+        # The hit path is lock-free; each OrderedDict operation is atomic,
+        # and an entry evicted between them is simply not reordered
+        try:
+            encoded = entries.get(key)
+        except TypeError:
+            # Unhashable, so certainly not a string; let encoder complain
+            return encoder(text)
+        if encoded is not None:
+            try:
+                entries.move_to_end(key)
+            except KeyError:
+                pass
+            self.hits += 1
+            return encoded
+        encoded = encoder(text)
+        cost = len(encoded)
+        with self._lock:
+            self.misses += 1
+            if cost <= self._maxsize and key not in self._entries:
+                self._entries[key] = encoded
+                self._size += cost
+                self._evict()
+        return encoded
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until within maxsize"""
+        while self._size > self._maxsize:
+            _, encoded = self._entries.popitem(last=False)
+            self._size -= len(encoded)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Empty the cache and reset statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self) -> dict:
+        """Get cache statistics
+
+        Returns
+        -------
+        Dictionary of hits, misses, evictions, the number of entries, and
+        the current and maximum size in bytes
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'size': self._size,
+            'maxsize': self._maxsize,
+        }
+
+
+# Shared by package_event and build_command; adjust with
+# encoding_cache.maxsize
+encoding_cache = EncodingCache()
+
+
+def package_event_buffers(
     start: float,
     duration: float,
     event_type: str,
     label: str,
     desc: str,
     data: dict,
-):
-    """Takes event information and creates appropriate byte string
+    start_ms: int = 0,
+) -> list:
+    """Takes event information and creates the datagram's buffers
 
     Parameters
     ----------
@@ -220,13 +504,21 @@ def package_event(
     desc: a <=256-character string for describing the event
     data: a dictionary where each value is a string, number, or boolean,
         and each key is a string. Use this to pass data.
+    start_ms: the value of the millisecond clock at the last sync, which
+        start is relative to; only non-zero for the simple clock
+
+    Returns
+    -------
+    A list of the length header, the event block (a bytearray, whose
+    first field is the start) and the key block; joined, these are the
+    datagram returned by package_event
     """
+    tracing = tracer.enabled
+    if tracing:
+        t_validate = perf_counter_ns()
     # First, perform type-checking and top-level validation
     type_start = type(start)
     type_duration = type(duration)
-    type_etype = type(event_type)
-    type_label = type(label)
-    type_desc = type(desc)
     type_data = type(data)
 
     if not (isinstance(start, float) or isinstance(start, int)):
@@ -243,86 +535,50 @@ def package_event(
         raise TypeError(
             f'Event duration should be at least 0.001, is {duration}'
         )
-    if not isinstance(event_type, str):
-        raise TypeError(f'Event type should be str, is {type_etype}')
-    len_etype = len(event_type)
-    if not len(event_type) == 4:
-        raise TypeError(
-            f'Event type should have 4 characters, has {len_etype}'
-        )
-    if not isinstance(label, str):
-        raise TypeError(f'Event label should be str, is {type_label}')
-    len_label = len(label)
-    if not len_label <= 256:
-        raise TypeError(
-            f'Event label should be <= 256 characters, is {len_label}'
-        )
-    if not isinstance(desc, str):
-        raise TypeError(
-            f'Event description should be str, is {type_desc}'
-        )
-    len_desc = len(desc)
-    if not len_desc <= 256:
-        raise TypeError(
-            'Event description should be <= 256 characters, is' +
-            f'{len_desc}'
-        )
+    # Strings are validated as they are encoded; see the _encode functions
+    encode = encoding_cache.encode
+    # Each string is cached on its own: a varying label or description
+    # then leaves the type's entry in place
+    strings_bytes = (
+        encode(_encode_event_type, event_type) +
+        encode(_encode_label, label) +
+        encode(_encode_desc, desc)
+    )
     if not isinstance(data, dict):
         raise TypeError(f'Event data should be dict, is {type_data}')
 
+    if tracing:
+        t_pack = perf_counter_ns()
+        tracer.span(VALIDATE, t_validate, t_pack)
+
     # Begin creating the data block
     nkeys = len(data.keys())
 
     # Build block for datagram header
-    start_millis = int(start * MPS)
+    start_millis = (start_ms + int(start * MPS)) % ms_wrap
     duration_millis = int(duration * MPS)
-    # TODO: turn into a debug option
-    # print(
-    #     f'Using start time of {start_millis} milliseconds'
-    #     f' and duration of {duration_millis} milliseconds'
-    # )
-    block = (
-        pack('i', start_millis) +
-        pack('I', duration_millis) +
-        bytes(event_type, 'ascii') +
-        pack('B', len_label) + bytes(label, 'ascii') +
-        pack('B', len_desc) + bytes(desc, 'ascii') +
-        pack('B', nkeys)
+    # The event block is mutable so the start can be stamped late
+    block = bytearray(
+        EVENT_TIMES_STRUCT.pack(start_millis, duration_millis) +
+        strings_bytes + pack('B', nkeys)
     )
 
     # Build blocks for key-value pairs
-    key_block = b''
-    for key, value in data.items():
-        # Check this key's validity
-        if not isinstance(key, str):
-            type_key = type(key)
-            raise TypeError(
-                f'Event data keys should be str, but {key} is {type_key}'
-            )
-        elif len(key) != 4:
-            len_key = len(key)
-            raise TypeError(
-                'Event data keys should have 4 characters;'
-                f' {key} has {len_key}'
-            )
-
-        # Check the value's validity
+    key_blocks = []
+    for item in data.items():
+        value = item[1]
+        # Text pairs are encoded and cached whole; otherwise check the
+        # key's validity and then the value's
+        if isinstance(value, str):
+            key_blocks.append(encode(_encode_text_pair, item))
+            continue
+        key_bytes = encode(_encode_key, item[0])
         if isinstance(value, bool):
-            ktype = 'bool'
-            klen = 1
-            kdata = pack('?', value)
+            value_bytes = b'bool' + pack('H', 1) + pack('?', value)
         elif isinstance(value, float):
-            ktype = 'doub'
-            klen = 8
-            kdata = pack('d', value)
+            value_bytes = b'doub' + pack('H', 8) + pack('d', value)
         elif isinstance(value, int):
-            ktype = 'long'
-            klen = 4
-            kdata = pack('i', value)
-        elif isinstance(value, str):
-            ktype = 'TEXT'
-            klen = len(value)
-            kdata = bytes(value, 'ascii')
+            value_bytes = b'long' + pack('H', 4) + pack('i', value)
         else:
             type_value = type(value)
             raise TypeError(
@@ -331,16 +587,104 @@ def package_event(
             )
 
         # Build the key's block
-        key_block += (
-            bytes(key, 'ascii') +
-            bytes(ktype, 'ascii') +
-            pack('H', klen) +
-            kdata
-        )
+        key_blocks.append(key_bytes + value_bytes)
 
-    # Put all blocks together
+    # Gather all blocks without joining them
+    key_block = b''.join(key_blocks)
     len_all_blocks = len(block) + len(key_block)
 
-    datagram = pack('H', len_all_blocks) + block + key_block
+    if tracing:
+        tracer.span(
+            PACK, t_pack, perf_counter_ns(), (start_millis, duration_millis)
+        )
+    return [pack('H', len_all_blocks), block, key_block]
+
+
+def package_event(
+    start: float,
+    duration: float,
+    event_type: str,
+    label: str,
+    desc: str,
+    data: dict,
+    start_ms: int = 0,
+) -> bytes:
+    """Takes event information and creates appropriate byte string
+
+    Parameters
+    ----------
+    See package_event_buffers
+
+    Returns
+    -------
+    The datagram to send with EventData
+    """
+    return b''.join(
+        package_event_buffers(
+            start, duration, event_type, label, desc, data, start_ms
+        )
+    )
+
+
+def stamp_event(
+    buffer: bytearray, offset: int, start: float, start_ms: int = 0
+) -> None:
+    """Overwrites the start field of a packaged event in place
 
-    return datagram
+    Parameters
+    ----------
+    buffer: a writable buffer containing a packaged event
+    offset: the byte offset of the start field within buffer; this is 0
+        for the event block from package_event_buffers, or
+        EVENT_START_OFFSET plus the offset of a joined datagram
+    start: the start time of the event in SECONDS from time of last NTP
+        sync
+    start_ms: the value of the millisecond clock at the last sync; see
+        package_event_buffers
+
+    Notes
+    -----
+    No validation is performed beyond what packing requires; this is
+    meant to be called on the hot path after package_event has already
+    validated the rest of the event.
+    """
+    EVENT_START_STRUCT.pack_into(
+        buffer, offset, wrap_ms(start_ms + int(start * MPS))
+    )
+
+
+def unpack_event_fields(
+    buffer: Union[bytes, bytearray, memoryview], pos: int = 0
+) -> tuple:
+    """Decodes the label, description and data of a packaged event
+
+    Parameters
+    ----------
+    buffer: a buffer containing a packaged event
+    pos: the offset in buffer of the label's length byte; this is
+        EVENT_LABEL_OFFSET for the event block from package_event_buffers
+
+    Returns
+    -------
+    Tuple of (label, desc, data), as passed to package_event_buffers
+    """
+    label_len = buffer[pos]
+    label = bytes(buffer[pos + 1:pos + 1 + label_len]).decode('ascii')
+    pos += 1 + label_len
+    desc_len = buffer[pos]
+    desc = bytes(buffer[pos + 1:pos + 1 + desc_len]).decode('ascii')
+    pos += 1 + desc_len
+    nkeys = buffer[pos]
+    pos += 1
+    data = {}
+    for _ in range(nkeys):
+        key = bytes(buffer[pos:pos + 4]).decode('ascii')
+        kind = bytes(buffer[pos + 4:pos + 8])
+        (size,) = LENGTH_STRUCT.unpack_from(buffer, pos + 8)
+        pos += 10
+        if kind == b'TEXT':
+            data[key] = bytes(buffer[pos:pos + size]).decode('ascii')
+        else:
+            (data[key],) = value_structs[kind].unpack_from(buffer, pos)
+        pos += size
+    return label, desc, data
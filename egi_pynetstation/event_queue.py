@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Priority lanes for events queued for batched sending"""
+
+import threading
+from collections import deque
+from time import perf_counter
+from typing import NamedTuple
+
+# Lanes in the order they are drained; earlier lanes always go first
+priorities = ('high', 'bulk')
+
+
+class QueuedEvent(NamedTuple):
+    """An event waiting in a lane
+
+    Attributes
+    ----------
+    buffers: list
+        The EventData command buffers, from eci.build_command_buffers
+    enqueued: float
+        The perf_counter() time the event was queued
+    record: tuple
+        The event's start, duration, the SyncState its start is relative
+        to and the time.time() it was meant for, for stamping and
+        recording it once it is sent; a start of None is stamped with the
+        time it is written
+    """
+    buffers: list
+    enqueued: float
+    record: tuple = None
+
+
+class LaneStats(object):
+    """Queue-wait statistics for a single lane
+
+    Attributes
+    ----------
+    count: int
+        The number of events sent from this lane
+    total_wait: float
+        The summed time, in seconds, events waited before being written
+    max_wait: float
+        The longest time, in seconds, an event waited before being written
+    """
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        """Record the queue wait of one sent event
+
+        Parameters
+        ----------
+        wait: the time the event waited in seconds
+        """
+        self.count += 1
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+
+    def mean_wait(self) -> float:
+        """Get the mean queue wait in seconds, or None if nothing was sent"""
+        if not self.count:
+            return None
+        return self.total_wait / self.count
+
+
+class EventQueue(object):
+    """Queue of packed events with one FIFO lane per priority
+
+    Batches are taken from the highest-priority non-empty lane only, so a
+    high-priority event is never coalesced behind bulk events and jumps
+    ahead of any bulk events still pending when the next batch is taken.
+    """
+    def __init__(self, max_batch: int = 32) -> None:
+        """Constructor for EventQueue
+
+        Parameters
+        ----------
+        max_batch: the most events to take from a lane in one batch
+        """
+        self.max_batch = max_batch
+        self._lanes = {p: deque() for p in priorities}
+        self._stats = {p: LaneStats() for p in priorities}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def put(self, buffers: list, priority: str, record: tuple = None) -> None:
+        """Add an event to the back of its lane
+
+        Parameters
+        ----------
+        buffers: the EventData command buffers
+        priority: one of priorities
+        record: the event's start, duration, sync and intended time; see
+            QueuedEvent
+        """
+        self._lanes[priority].append(
+            QueuedEvent(buffers, perf_counter(), record)
+        )
+
+    def pending(self, priority: str) -> int:
+        """Get the number of events waiting in a lane"""
+        return len(self._lanes[priority])
+
+    def discard(self, priority: str) -> int:
+        """Drop every event waiting in a lane
+
+        Parameters
+        ----------
+        priority: the lane to empty
+
+        Returns
+        -------
+        The number of events dropped
+        """
+        with self._lock:
+            lane = self._lanes[priority]
+            n = len(lane)
+            lane.clear()
+        return n
+
+    def take_batch(self, lanes: tuple = priorities) -> tuple:
+        """Take the next batch of events to write
+
+        Parameters
+        ----------
+        lanes: the lanes to take from, highest priority first; default
+            all of them
+
+        Returns
+        -------
+        Tuple of (priority, list of QueuedEvent); the list is empty if
+        every lane taken from is empty
+        """
+        with self._lock:
+            for priority in lanes:
+                lane = self._lanes[priority]
+                if lane:
+                    n = min(len(lane), self.max_batch)
+                    return priority, [lane.popleft() for _ in range(n)]
+        return None, []
+
+    def record_sent(self, priority: str, batch: list) -> None:
+        """Record the queue wait of a batch as it is written
+
+        Parameters
+        ----------
+        priority: the lane the batch was taken from
+        batch: the list of QueuedEvent from take_batch
+        """
+        now = perf_counter()
+        stats = self._stats[priority]
+        for event in batch:
+            stats.record(now - event.enqueued)
+
+    def stats(self) -> dict:
+        """Get queue-wait statistics for every lane
+
+        Returns
+        -------
+        Dictionary mapping each priority to a dictionary with the number of
+        events sent, the number pending, and the mean and max wait in
+        seconds
+        """
+        return {
+            p: {
+                'sent': s.count,
+                'pending': len(self._lanes[p]),
+                'mean_wait': s.mean_wait(),
+                'max_wait': s.max_wait,
+            }
+            for p, s in self._stats.items()
+        }
@@ -14,6 +14,15 @@ class SocketIncompleteTransmission(Exception):
         )
 
 
+class SocketTimestampingUnsupported(SocketException):
+    """Exception for requesting kernel timestamps where unsupported"""
+    def __init__(self) -> None:
+        self.message = (
+            'Kernel transmit timestamps (SO_TIMESTAMPING) are only '
+            'supported on Linux'
+        )
+
+
 class ECIException(Exception):
     """Base class for ECI exceptions"""
     pass
@@ -42,6 +51,21 @@ class NetStationUnconnected(NetStationError):
         self.message = 'Attempted operation before connecting to amp'
 
 
+class NetStationConnectionLost(NetStationUnconnected):
+    """Exception raised for attempting communication on a lost connection"""
+    def __init__(self) -> None:
+        self.message = (
+            'Attempted operation after the connection to amp was lost; '
+            'call ensure_connected() to reconnect'
+        )
+
+
+class NetStationUnsynced(NetStationError):
+    """Exception raised for timing an event before the first sync"""
+    def __init__(self) -> None:
+        self.message = 'Attempted to time an event before syncing with amp'
+
+
 class NetStationIllegalArgument(NetStationError):
     """Exception for passing an illegal argument"""
     def __init__(self, arg: object) -> None:
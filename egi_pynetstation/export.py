@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Export of sent-event records to columnar NumPy or Parquet files
+
+NumPy is required for .npz files and pyarrow for .parquet files; neither
+is needed by the rest of the package, so they are imported on use.
+"""
+
+import json
+from itertools import islice
+from typing import Iterable
+
+from .history import EventRecord
+
+# Typed columns taken directly from EventRecord fields
+fixed_columns = (
+    ('seq', 'int64'),
+    ('start', 'float64'),
+    ('duration', 'float64'),
+    ('event_type', 'str'),
+    ('label', 'str'),
+    ('desc', 'str'),
+    ('stamp_time', 'float64'),
+    ('ack_latency', 'float64'),
+    ('sync_offset', 'float64'),
+    ('sync_epoch', 'float64'),
+    ('tx_time', 'float64'),
+    ('status', 'int64'),
+    ('intended', 'float64'),
+)
+
+# Types allowed for data_keys columns
+data_types = {float: 'float64', int: 'int64', bool: 'bool', str: 'str'}
+
+formats = ('npz', 'parquet')
+
+
+def export_events(
+    records: Iterable[EventRecord],
+    path: str,
+    format: str = None,
+    chunk_size: int = 65536,
+    data_keys: dict = None,
+    compress: bool = False,
+) -> None:
+    """Write sent-event records to a columnar file
+
+    Parameters
+    ----------
+    records: the sent events, e.g. NetStation.history()
+    path: the file to write
+    format: 'npz' or 'parquet'; default inferred from the path's suffix
+    chunk_size: the number of records converted at a time; Parquet files
+        are written one row group per chunk, so only one chunk is held
+        in memory
+    data_keys: optional mapping of event data keys to float, int, bool or
+        str; each becomes a typed column named data_<key>. If not given,
+        the data of each event is stored as a JSON string column 'data'.
+    compress: for npz, whether to use np.savez_compressed
+
+    Raises
+    ------
+    ValueError
+        If the format is unknown or a data value does not fit its type
+    ImportError
+        If numpy (npz) or pyarrow (parquet) is not installed
+
+    Notes
+    -----
+    Missing data values are null in Parquet. In npz files they are NaN for
+    float columns and '' for str columns; int and bool columns get an
+    extra boolean data_<key>_valid column.
+
+    An npz file holds one array per column, so the whole export is built
+    in memory, as typed arrays, before it is written; only the Python
+    lists for a single chunk exist at a time. Use Parquet to export
+    records that do not fit in memory.
+    """
+    if format is None:
+        format = path.rsplit('.', 1)[-1].lower()
+    if format not in formats:
+        raise ValueError(f'Unknown export format {format}; use {formats}')
+    columns = _column_types(data_keys)
+    chunks = _chunks(records, chunk_size, data_keys)
+    if format == 'npz':
+        _write_npz(chunks, columns, path, compress)
+    else:
+        _write_parquet(chunks, columns, path)
+
+
+def _column_types(data_keys: dict) -> list:
+    """Get the (name, type) of every exported column"""
+    columns = list(fixed_columns)
+    if data_keys is None:
+        columns.append(('data', 'str'))
+        return columns
+    for key, t in data_keys.items():
+        if t not in data_types:
+            raise ValueError(f'Data key {key} has unsupported type {t}')
+        columns.append((f'data_{key}', data_types[t]))
+    return columns
+
+
+def _chunks(records: Iterable[EventRecord], size: int, data_keys: dict):
+    """Yield dictionaries of column lists, size records at a time"""
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        columns = {
+            name: [getattr(r, name) for r in chunk]
+            for name, _ in fixed_columns
+        }
+        if data_keys is None:
+            columns['data'] = [
+                json.dumps(r.data, sort_keys=True) for r in chunk
+            ]
+        else:
+            for key in data_keys:
+                columns[f'data_{key}'] = [r.data.get(key) for r in chunk]
+        yield columns
+
+
+def _write_npz(chunks, columns: list, path: str, compress: bool) -> None:
+    """Convert each chunk to typed arrays and save them together
+
+    Every column is held in memory until the file is written; see
+    export_events.
+    """
+    import numpy as np
+
+    parts = {name: [] for name, _ in columns}
+    valid = {}
+    for chunk in chunks:
+        for name, t in columns:
+            values = chunk[name]
+            if t in ('int64', 'bool'):
+                mask = np.array([v is not None for v in values], dtype=bool)
+                valid.setdefault(name, []).append(mask)
+                fill = False if t == 'bool' else 0
+                values = [fill if v is None else v for v in values]
+            elif t == 'float64':
+                values = [np.nan if v is None else v for v in values]
+            else:
+                values = ['' if v is None else v for v in values]
+            parts[name].append(np.array(values, dtype=t))
+    arrays = {}
+    for name, t in columns:
+        if parts[name]:
+            arrays[name] = np.concatenate(parts[name])
+        else:
+            arrays[name] = np.array([], dtype=t)
+    for name, masks in valid.items():
+        if name.startswith('data_'):
+            arrays[f'{name}_valid'] = np.concatenate(masks)
+    save = np.savez_compressed if compress else np.savez
+    with open(path, 'wb') as f:
+        save(f, **arrays)
+
+
+def _write_parquet(chunks, columns: list, path: str) -> None:
+    """Write each chunk as a Parquet row group"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'bool': pa.bool_(),
+        'str': pa.string(),
+    }
+    schema = pa.schema([(name, arrow_types[t]) for name, t in columns])
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pydict(chunk, schema=schema))
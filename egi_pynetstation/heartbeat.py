@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Connection health tracking and idle-time heartbeats"""
+
+import threading
+from time import perf_counter
+from typing import Callable
+
+# Connection health states
+UNKNOWN = 'unknown'
+HEALTHY = 'healthy'
+DEAD = 'dead'
+
+
+class ConnectionHealth(object):
+    """The last known state of the ECI connection
+
+    Attributes
+    ----------
+    state: str
+        One of UNKNOWN, HEALTHY or DEAD
+    since: float
+        The perf_counter() time the state last changed
+    error: Exception
+        The error which marked the connection dead, or None
+    beats: int
+        The number of heartbeats sent successfully
+    """
+    def __init__(self) -> None:
+        self.state = UNKNOWN
+        self.since = perf_counter()
+        self.error = None
+        self.beats = 0
+
+    def mark_healthy(self) -> None:
+        """Record a successful exchange with the server"""
+        if self.state != HEALTHY:
+            self.state = HEALTHY
+            self.since = perf_counter()
+            self.error = None
+
+    def mark_dead(self, error: Exception) -> None:
+        """Record a failed exchange with the server
+
+        Parameters
+        ----------
+        error: the exception the exchange raised
+        """
+        if self.state != DEAD:
+            self.state = DEAD
+            self.since = perf_counter()
+        self.error = error
+
+    def report(self) -> dict:
+        """Get the health as a dictionary
+
+        Returns
+        -------
+        Dictionary with the state, the seconds spent in it, the error that
+        marked the connection dead (or None) and the heartbeats sent
+        """
+        return {
+            'state': self.state,
+            'for': perf_counter() - self.since,
+            'error': self.error,
+            'beats': self.beats,
+        }
+
+
+class Heartbeat(object):
+    """Background thread calling a beat function every interval
+
+    The beat function is given the interval, decides whether the
+    connection has been idle that long and returns False if it skipped
+    the beat; it raises if the probe failed. Once the connection is dead,
+    the thread calls the revive function, if given, instead of beating.
+    """
+    def __init__(
+        self,
+        beat: Callable[[float], bool],
+        health: ConnectionHealth,
+        interval: float = 1.0,
+        revive: Callable[[], None] = None,
+    ) -> None:
+        """Constructor for Heartbeat
+
+        Parameters
+        ----------
+        beat: sends a probe if the connection has been idle for the
+            given seconds; returns whether it did
+        health: the health to update
+        interval: seconds between beats
+        revive: re-establishes a dead connection; default None, leave it
+            dead
+        """
+        self.interval = interval
+        self._beat = beat
+        self._health = health
+        self._revive = revive
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        """Start beating"""
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """Stop beating and wait for the thread to finish
+
+        Parameters
+        ----------
+        timeout: maximum seconds to wait; default wait forever
+        """
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        """Whether the thread is running"""
+        return self._thread.is_alive()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                if self._health.state == DEAD:
+                    if self._revive is not None:
+                        self._revive()
+                elif self._beat(self.interval):
+                    self._health.beats += 1
+                    self._health.mark_healthy()
+            except Exception as e:
+                self._health.mark_dead(e)
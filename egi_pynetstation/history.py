@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Record of the events sent during a session"""
+
+import threading
+from array import array
+from bisect import bisect_left
+from math import isnan
+from typing import NamedTuple
+
+from .eci import (
+    EVENT_TYPE_OFFSET, EVENT_LABEL_OFFSET, package_event_buffers,
+    unpack_event_fields,
+)
+
+# Delivery status of a sent event
+ACKED = 0
+UNACKED = 1
+
+
+class EventRecord(NamedTuple):
+    """An event as it was sent to the amp
+
+    Attributes
+    ----------
+    seq: int
+        The sequence number of the event within the session, from 0
+    start: float
+        The start sent, in seconds since the sync epoch
+    duration: float
+        The duration in seconds
+    event_type: str
+        The four-character event type
+    label: str
+        The event label
+    desc: str
+        The event description
+    data: dict
+        The event data
+    stamp_time: float
+        The time.time() the event was stamped with
+    ack_latency: float
+        Seconds from writing the event (or its batch) to reading the
+        acknowledgement
+    sync_offset: float
+        The NTP offset of the sync the event was stamped against
+    sync_epoch: float
+        The epoch of the sync the event was stamped against
+    tx_time: float
+        The time.time() the kernel handed the event (or the batch it was
+        queued in) to the network device, or None if tx timestamps are
+        disabled; tx_time - stamp_time is the host-stack latency
+    status: int
+        ACKED, or UNACKED if the event was sent without waiting for its
+        acknowledgement
+    intended: float
+        The time.time() the event was meant for: when send_event or
+        queue_event was called with start "now" or "transmit", or the
+        float start requested. intended - stamp_time is the stamping
+        error, non-zero for "transmit".
+    """
+    seq: int
+    start: float
+    duration: float
+    event_type: str
+    label: str
+    desc: str
+    data: dict
+    stamp_time: float
+    ack_latency: float
+    sync_offset: float
+    sync_epoch: float
+    tx_time: float = None
+    status: int = ACKED
+    intended: float = None
+
+
+class EventHistory(object):
+    """Compact, append-only journal of sent events
+
+    The fixed fields of each event are kept in typed arrays, one per
+    field, and its label, description and data in a single shared byte
+    arena, encoded as they were sent. The sync offset and epoch are
+    stored once per sync rather than once per event. An event costs
+    about 80 bytes plus its encoded strings and data, against several
+    hundred for an EventRecord and its data dictionary, so memory grows
+    slowly and steadily over sessions of millions of events.
+
+    Events may be added from several threads: each is appended whole
+    under a lock, and only counted once every column holds it.
+
+    Indexing and iteration decode EventRecords on demand. Events can be
+    looked up by type, through a per-type index, and by stamp time, by
+    bisection while stamp times are in order (as they are unless queued
+    and directly sent events are mixed).
+
+    Attributes
+    ----------
+    columns: tuple
+        The names of the typed columns available from column()
+    """
+    columns = (
+        'seq', 'start', 'duration', 'stamp_time', 'ack_latency', 'tx_time',
+        'status', 'intended',
+    )
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.clear()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('EventHistory index out of range')
+        offset = self._offsets[i]
+        label, desc, data = unpack_event_fields(self._arena, offset)
+        sync_offset, sync_epoch = self._syncs[self._sync_index[i]]
+        tx_time = self._tx_time[i]
+        intended = self._intended[i]
+        return EventRecord(
+            self._seq[i], self._start[i], self._duration[i],
+            self._types[4 * i:4 * i + 4].decode('ascii'), label, desc, data,
+            self._stamp_time[i], self._ack_latency[i], sync_offset,
+            sync_epoch, None if isnan(tx_time) else tx_time,
+            self._status[i], None if isnan(intended) else intended,
+        )
+
+    def add(
+        self,
+        seq: int,
+        start: float,
+        duration: float,
+        block: bytes,
+        key_block: bytes,
+        stamp_time: float,
+        ack_latency: float,
+        sync_offset: float,
+        sync_epoch: float,
+        tx_time: float = None,
+        status: int = ACKED,
+        intended: float = None,
+    ) -> None:
+        """Add a sent event from its packaged buffers
+
+        Parameters
+        ----------
+        seq, start, duration, stamp_time, ack_latency, sync_offset,
+            sync_epoch, tx_time: as for EventRecord; ack_latency is NaN
+            for an event not waited for
+        block, key_block: the event block and key block from
+            eci.package_event_buffers
+        status: ACKED, or UNACKED if the event was sent without waiting
+            for its acknowledgement
+        intended: as for EventRecord
+        """
+        event_type = bytes(block[EVENT_TYPE_OFFSET:EVENT_LABEL_OFFSET])
+        sync = (sync_offset, sync_epoch)
+        with self._lock:
+            i = self._count
+            self._seq.append(seq)
+            self._start.append(start)
+            self._duration.append(duration)
+            self._types += event_type
+            if i and stamp_time < self._stamp_time[-1]:
+                self._ordered = False
+            self._stamp_time.append(stamp_time)
+            self._ack_latency.append(ack_latency)
+            self._tx_time.append(
+                float('nan') if tx_time is None else tx_time
+            )
+            self._status.append(status)
+            self._intended.append(
+                float('nan') if intended is None else intended
+            )
+            if not self._syncs or sync != self._syncs[-1]:
+                self._syncs.append(sync)
+            self._sync_index.append(len(self._syncs) - 1)
+            self._offsets.append(len(self._arena))
+            self._arena += block[EVENT_LABEL_OFFSET:]
+            self._arena += key_block
+            index = self._by_type.get(event_type)
+            if index is None:
+                index = self._by_type[event_type] = array('Q')
+            index.append(i)
+            self._count = i + 1
+
+    def append(self, record: EventRecord) -> None:
+        """Add a sent event from its record
+
+        Parameters
+        ----------
+        record: the event that was sent
+        """
+        _, block, key_block = package_event_buffers(
+            record.start, record.duration, record.event_type, record.label,
+            record.desc, record.data
+        )
+        self.add(
+            record.seq, record.start, record.duration, block, key_block,
+            record.stamp_time, record.ack_latency, record.sync_offset,
+            record.sync_epoch, record.tx_time, record.status,
+            record.intended
+        )
+
+    def clear(self) -> None:
+        """Discard all events"""
+        with self._lock:
+            self._clear()
+
+    def _clear(self) -> None:
+        """Discard all events; the lock must be held"""
+        self._count = 0
+        self._seq = array('q')
+        self._start = array('d')
+        self._duration = array('d')
+        self._types = bytearray()
+        self._stamp_time = array('d')
+        self._ack_latency = array('d')
+        self._tx_time = array('d')
+        self._status = bytearray()
+        self._intended = array('d')
+        self._syncs = []
+        self._sync_index = array('I')
+        self._offsets = array('Q')
+        self._arena = bytearray()
+        self._by_type = {}
+        self._ordered = True
+
+    def of_type(self, event_type: str) -> list:
+        """Get the indices of the events of a type, in order sent
+
+        Parameters
+        ----------
+        event_type: the four-character event type
+        """
+        index = self._by_type.get(event_type.encode('ascii'))
+        return [] if index is None else list(index)
+
+    def between(self, t0: float, t1: float) -> list:
+        """Get the indices of the events stamped in [t0, t1)
+
+        Parameters
+        ----------
+        t0, t1: time.time() bounds on the stamp time
+
+        Returns
+        -------
+        The indices, in order sent
+        """
+        stamps = self._stamp_time
+        if self._ordered:
+            return list(range(
+                bisect_left(stamps, t0), bisect_left(stamps, t1)
+            ))
+        return [i for i, t in enumerate(stamps) if t0 <= t < t1]
+
+    def event_types(self) -> list:
+        """Get the distinct event types, in order first sent"""
+        return [t.decode('ascii') for t in self._by_type]
+
+    def column(self, name: str) -> array:
+        """Get a typed column of every event, without copying
+
+        Parameters
+        ----------
+        name: one of columns; tx_time and intended are NaN where unknown,
+            and status is a bytearray of ACKED or UNACKED
+
+        Returns
+        -------
+        The array, which np.frombuffer can view; it must not be modified
+        """
+        if name not in self.columns:
+            raise KeyError(f'No column {name}; use one of {self.columns}')
+        return getattr(self, '_' + name)
+
+    def nbytes(self) -> int:
+        """Get the approximate memory used by the stored events, in bytes"""
+        arrays = (
+            self._seq, self._start, self._duration, self._stamp_time,
+            self._ack_latency, self._tx_time, self._intended,
+            self._sync_index, self._offsets, *self._by_type.values(),
+        )
+        return (
+            sum(a.itemsize * len(a) for a in arrays) +
+            len(self._types) + len(self._status) + len(self._arena)
+        )
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""In-process stand-in for the ECI connection, for dry runs and tests
+
+NetStation(..., backend='memory') writes to a MemorySocket instead of a
+network socket. Every command still goes through the real validation,
+packing and protocol code; the MemorySocket frames what is written,
+replies as NetStation would, and keeps each EventData frame in an
+array-backed MemoryEventLog that can be queried afterwards.
+"""
+
+from array import array
+from typing import Sequence, Union
+
+from .eci import (
+    EVENT_TIMES_STRUCT, EVENT_LABEL_OFFSET, LENGTH_STRUCT, bytes_like,
+    unpack_event_fields,
+)
+from .exceptions import *
+
+# Bytes following each command byte; EventData carries its own length
+payload_sizes = {
+    b'Q'[0]: 4, b'Y'[0]: 0, b'X'[0]: 0, b'B'[0]: 0, b'E'[0]: 0,
+    b'A'[0]: 0, b'T'[0]: 4, b'N'[0]: 8, b'S'[0]: 8,
+}
+EVENT_DATA = b'D'[0]
+# Identity the stand-in reports in reply to Query
+IDENTITY = 4
+
+
+class MemoryEventLog(object):
+    """Array-backed log of EventData frames
+
+    The start and duration of every event are kept in typed arrays and
+    the frames themselves in a single byte arena, so logging costs a few
+    appends per event; the label, description and data are only decoded
+    when queried.
+
+    Attributes
+    ----------
+    commands: bytearray
+        The command byte of every command received, in order
+    """
+    def __init__(self) -> None:
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._start_ms)
+
+    def append(self, frame: Union[bytes, memoryview]) -> None:
+        """Log one EventData frame, without the command byte
+
+        Parameters
+        ----------
+        frame: the length header and event blocks
+        """
+        start_ms, duration_ms = EVENT_TIMES_STRUCT.unpack_from(frame, 2)
+        self._start_ms.append(start_ms)
+        self._duration_ms.append(duration_ms)
+        self._types += frame[10:14]
+        self._offsets.append(len(self._arena))
+        self._arena += frame
+
+    def clear(self) -> None:
+        """Discard all events and commands"""
+        self.commands = bytearray()
+        self._start_ms = array('L')
+        self._duration_ms = array('L')
+        self._types = bytearray()
+        self._offsets = array('Q')
+        self._arena = bytearray()
+
+    def event_types(self) -> list:
+        """Get the type of every event, in order"""
+        types = self._types.decode('ascii')
+        return [types[i:i + 4] for i in range(0, len(types), 4)]
+
+    def find(self, event_type: str = None, label: str = None) -> list:
+        """Get the indices of the events matching a type and label
+
+        Parameters
+        ----------
+        event_type: the event type to match; default any
+        label: the label to match; default any
+
+        Returns
+        -------
+        List of event indices, in order
+        """
+        if event_type is None:
+            indices = range(len(self))
+        else:
+            key = event_type.encode('ascii')
+            types = self._types
+            indices = [
+                i for i in range(len(self))
+                if types[4 * i:4 * i + 4] == key
+            ]
+        if label is None:
+            return list(indices)
+        return [i for i in indices if self.event(i)['label'] == label]
+
+    def count(self, event_type: str = None) -> int:
+        """Get the number of events, optionally of one type"""
+        if event_type is None:
+            return len(self)
+        return len(self.find(event_type))
+
+    def starts(self, event_type: str = None) -> list:
+        """Get event starts in seconds, as sent
+
+        Parameters
+        ----------
+        event_type: only include events of this type; default all
+
+        Returns
+        -------
+        List of starts: the millisecond start field divided by 1000
+        """
+        if event_type is None:
+            return [ms / 1000 for ms in self._start_ms]
+        return [self._start_ms[i] / 1000 for i in self.find(event_type)]
+
+    def event(self, i: int) -> dict:
+        """Decode one event
+
+        Parameters
+        ----------
+        i: the index of the event
+
+        Returns
+        -------
+        Dictionary with the start and duration in seconds, the event
+        type, label, description and data
+        """
+        # The frame's length header precedes the event block
+        label, desc, data = unpack_event_fields(
+            self._arena, self._offsets[i] + 2 + EVENT_LABEL_OFFSET
+        )
+        return {
+            'start': self._start_ms[i] / 1000,
+            'duration': self._duration_ms[i] / 1000,
+            'event_type': self._types[4 * i:4 * i + 4].decode('ascii'),
+            'label': label,
+            'desc': desc,
+            'data': data,
+        }
+
+
+class MemorySocket(object):
+    """Drop-in replacement for socket_wrapper.Socket with no network
+
+    Commands written are framed and answered immediately: Query with the
+    identity, NTPReturnClock with the timestamp it was sent, and
+    everything else with 'Z'. The NTP offset of a dry run is always 0.
+
+    Attributes
+    ----------
+    log: MemoryEventLog
+        Every command and event received
+    tx_timestamps: bool
+        Always False; there is no kernel to timestamp
+    """
+    def __init__(self, address: str, port: int, *args) -> None:
+        """Constructor for MemorySocket
+
+        Parameters
+        ----------
+        address, port: accepted for compatibility; unused
+        args: further Socket arguments, ignored
+        """
+        self._address = (address, port)
+        self.log = MemoryEventLog()
+        self.tx_timestamps = False
+        self.last_tx_key = None
+        self._connected = False
+        self._pending = bytearray()
+        self._replies = bytearray()
+
+    def connect(self) -> None:
+        """Open the simulated connection"""
+        self._connected = True
+        self._pending = bytearray()
+        self._replies = bytearray()
+
+    def disconnect(self) -> None:
+        """Close the simulated connection"""
+        self._connected = False
+
+    def write(self, data: Union[bytes, Sequence[bytes]]) -> None:
+        """Frame and answer the commands in data
+
+        Parameters
+        ----------
+        data: bytes or sequence of bytes, as for Socket.write
+
+        Raises
+        ------
+        ConnectionResetError if the connection has been closed
+        """
+        if not self._connected:
+            raise ConnectionResetError()
+        if isinstance(data, bytes_like):
+            self._pending += data
+        else:
+            for part in data:
+                self._pending += part
+        pending = self._pending
+        view = memoryview(pending)
+        pos = 0
+        n = len(pending)
+        log = self.log
+        replies = self._replies
+        while pos < n:
+            cmd = pending[pos]
+            if cmd == EVENT_DATA:
+                if n - pos < 3:
+                    break
+                size = 3 + LENGTH_STRUCT.unpack_from(pending, pos + 1)[0]
+            else:
+                size = 1 + payload_sizes.get(cmd, 0)
+            if n - pos < size:
+                break
+            log.commands.append(cmd)
+            if cmd == EVENT_DATA:
+                log.append(view[pos + 1:pos + size])
+                replies.append(90)
+            elif cmd == b'Q'[0]:
+                replies += b'I' + bytes((IDENTITY,))
+            elif cmd == b'S'[0]:
+                replies += b'S' + view[pos + 1:pos + size]
+            else:
+                replies.append(90)
+            pos += size
+        view.release()
+        del pending[:pos]
+
+    def read(self) -> bytes:
+        """Get every reply not yet read
+
+        Returns
+        -------
+        The replies, or b'' if there are none (as for a closed socket)
+        """
+        replies = bytes(self._replies)
+        self._replies.clear()
+        return replies
+
+    def tx_time(self, key: int = None) -> float:
+        """Kernel timestamps are not simulated; always None"""
+        return None
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Sans-I/O state machine for the ECI protocol
+
+ECIProtocol turns commands into bytes to write and bytes read into
+replies, and tracks the session state and the commands awaiting a reply.
+It does no I/O itself, so the same logic drives the blocking NetStation
+and can drive pipelined, threaded or asyncio transports, or be tested
+without a socket.
+
+Examples
+--------
+>>> protocol = ECIProtocol()
+>>> protocol.connection_made()
+>>> buffers = protocol.send('Query', 'NTEL')
+>>> # ... write buffers to the transport, read some bytes ...
+>>> for reply in protocol.receive(b'I\\x04'):
+...     print(reply.command, reply.value, reply.error)
+Query 4 None
+"""
+
+from collections import deque
+from typing import NamedTuple, Union
+
+from .eci import (
+    build_command_buffers, parse_response, byte_table,
+    INT_VAL_I, INT_VAL_S, INT_VAL_Z,
+)
+from .exceptions import *
+
+# Session states, in the order a session normally passes through them
+CLOSED = 'closed'
+CONNECTED = 'connected'
+QUERIED = 'queried'
+ATTENTIVE = 'attentive'
+SYNCED = 'synced'
+RECORDING = 'recording'
+
+# Single-byte replies which acknowledge a command
+acknowledgements = frozenset((INT_VAL_Z, INT_VAL_I, INT_VAL_S, 1))
+# Commands whose reply may be longer than one byte
+multi_byte = frozenset(('Query', 'NewQuery', 'NTPReturnClock'))
+# Length of a timestamp reply to NTPReturnClock
+NTP_REPLY_LENGTH = 8
+
+
+class Reply(NamedTuple):
+    """The amp's reply to one command
+
+    Attributes
+    ----------
+    command: str
+        The command replied to, or None for bytes which answer no
+        command
+    value: object
+        The parsed response (see eci.parse_response), or None on error
+    error: Exception
+        The ECIResponseFailure the response represents, or None
+    """
+    command: str
+    value: object
+    error: Exception
+
+
+# Replies are immutable, so every acknowledgement of a command is the same
+acknowledged = {cmd: Reply(cmd, True, None) for cmd in byte_table}
+
+
+class ECIProtocol(object):
+    """ECI session state and reply framing, without I/O
+
+    Commands are sent with send, which returns the buffers to write, and
+    replies are matched to them in order by receive, which accepts bytes
+    in whatever chunks the transport delivers. Any number of commands may
+    be outstanding at once.
+
+    Attributes
+    ----------
+    state: str
+        The session state; one of CLOSED, CONNECTED, QUERIED, ATTENTIVE,
+        SYNCED or RECORDING. It advances when the amp acknowledges the
+        command responsible, not when the command is sent.
+    identity: int
+        The amp's identity from the reply to Query, or None
+    lost: bool
+        Whether the last session was ended by connection_lost, rather
+        than never started
+    """
+    def __init__(self) -> None:
+        self.state = CLOSED
+        self.identity = None
+        self.lost = False
+        self._outstanding = deque()
+        self._buffer = bytearray()
+        self._stray_z = False
+
+    def __len__(self) -> int:
+        """The number of commands awaiting a reply"""
+        return len(self._outstanding)
+
+    def connection_made(self) -> None:
+        """Start a new session on a freshly opened transport"""
+        self.state = CONNECTED
+        self.identity = None
+        self.lost = False
+        self._outstanding.clear()
+        self._buffer = bytearray()
+        self._stray_z = False
+
+    def connection_lost(self) -> list:
+        """End the session because the transport closed
+
+        Returns
+        -------
+        The commands which were still awaiting a reply
+        """
+        lost = list(self._outstanding)
+        self.state = CLOSED
+        self.lost = True
+        self._outstanding.clear()
+        self._buffer = bytearray()
+        return lost
+
+    def _raise_closed(self) -> None:
+        """Raise the error for a command sent while the session is closed
+        """
+        if self.lost:
+            raise NetStationConnectionLost()
+        raise NetStationUnconnected()
+
+    def send(self, cmd: str, data: object = None) -> list:
+        """Build a command and expect its reply
+
+        Parameters
+        ----------
+        cmd: the command to send; see eci.byte_table
+        data: the data for the command; see eci.build_command_buffers
+
+        Returns
+        -------
+        The list of buffers to write, in order
+
+        Raises
+        ------
+        NetStationUnconnected if the session is closed, or its subclass
+        NetStationConnectionLost if it was ended by connection_lost
+        InvalidECICommand if the command is invalid
+        """
+        if self.state == CLOSED:
+            self._raise_closed()
+        buffers = build_command_buffers(cmd, data)
+        self._outstanding.append(cmd)
+        return buffers
+
+    def expect(self, cmd: str, count: int = 1) -> None:
+        """Expect replies to commands built and written elsewhere
+
+        Parameters
+        ----------
+        cmd: the command sent, e.g. 'EventData' for queued events
+        count: the number of such commands sent, in order
+
+        Raises
+        ------
+        NetStationUnconnected if the session is closed, or its subclass
+        NetStationConnectionLost if it was ended by connection_lost
+        """
+        if self.state == CLOSED:
+            self._raise_closed()
+        self._outstanding.extend([cmd] * count)
+
+    def receive(
+        self, data: Union[bytes, bytearray, memoryview], whole: bool = False
+    ) -> list:
+        """Consume bytes read from the transport
+
+        Parameters
+        ----------
+        data: the bytes read; need not align with replies
+        whole: if True, data ends on a reply boundary, as when a blocking
+            transport reads one reply per command. A reply whose length
+            is ambiguous (a bare 'I' to Query, or an NTPReturnClock
+            timestamp with or without a trailing 'Z') is then taken to end
+            with the data rather than waiting for more.
+
+        Returns
+        -------
+        List of Reply for every reply completed by data, in order; an
+        empty list if none is complete yet
+
+        Notes
+        -----
+        Failures are returned as Reply.error rather than raised, so the
+        replies to later commands in the same data are not lost. Bytes
+        received while no command is outstanding are returned as a Reply
+        to command None with an InvalidECIResponse error.
+
+        Unless whole is True, the reply to NTPReturnClock is always framed
+        as a timestamp, since its first byte cannot be told apart from a
+        single-byte failure.
+        """
+        if self._buffer:
+            self._buffer += data
+            view = self._buffer
+        else:
+            view = data
+        n = len(view)
+        pos = 0
+        replies = []
+        outstanding = self._outstanding
+        if self._stray_z and n and view[0] == INT_VAL_Z and not outstanding:
+            # The 'Z' which sometimes follows an NTPReturnClock timestamp
+            pos = 1
+        self._stray_z = False
+        while pos < n and outstanding:
+            cmd = outstanding.popleft()
+            head = view[pos]
+            if cmd not in multi_byte or (
+                cmd != 'NTPReturnClock' and head != INT_VAL_I
+            ):
+                # Every reply is a single byte but the identity and the
+                # NTPReturnClock timestamp
+                pos += 1
+                if head in acknowledgements:
+                    reply = acknowledged[cmd]
+                else:
+                    reply = self._parse(cmd, view[pos - 1:pos])
+            else:
+                size = self._frame_size(cmd, view, pos, n, whole)
+                if size is None:
+                    outstanding.appendleft(cmd)
+                    break
+                reply = self._parse(cmd, view[pos:pos + size])
+                pos += size
+            if cmd != 'EventData' and reply.error is None:
+                self._advance(cmd, reply.value)
+            replies.append(reply)
+        if pos < n and not outstanding:
+            replies.append(Reply(
+                None, None, InvalidECIResponse(bytes(view[pos:n]))
+            ))
+            pos = n
+        if pos < n:
+            self._buffer = bytearray(view[pos:n])
+        elif self._buffer:
+            self._buffer = bytearray()
+        return replies
+
+    def _frame_size(
+        self, cmd: str, view, pos: int, n: int, whole: bool
+    ) -> int:
+        """Get the length of a multi-byte reply, or None if incomplete"""
+        available = n - pos
+        if cmd != 'NTPReturnClock':
+            if available >= 2:
+                return 2
+            return 1 if whole else None
+        # NTPReturnClock: 'S' and a timestamp, or a timestamp and 'Z'
+        if whole:
+            return available
+        if view[pos] == INT_VAL_S:
+            if available > NTP_REPLY_LENGTH:
+                return NTP_REPLY_LENGTH + 1
+            return None
+        if available < NTP_REPLY_LENGTH:
+            return None
+        if available > NTP_REPLY_LENGTH and not self._outstanding:
+            if view[pos + NTP_REPLY_LENGTH] == INT_VAL_Z:
+                return NTP_REPLY_LENGTH + 1
+        if available == NTP_REPLY_LENGTH:
+            self._stray_z = True
+        return NTP_REPLY_LENGTH
+
+    def _parse(self, cmd: str, frame) -> Reply:
+        """Parse one framed reply"""
+        try:
+            return Reply(cmd, parse_response(frame), None)
+        except ECIResponseFailure as e:
+            return Reply(cmd, None, e)
+
+    def _advance(self, cmd: str, value: object) -> None:
+        """Advance the session state on an acknowledged command"""
+        state = self.state
+        if cmd == 'Query' or cmd == 'NewQuery':
+            if value is not True:
+                self.identity = value
+            if state == CONNECTED:
+                self.state = QUERIED
+        elif cmd == 'Attention':
+            if state in (CONNECTED, QUERIED):
+                self.state = ATTENTIVE
+        elif cmd in ('ClockSync', 'NTPClockSync'):
+            if state != RECORDING:
+                self.state = SYNCED
+        elif cmd == 'BeginRecording':
+            self.state = RECORDING
+        elif cmd == 'EndRecording':
+            self.state = SYNCED
+        elif cmd == 'Exit':
+            self.state = CLOSED
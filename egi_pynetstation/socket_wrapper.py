@@ -2,8 +2,33 @@
 # -*- coding: utf-8 -*-
 
 import socket
+from struct import Struct
+from typing import Sequence, Union
 from .exceptions import *
 
+# Types that can be written as a single buffer
+bytes_like = (bytes, bytearray, memoryview)
+
+# Linux SO_TIMESTAMPING; see the kernel's timestamping documentation.
+# The socket module does not export these names.
+SO_TIMESTAMPING = 37
+SOF_TIMESTAMPING_TX_SOFTWARE = 1 << 1
+SOF_TIMESTAMPING_SOFTWARE = 1 << 4
+SOF_TIMESTAMPING_OPT_ID = 1 << 7
+SOF_TIMESTAMPING_OPT_TSONLY = 1 << 11
+TX_TIMESTAMP_FLAGS = (
+    SOF_TIMESTAMPING_TX_SOFTWARE | SOF_TIMESTAMPING_SOFTWARE |
+    SOF_TIMESTAMPING_OPT_ID | SOF_TIMESTAMPING_OPT_TSONLY
+)
+SO_EE_ORIGIN_TIMESTAMPING = 4
+IP_RECVERR = 11
+# The software timestamp is the first timespec of struct scm_timestamping
+TIMESPEC_STRUCT = Struct('ll')
+# ee_errno, ee_origin, ee_type, ee_code, ee_pad, ee_info, ee_data
+EXTENDED_ERR_STRUCT = Struct('IBBBBII')
+# Timestamp IDs are the 32-bit byte offset of the last byte of each send
+TX_KEY_WRAP = 2**32
+
 
 class Socket():
     """
@@ -11,8 +36,18 @@ class Socket():
     """
     buffersize = 4096
     timeout = 1
+    # Most buffers passed to a single sendmsg call; POSIX IOV_MAX is at
+    # least this large on every platform that has sendmsg
+    iov_max = 1024
+    # TCP keepalive: idle seconds before the first probe, seconds between
+    # probes, and unanswered probes before the connection is dropped
+    keepalive_idle = 10
+    keepalive_interval = 5
+    keepalive_count = 3
 
-    def __init__(self, address: str, port: int) -> None:
+    def __init__(
+        self, address: str, port: int, tx_timestamps: bool = False
+    ) -> None:
         """
         Construct Socket object; does not connect.
 
@@ -22,9 +57,16 @@ class Socket():
             The IPv4 address the socket will use
         port: int
             The port number the socket will use
+        tx_timestamps: bool
+            Whether to have the kernel timestamp each write as it is
+            handed to the network device (Linux only); see tx_time
         """
         self._address = (address, port)
         self._socket = None
+        self.tx_timestamps = tx_timestamps
+        self.last_tx_key = None
+        self._tx_bytes = 0
+        self._tx_times = {}
 
     def connect(self) -> None:
         """
@@ -33,10 +75,38 @@ class Socket():
         Raises
         ------
         ConnectionRefusedError if the address is unavailable
+        SocketTimestampingUnsupported if tx_timestamps was requested on a
+        platform without SO_TIMESTAMPING
+
+        Notes
+        -----
+        Nagle's algorithm is disabled so that small commands are sent
+        immediately, and TCP keepalive is enabled so that a dead peer is
+        detected on an idle connection. The keepalive timing options are
+        only set where the platform provides them.
         """
+        if self.tx_timestamps and not hasattr(socket, 'MSG_ERRQUEUE'):
+            raise SocketTimestampingUnsupported()
         self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for option, value in (
+            ('TCP_KEEPIDLE', Socket.keepalive_idle),
+            ('TCP_KEEPINTVL', Socket.keepalive_interval),
+            ('TCP_KEEPCNT', Socket.keepalive_count),
+        ):
+            if hasattr(socket, option):
+                self._socket.setsockopt(
+                    socket.IPPROTO_TCP, getattr(socket, option), value
+                )
         self._socket.connect(self._address)
         self._socket.settimeout(Socket.timeout)
+        if self.tx_timestamps:
+            self._socket.setsockopt(
+                socket.SOL_SOCKET, SO_TIMESTAMPING, TX_TIMESTAMP_FLAGS
+            )
+            self._tx_bytes = 0
+            self._tx_times = {}
 
     def disconnect(self) -> None:
         """
@@ -46,28 +116,60 @@ class Socket():
             self._socket.close()
             self._socket = None
 
-    def write(self, data: bytes) -> None:
+    def write(self, data: Union[bytes, Sequence[bytes]]) -> None:
         """
         Write to the socket
 
         Parameters
         ----------
-        data: bytes
-            The data to write to the socket
+        data: bytes or sequence of bytes
+            The data to write to the socket; a sequence of bytes-like
+            objects is written in order as if joined, without copying
 
         Raises
         ------
-        SocketIncompleteTransmission if the full data is not transmitted
+        SocketIncompleteTransmission if the connection stops accepting data
+        before the full data is transmitted
+
+        Notes
+        -----
+        Sequences are sent with scatter-gather sendmsg where the platform
+        supports it, and joined and sent otherwise (e.g. on Windows).
+        Short writes are retried from where they left off.
         """
-        length_data = len(data)
-        length_transmitted = 0
         if not self._socket:
             self.connect()
-        length_transmitted = self._socket.send(data)
-        if length_transmitted != length_data:
-            raise SocketIncompleteTransmission(
-                length_transmitted, length_data
-            )
+        if isinstance(data, bytes_like):
+            views = [memoryview(data).cast('B')]
+        else:
+            views = [memoryview(d).cast('B') for d in data]
+        if not hasattr(self._socket, 'sendmsg') and len(views) > 1:
+            views = [memoryview(b''.join(views))]
+        views = [v for v in views if len(v)]
+        length_data = sum(len(v) for v in views)
+        length_transmitted = 0
+        first = 0
+        while first < len(views):
+            if len(views) - first == 1:
+                sent = self._socket.send(views[first])
+            else:
+                sent = self._socket.sendmsg(
+                    views[first:first + Socket.iov_max]
+                )
+            if sent == 0:
+                raise SocketIncompleteTransmission(
+                    length_transmitted, length_data
+                )
+            length_transmitted += sent
+            # Advance past fully sent buffers, then into a partial one
+            while first < len(views) and sent >= len(views[first]):
+                sent -= len(views[first])
+                first += 1
+            if sent:
+                views[first] = views[first][sent:]
+        if self.tx_timestamps:
+            self._tx_bytes += length_data
+            self.last_tx_key = (self._tx_bytes - 1) % TX_KEY_WRAP
 
     def read(self) -> bytes:
         """
@@ -80,3 +182,72 @@ class Socket():
         if not self._socket:
             self._socket.connect()
         return self._socket.recv(Socket.buffersize)
+
+    def tx_time(self, key: int = None) -> float:
+        """
+        Get the kernel transmit time of a write
+
+        Parameters
+        ----------
+        key: int
+            The last_tx_key recorded after the write; default the most
+            recent write
+
+        Returns
+        -------
+        The time.time() at which the kernel handed the last byte of the
+        write to the network device, or None if timestamps are disabled
+        or the kernel has not reported it
+
+        Notes
+        -----
+        Timestamps are collected from the socket error queue without
+        blocking. Call this after reading the response to the write, by
+        which time the kernel has sent it. The timestamps of earlier
+        writes are dropped, so those of writes never asked about (e.g.
+        commands other than events) do not pile up.
+        """
+        if not self.tx_timestamps:
+            return None
+        if key is None:
+            key = self.last_tx_key
+        if key not in self._tx_times:
+            self._drain_tx_times()
+        t = self._tx_times.pop(key, None)
+        # Keys arrive in write order, wrapping at TX_KEY_WRAP
+        stale = []
+        for k in self._tx_times:
+            if (key - k) % TX_KEY_WRAP > TX_KEY_WRAP // 2:
+                break
+            stale.append(k)
+        for k in stale:
+            del self._tx_times[k]
+        return t
+
+    def _drain_tx_times(self) -> None:
+        """Collect every timestamp waiting in the socket error queue"""
+        self._socket.settimeout(0.0)
+        try:
+            while True:
+                try:
+                    _, ancdata, _, _ = self._socket.recvmsg(
+                        0, 512, socket.MSG_ERRQUEUE
+                    )
+                except (BlockingIOError, InterruptedError):
+                    return
+                t = None
+                key = None
+                for level, kind, data in ancdata:
+                    if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPING:
+                        seconds, nanoseconds = TIMESPEC_STRUCT.unpack_from(
+                            data
+                        )
+                        t = seconds + nanoseconds * 1e-9
+                    elif level == socket.IPPROTO_IP and kind == IP_RECVERR:
+                        err = EXTENDED_ERR_STRUCT.unpack_from(data)
+                        if err[1] == SO_EE_ORIGIN_TIMESTAMPING:
+                            key = err[6]
+                if t is not None and key is not None:
+                    self._tx_times[key] = t
+        finally:
+            self._socket.settimeout(Socket.timeout)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Clock synchronization state shared between NetStation and its workers"""
+
+from math import ceil
+from statistics import median
+from typing import NamedTuple, Sequence
+
+
+class SyncState(NamedTuple):
+    """Immutable record of a completed clock synchronization
+
+    NetStation publishes a new SyncState by replacing a single attribute,
+    so readers such as send_event always see an epoch and offset from the
+    same synchronization without taking a lock.
+
+    Attributes
+    ----------
+    epoch: float
+        The local time.time() at which the amp clock was synchronized;
+        event starts are sent relative to this
+    offset: float
+        The NTP offset, in seconds, measured for this synchronization
+    clock_ms: int
+        The value of the 32-bit millisecond clock sent with ClockSync at
+        epoch when using the simple clock; event starts are sent relative
+        to it. Always 0 for NTP synchronization.
+    """
+    epoch: float
+    offset: float
+    clock_ms: int = 0
+
+
+class OffsetEstimate(NamedTuple):
+    """An estimate of the amp clock's offset from the local clock
+
+    Attributes
+    ----------
+    offset: float
+        The amp clock minus the local clock, in seconds
+    error: float
+        Bound on the error of offset in seconds: half the round trip of
+        the slowest sample used, since the remote reading may have been
+        taken anywhere within it
+    rtt: float
+        The shortest round trip observed, in seconds
+    samples: int
+        The number of round trips taken
+    """
+    offset: float
+    error: float
+    rtt: float
+    samples: int
+
+
+def estimate_offset(
+    samples: Sequence[tuple], keep: float = 0.25
+) -> OffsetEstimate:
+    """Estimate the clock offset from timed round trips
+
+    Round trips delayed by scheduling or queueing are asymmetric and skew
+    the offset, so only the fastest are used, as NTP's clock filter does.
+
+    Parameters
+    ----------
+    samples: (send time, receive time, remote time) of each round trip,
+        all in time.time() terms
+    keep: the fraction of samples, fastest first, whose offsets are used;
+        at least one always is
+
+    Returns
+    -------
+    OffsetEstimate with the median offset of the kept samples, each taken
+    as the remote time minus the midpoint of the round trip
+
+    Raises
+    ------
+    ValueError
+        If there are no samples
+    """
+    if not samples:
+        raise ValueError('At least one round trip is required')
+    fastest = sorted(samples, key=lambda s: s[1] - s[0])
+    kept = fastest[:max(1, ceil(keep * len(fastest)))]
+    offset = median(remote - (sent + received) / 2
+                    for sent, received, remote in kept)
+    slowest = kept[-1][1] - kept[-1][0]
+    return OffsetEstimate(
+        offset, slowest / 2, kept[0][1] - kept[0][0], len(samples)
+    )
+
+
+def combine_offsets(*estimates: OffsetEstimate) -> OffsetEstimate:
+    """Combine independent offset estimates, weighting by their error
+
+    Parameters
+    ----------
+    estimates: the estimates, e.g. from ECI round trips and from NTP
+
+    Returns
+    -------
+    OffsetEstimate with the inverse-variance weighted mean offset and
+    its error; an estimate with no error is returned as is
+    """
+    for estimate in estimates:
+        if estimate.error == 0:
+            return estimate
+    weights = [1 / e.error ** 2 for e in estimates]
+    total = sum(weights)
+    offset = sum(w * e.offset for w, e in zip(weights, estimates)) / total
+    return OffsetEstimate(
+        offset, total ** -0.5, min(e.rtt for e in estimates),
+        sum(e.samples for e in estimates),
+    )
+
+
+class DriftEstimator(object):
+    """Estimates how fast the local clock drifts from the amp clock
+
+    The drift is the least-squares slope of the NTP offsets of recent
+    synchronizations over time. Until two NTP synchronizations have been
+    seen (and always for the simple clock, which measures no offset), the
+    default drift is assumed.
+
+    Attributes
+    ----------
+    default_drift: float
+        Drift, in seconds per second, assumed without measurements; the
+        default of 20 ppm is a typical worst case for a quartz oscillator
+    history: int
+        The number of most recent synchronizations fitted
+    """
+    def __init__(
+        self, default_drift: float = 20e-6, history: int = 16
+    ) -> None:
+        self.default_drift = default_drift
+        self.history = history
+        self._samples = []
+        self._drift = None
+        self._residual = 0.0
+
+    def add(self, sync: SyncState) -> None:
+        """Record the offset of an NTP synchronization and refit
+
+        Parameters
+        ----------
+        sync: the synchronization to record
+        """
+        self._samples.append((sync.epoch, sync.offset))
+        del self._samples[:-self.history]
+        n = len(self._samples)
+        if n < 2:
+            return
+        mean_t = sum(t for t, _ in self._samples) / n
+        mean_o = sum(o for _, o in self._samples) / n
+        var_t = sum((t - mean_t) ** 2 for t, _ in self._samples)
+        if var_t == 0:
+            return
+        slope = sum(
+            (t - mean_t) * (o - mean_o) for t, o in self._samples
+        ) / var_t
+        self._drift = abs(slope)
+        self._residual = max(
+            abs(o - mean_o - slope * (t - mean_t)) for t, o in self._samples
+        )
+
+    def samples(self) -> list:
+        """Get the (epoch, offset) of each synchronization being fitted"""
+        return list(self._samples)
+
+    def drift(self) -> float:
+        """Get the estimated drift in seconds per second"""
+        if self._drift is None:
+            return self.default_drift
+        return self._drift
+
+    def error_at(self, t: float, sync: SyncState) -> float:
+        """Estimate the worst-case timing error of an event
+
+        Parameters
+        ----------
+        t: the time.time() of the event
+        sync: the synchronization the event is stamped against
+
+        Returns
+        -------
+        The estimated error in seconds: the drift accumulated since the
+        synchronization plus the largest residual of the drift fit
+        """
+        return self.drift() * abs(t - sync.epoch) + self._residual
+
+
+class SyncPolicy(object):
+    """Decides when an existing synchronization can be reused
+
+    A synchronization is fresh while it is younger than max_age and the
+    timing error estimated from the drift since it was made is below
+    max_error.
+
+    Attributes
+    ----------
+    max_age: float
+        The age in seconds at which a synchronization is always redone;
+        0 to never reuse one
+    max_error: float
+        The estimated error in seconds at which a synchronization is
+        redone
+    """
+    def __init__(self, max_age: float = 10.0, max_error: float = 0.0005):
+        self.max_age = max_age
+        self.max_error = max_error
+
+    def is_fresh(
+        self, sync: SyncState, t: float, drift: DriftEstimator
+    ) -> bool:
+        """Whether a synchronization is still within tolerance
+
+        Parameters
+        ----------
+        sync: the current synchronization, or None if there is none
+        t: the time.time() it would be used at
+        drift: the drift estimator for the session
+
+        Returns
+        -------
+        True if sync can be reused at t
+        """
+        if sync is None or t - sync.epoch >= self.max_age:
+            return False
+        return drift.error_at(t, sync) < self.max_error
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+from egi_pynetstation.aggregate import MarkerAggregator
+from egi_pynetstation.exceptions import NetStationUnsynced
+from egi_pynetstation.sync import SyncState
+
+
+class FakeNetStation():
+    """Records the events it is asked to send"""
+    def __init__(self, epoch: float) -> None:
+        self._sync = SyncState(epoch, 0.0)
+        self.sent = []
+        self.queued = []
+
+    def send_event(self, **kwargs) -> None:
+        self.sent.append(kwargs)
+
+    def queue_event(self, **kwargs) -> None:
+        self.queued.append(kwargs)
+
+
+# Exception Testing
+def test_stream_must_be_four_characters():
+    agg = MarkerAggregator(FakeNetStation(0.0))
+    with pytest.raises(TypeError):
+        agg.add('FIX', t=1.0)
+
+
+def test_add_before_sync():
+    ns = FakeNetStation(0.0)
+    ns._sync = None
+    agg = MarkerAggregator(ns)
+    with pytest.raises(NetStationUnsynced):
+        agg.add('FIXN', t=1.0)
+    with pytest.raises(NetStationUnsynced):
+        agg.add('FIXN')
+    assert agg.stats() == {}
+
+
+def test_window_must_be_positive():
+    with pytest.raises(ValueError):
+        MarkerAggregator(FakeNetStation(0.0), window=0)
+
+
+# Correct functioning testing
+def test_one_event_per_window():
+    ns = FakeNetStation(1000.0)
+    agg = MarkerAggregator(ns, window=0.1)
+    for i in range(100):
+        agg.add('FIXN', value=float(i % 7), t=0.002 * i)
+    # Samples span 0-0.198 s: the first window was sent when the second
+    # began, and the second is still open
+    assert len(ns.sent) == 1
+    assert agg.flush() == 1
+    first, second = ns.sent
+    assert first['event_type'] == 'FIXN'
+    assert first['start'] == pytest.approx(0.0)
+    assert first['data']['cnt '] == 50
+    assert first['data']['last'] == pytest.approx(0.098)
+    assert (first['data']['min '], first['data']['max ']) == (0.0, 6.0)
+    assert second['start'] == pytest.approx(0.1)
+    assert second['data']['frst'] == pytest.approx(0.0)
+    assert agg.stats() == {'FIXN': {'samples': 100, 'events': 2}}
+
+
+def test_max_count_and_queue():
+    ns = FakeNetStation(1000.0)
+    agg = MarkerAggregator(ns, window=10.0, max_count=4, queue=True)
+    for i in range(10):
+        agg.add('RESP', t=0.5 + 0.01 * i)
+    assert [e['data']['cnt '] for e in ns.queued] == [4, 4]
+    assert 'min ' not in ns.queued[0]['data']
+    assert agg.flush() == 1
+    assert not ns.sent
+    # Each summary of the window starts where the previous one ended
+    spans = [(e['start'], e['start'] + e['duration']) for e in ns.queued]
+    assert spans == [
+        pytest.approx((0.0, 0.53)), pytest.approx((0.53, 0.57)),
+        pytest.approx((0.57, 10.0)),
+    ]
+    assert ns.queued[1]['data']['frst'] == pytest.approx(0.01)
+
+
+def test_start_not_before_sync():
+    ns = FakeNetStation(1000.05)
+    agg = MarkerAggregator(ns, window=0.1)
+    agg.add('FIXN', t=0.01)
+    agg.flush()
+    (event,) = ns.sent
+    assert event['start'] == pytest.approx(0.01)
+    assert event['duration'] == pytest.approx(0.04)
+    assert event['data']['frst'] == pytest.approx(0.0)
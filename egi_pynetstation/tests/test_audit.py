@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+from egi_pynetstation.audit import audit, iter_mff_events, match_events
+from egi_pynetstation.history import EventRecord
+
+track = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<eventTrack xmlns="http://www.egi.com/event_mff">
+    <name>ECI TCP/IP 55513</name>
+    <trackType>EVNT</trackType>
+    <event>
+        <beginTime>2023-11-14T22:13:20.002000+00:00</beginTime>
+        <duration>1000</duration>
+        <code>STIM</code>
+        <label>a</label>
+        <description></description>
+    </event>
+    <event>
+        <beginTime>2023-11-14T17:13:21.003000-05:00</beginTime>
+        <duration>1000</duration>
+        <code>STIM</code>
+        <label>a</label>
+    </event>
+    <event>
+        <beginTime>2023-11-14T22:13:25.000000+00:00</beginTime>
+        <duration>1000</duration>
+        <code>RESP</code>
+        <label>b</label>
+    </event>
+</eventTrack>
+'''
+
+# 2023-11-14T22:13:20+00:00
+t0 = 1700000000.0
+
+
+def sent_event(seq: int, stamp: float, event_type: str, label: str):
+    return EventRecord(
+        seq, stamp - t0, 0.001, event_type, label, '', {}, stamp, 0.0,
+        0.0, t0
+    )
+
+
+@pytest.fixture
+def mff(tmp_path):
+    path = tmp_path / 'session.mff'
+    path.mkdir()
+    (path / 'Events_ECI TCP-IP 55513.xml').write_text(track)
+    return str(path)
+
+
+def test_iter_mff_events(mff):
+    events = list(iter_mff_events(mff))
+    assert [e.code for e in events] == ['STIM', 'STIM', 'RESP']
+    assert events[0].begin_time == pytest.approx(t0 + 0.002)
+    # Time zones are honoured
+    assert events[1].begin_time == pytest.approx(t0 + 1.003)
+    assert events[0].track == 'ECI TCP/IP 55513'
+
+
+def test_match_by_type_label_and_order(mff):
+    sent = [
+        sent_event(0, t0, 'STIM', 'a'),
+        sent_event(1, t0 + 1.0, 'STIM', 'a'),
+        sent_event(2, t0 + 2.0, 'FRAM', 'c'),
+    ]
+    pairs, unmatched_sent, unmatched_recorded = match_events(
+        sent, iter_mff_events(mff)
+    )
+    assert [r.seq for r, _ in pairs] == [0, 1]
+    assert [e.begin_time - t0 for _, e in pairs] == pytest.approx(
+        [0.002, 1.003], abs=1e-6
+    )
+    assert [r.seq for r in unmatched_sent] == [2]
+    assert [e.code for e in unmatched_recorded] == ['RESP']
+
+
+def test_audit_statistics(mff):
+    pytest.importorskip('numpy')
+    sent = [
+        sent_event(0, t0, 'STIM', 'a'),
+        sent_event(1, t0 + 1.0, 'STIM', 'a'),
+    ]
+    report = audit(sent, mff)
+    assert report['matched'] == 2
+    assert report['unmatched_recorded'] == 1
+    assert report['mean'] == pytest.approx(0.0025, abs=1e-6)
+    assert report['jitter'] == pytest.approx(0.0005, abs=1e-6)
+    assert report['min'] == pytest.approx(0.002, abs=1e-6)
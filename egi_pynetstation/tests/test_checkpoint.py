@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import pytest
+from egi_pynetstation.NetStation import NetStation
+from egi_pynetstation.checkpoint import save_checkpoint, load_checkpoint
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'session.ckpt')
+    save_checkpoint(path, {'seq': 3})
+    save_checkpoint(path, {'seq': 4})
+    assert load_checkpoint(path) == {'seq': 4}
+    assert [p.name for p in tmp_path.iterdir()] == ['session.ckpt']
+    with open(path, 'w') as f:
+        json.dump({'seq': 4, 'version': 0}, f)
+    with pytest.raises(ValueError):
+        load_checkpoint(path)
+
+
+def test_resume_ntp(tmp_path):
+    path = str(tmp_path / 'session.ckpt')
+    ns = NetStation('localhost', 0, endian='UNIX', backend='memory')
+    ns.connect()
+    ns.set_checkpoint(path)
+    ns.set_error_budget(0.001)
+    ns.begin_rec()
+    ns.send_event(event_type='STIM')
+    ns.resync()
+    sync, start = ns._sync, ns.rec_start()
+    # The script crashes without ending the recording or disconnecting
+    resumed = NetStation.resume(path)
+    assert bytes(resumed.memory_log().commands) == b'QANB'
+    assert resumed._endian == 'UNIX'
+    assert resumed._sync == sync
+    assert resumed.rec_start() == start
+    assert resumed._seq == 1 + NetStation.checkpoint_seq_block
+    assert resumed._drift.samples() == ns._drift.samples()
+    assert resumed.sync_report()['syncs'] == 2
+    assert resumed.sync_report()['error_budget'] == 0.001
+    resumed.send_event(event_type='STIM')
+    resumed.end_rec()
+    assert load_checkpoint(path)['recording_start'] is None
+
+
+def test_resume_simple_clock(tmp_path):
+    path = str(tmp_path / 'session.ckpt')
+    ns = NetStation('localhost', 0, backend='memory')
+    ns.connect(clock='simple')
+    ns.begin_rec()
+    ns.set_checkpoint(path)
+    ns.end_rec()
+    resumed = NetStation.resume(path, resync=True)
+    assert bytes(resumed.memory_log().commands) == b'QAT'
+    assert resumed._mstime == ns._mstime
+    sync = resumed._sync
+    assert sync.clock_ms == round((sync.epoch - ns._mstime) * 1000)
+    assert resumed.rec_start() is None
+
+
+def test_seq_never_reused(tmp_path, monkeypatch):
+    monkeypatch.setattr(NetStation, 'checkpoint_seq_block', 4)
+    path = str(tmp_path / 'session.ckpt')
+    ns = NetStation('localhost', 0, backend='memory', record=True)
+    ns.connect(fast=True)
+    ns.set_checkpoint(path)
+    for _ in range(6):
+        ns.send_event(event_type='STIM')
+    for _ in range(3):
+        ns.queue_event(event_type='BULK')
+    ns.flush()
+    # Saved when the first block ran out, and again after the batch
+    assert load_checkpoint(path)['seq'] == 13
+    resumed = NetStation.resume(path, record=True)
+    resumed.send_event(event_type='STIM')
+    assert resumed.history()[0].seq == 13
+    assert max(r.seq for r in ns.history()) == 8
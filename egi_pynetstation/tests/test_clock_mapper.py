@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import pytest
+from egi_pynetstation.NetStation import NetStation
+from egi_pynetstation.clocks import ClockMapper
+from egi_pynetstation.exceptions import NetStationUnsynced
+
+
+class FakeClock():
+    """A clock running a fixed offset behind time.time()"""
+    def __init__(self, offset: float) -> None:
+        self.offset = offset
+
+    def __call__(self) -> float:
+        return time.time() - self.offset
+
+
+# Exception Testing
+def test_unregistered_clock():
+    with pytest.raises(KeyError):
+        ClockMapper().to_time(1.0, 'lsl')
+
+
+def test_to_start_before_sync():
+    ns = NetStation('localhost', 0, backend='memory')
+    with pytest.raises(NetStationUnsynced):
+        ns.to_start(time.perf_counter())
+    ns.connect(clock='simple')
+    with pytest.raises(NetStationUnsynced):
+        ns.to_start(time.perf_counter())
+
+
+# Correct functioning testing
+def test_to_start_after_sync():
+    ns = NetStation('localhost', 0, backend='memory')
+    ns.connect(clock='simple', fast=True)
+    ns.register_clock('lsl', FakeClock(1000.0))
+    now = time.time()
+    start = now - ns._sync.epoch
+    assert ns.to_start(time.perf_counter()) == pytest.approx(start, abs=1e-3)
+    assert ns.to_start(now - 1000.0, 'lsl') == pytest.approx(start, abs=1e-3)
+
+
+def test_register_during_capture():
+    m = ClockMapper()
+
+    def registering_clock():
+        # Registers a new clock on every reading
+        m.register(f'late{len(m.clocks)}', time.monotonic)
+        return time.time()
+
+    m.register('first', registering_clock)
+    m.capture()
+    assert len(m.clocks) == 5
+
+
+def test_scalar_conversion():
+    m = ClockMapper()
+    m.register('lsl', FakeClock(1000.0))
+    assert m.to_time(5.0, 'lsl') == pytest.approx(1005.0, abs=1e-4)
+    now = time.time()
+    assert m.to_time(time.perf_counter()) == pytest.approx(now, abs=1e-3)
+
+
+def test_vectorized_conversion():
+    np = pytest.importorskip('numpy')
+    m = ClockMapper()
+    m.register('lsl', FakeClock(1000.0))
+    times = np.arange(10000, dtype=float)
+    converted = m.to_time(times, 'lsl')
+    assert converted.shape == times.shape
+    assert np.allclose(converted - times, 1000.0, atol=1e-4)
+    assert m.to_time([1.0, 2.0], 'lsl') == pytest.approx(
+        [1001.0, 1002.0], abs=1e-4
+    )
+
+
+def test_capture_refreshes_pairs():
+    m = ClockMapper()
+    clock = FakeClock(10.0)
+    m.register('stim', clock)
+    clock.offset = 20.0
+    m.capture()
+    assert m.to_time(0.0, 'stim') == pytest.approx(20.0, abs=1e-4)
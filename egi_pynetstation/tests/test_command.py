@@ -4,7 +4,7 @@
 import struct
 import pytest
 from egi_pynetstation.exceptions import *
-from egi_pynetstation.eci import build_command
+from egi_pynetstation.eci import build_command, build_command_buffers
 from egi_pynetstation.util import sys_to_bytes
 
 
@@ -66,3 +66,16 @@ def test_cmd_ntp():
     val_2 = struct.unpack("<L", part_2)[0]
     assert val_1 == 1
     assert val_2 == 1
+
+
+def test_cmd_buffers_event_data():
+    block = bytearray(b'block')
+    test = build_command_buffers('EventData', [b'\x05\x00', block, b''])
+    assert test[0] == b'D'
+    assert test[2] is block
+    assert b''.join(test) == build_command('EventData', b'\x05\x00block')
+
+
+def test_cmd_buffers_raises_for_nonbyte_data():
+    with pytest.raises(ECIDataNotBytes):
+        _ = build_command_buffers('EventData', [b'ok', 'cat'])
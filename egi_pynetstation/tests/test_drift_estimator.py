@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+from egi_pynetstation.sync import SyncState, DriftEstimator, SyncPolicy
+
+
+def test_default_drift_until_measured():
+    d = DriftEstimator(default_drift=1e-5)
+    d.add(SyncState(100.0, 0.5))
+    assert d.drift() == 1e-5
+    assert d.error_at(110.0, SyncState(100.0, 0.5)) == pytest.approx(1e-4)
+
+
+def test_fits_drift():
+    d = DriftEstimator()
+    # Offset grows by 50 us every 10 s: 5 ppm
+    for i in range(5):
+        d.add(SyncState(10.0 * i, 0.001 + 50e-6 * i))
+    assert d.drift() == pytest.approx(5e-6)
+    assert d.error_at(60.0, SyncState(40.0, 0.0)) == pytest.approx(1e-4)
+
+
+def test_history_is_bounded():
+    d = DriftEstimator(history=2)
+    d.add(SyncState(0.0, 0.0))
+    d.add(SyncState(1.0, 1.0))
+    d.add(SyncState(2.0, 1.0))
+    assert d.drift() == 0.0
+
+
+def test_policy_age_and_error():
+    d = DriftEstimator(default_drift=1e-4)
+    sync = SyncState(100.0, 0.0)
+    policy = SyncPolicy(max_age=10.0, max_error=0.0005)
+    assert not policy.is_fresh(None, 100.0, d)
+    # 1 s of 100 ppm drift: 0.1 ms
+    assert policy.is_fresh(sync, 101.0, d)
+    # 5 s of drift exceeds the error tolerance before the maximum age
+    assert not policy.is_fresh(sync, 105.0, d)
+    assert not SyncPolicy(max_age=0.0).is_fresh(sync, 100.0, d)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+from egi_pynetstation.eci import (
+    EncodingCache, _encode_label, _encode_text_pair, encoding_cache,
+    package_event
+)
+
+
+# Exception Testing
+def test_invalid_strings_not_cached():
+    cache = EncodingCache()
+    with pytest.raises(TypeError):
+        cache.encode(_encode_label, ' ' * 257)
+    with pytest.raises(TypeError) as e:
+        cache.encode(_encode_label, ['not', 'hashable'])
+    assert 'Event label should be str' in str(e.value)
+    assert cache.info()['entries'] == 0
+
+
+# Correct functioning testing
+def test_hits_and_misses():
+    cache = EncodingCache()
+    first = cache.encode(_encode_label, 'label')
+    second = cache.encode(_encode_label, 'label')
+    assert first == second == b'\x05label'
+    # Different encoders are different entries
+    pair = cache.encode(_encode_text_pair, ('labl', 'label'))
+    assert pair == b'lablTEXT\x05\x00label'
+
+    info = cache.info()
+    assert info['hits'] == 1
+    assert info['misses'] == 2
+    assert info['entries'] == 2
+
+
+def test_bounded_lru():
+    # Each entry costs len(b'\x03abc') == 4 bytes
+    cache = EncodingCache(maxsize=8)
+    cache.encode(_encode_label, 'aaa')
+    cache.encode(_encode_label, 'bbb')
+    # Touch 'aaa' so that 'bbb' is least recently used
+    cache.encode(_encode_label, 'aaa')
+    cache.encode(_encode_label, 'ccc')
+
+    info = cache.info()
+    assert info['evictions'] == 1
+    assert info['size'] <= 8
+    cache.encode(_encode_label, 'aaa')
+    assert cache.hits == 2
+
+    cache.maxsize = 0
+    assert cache.info()['entries'] == 0
+
+
+def test_event_strings_cached_separately():
+    maxsize = encoding_cache.maxsize
+    encoding_cache.clear()
+    try:
+        for i in range(10):
+            package_event(
+                0.0, 0.001, 'STIM', f'trial {i}', 'face', {}
+            )
+        info = encoding_cache.info()
+        # The type and description are shared; only the labels vary
+        assert info['entries'] == 12
+        assert info['hits'] == 18
+    finally:
+        encoding_cache.maxsize = maxsize
+        encoding_cache.clear()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+from egi_pynetstation.NetStation import NetStation
+from egi_pynetstation.export import export_events
+from egi_pynetstation.history import (
+    EventHistory, EventRecord, ACKED, UNACKED
+)
+
+records = [
+    EventRecord(
+        i, 0.5 * i, 0.001, 'STIM' if i % 2 else 'RESP', 'label', 'desc',
+        {'cond': 'left', 'rt  ': 0.25 * i, 'n   ': i, 'ok  ': True},
+        1000.0 + 0.5 * i, 0.0002, 0.01 * (i // 3), 1000.0,
+        None if i % 3 else 1000.25,
+    )
+    for i in range(6)
+]
+
+
+def test_round_trip():
+    history = EventHistory()
+    for record in records:
+        history.append(record)
+    assert len(history) == 6
+    assert list(history) == records
+    assert history[-1] == records[-1]
+    assert history[1:3] == records[1:3]
+    assert history.event_types() == ['RESP', 'STIM']
+    assert history.of_type('STIM') == [1, 3, 5]
+    assert history.of_type('NONE') == []
+    assert list(history.column('status')) == [ACKED] * 6
+    with pytest.raises(KeyError):
+        history.column('label')
+
+
+def test_between():
+    history = EventHistory()
+    for record in records:
+        history.append(record)
+    assert history.between(1000.5, 1002.0) == [1, 2, 3]
+    # Out of order stamps fall back to a scan
+    history.append(records[0]._replace(seq=6, stamp_time=1001.0))
+    assert history.between(1000.5, 1002.0) == [1, 2, 3, 6]
+
+
+def test_netstation_history(tmp_path):
+    np = pytest.importorskip('numpy')
+    ns = NetStation('localhost', 0, backend='memory', record=True)
+    ns.connect(clock='simple', fast=True)
+    ns.send_event(event_type='STIM', label='face', data={'cond': 'A'})
+    ns.queue_event(event_type='BULK', data={'n   ': 7})
+    ns.flush()
+    ns.set_latency_slo(0.01, 'fire_and_forget', window=1)
+    ns._watchdog.observe(1.0)
+    ns.send_event(event_type='STIM')
+    history = ns.history()
+    assert [r.event_type for r in history] == ['STIM', 'BULK', 'STIM']
+    assert history[0].label == 'face' and history[0].data == {'cond': 'A'}
+    assert history[1].data == {'n   ': 7}
+    assert list(history.column('status')) == [ACKED, ACKED, UNACKED]
+    assert history[2].status == UNACKED
+    # Memory per event stays far below a record with its data dictionary
+    assert history.nbytes() < 150 * len(history)
+    path = str(tmp_path / 'events.npz')
+    export_events(history, path)
+    with np.load(path) as f:
+        assert list(f['seq']) == [0, 1, 2]
+        assert list(f['event_type']) == ['STIM', 'BULK', 'STIM']
+        assert list(f['status']) == [ACKED, ACKED, UNACKED]
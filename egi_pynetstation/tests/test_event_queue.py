@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from egi_pynetstation.event_queue import EventQueue
+
+
+def test_high_priority_jumps_bulk():
+    q = EventQueue(max_batch=2)
+    for i in range(3):
+        q.put([b'bulk%d' % i], 'bulk')
+    q.put([b'high'], 'high')
+
+    priority, batch = q.take_batch()
+    assert priority == 'high'
+    assert [e.buffers for e in batch] == [[b'high']]
+
+    priority, batch = q.take_batch()
+    assert priority == 'bulk'
+    assert len(batch) == 2
+
+    # A late high-priority event goes before the remaining bulk event
+    q.put([b'late'], 'high')
+    priority, batch = q.take_batch()
+    assert priority == 'high'
+
+    priority, batch = q.take_batch()
+    assert priority == 'bulk'
+    assert [e.buffers for e in batch] == [[b'bulk2']]
+
+    assert q.take_batch() == (None, [])
+
+
+def test_stats_per_lane():
+    q = EventQueue()
+    q.put([b'high'], 'high')
+    q.put([b'bulk'], 'bulk')
+    priority, batch = q.take_batch()
+    q.record_sent(priority, batch)
+
+    stats = q.stats()
+    assert stats['high']['sent'] == 1
+    assert stats['high']['mean_wait'] >= 0
+    assert stats['bulk']['sent'] == 0
+    assert stats['bulk']['pending'] == 1
+    assert stats['bulk']['mean_wait'] is None
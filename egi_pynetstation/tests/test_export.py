@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import pytest
+from egi_pynetstation.export import export_events
+from egi_pynetstation.history import EventRecord
+
+records = [
+    EventRecord(
+        i, 0.5 * i, 0.001, 'STIM', 'label', 'desc',
+        {'cond': 'left', 'rt  ': 0.25 * i} if i % 2 else {'cond': 'right'},
+        1000.0 + 0.5 * i, 0.0002, 0.01, 1000.0,
+    )
+    for i in range(5)
+]
+
+
+# Exception Testing
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        export_events(records, str(tmp_path / 'events.csv'))
+
+
+# Correct functioning testing
+def test_npz_json_data(tmp_path):
+    np = pytest.importorskip('numpy')
+    path = str(tmp_path / 'events.npz')
+    export_events(records, path, chunk_size=2)
+    with np.load(path) as f:
+        assert f['seq'].dtype == np.int64
+        assert list(f['seq']) == [0, 1, 2, 3, 4]
+        assert f['start'][4] == 2.0
+        assert list(f['event_type']) == ['STIM'] * 5
+        assert json.loads(f['data'][1]) == {'cond': 'left', 'rt  ': 0.25}
+        assert list(f['status']) == [0] * 5
+        assert np.isnan(f['intended']).all()
+
+
+def test_npz_typed_data(tmp_path):
+    np = pytest.importorskip('numpy')
+    path = str(tmp_path / 'events.npz')
+    export_events(
+        records, path, chunk_size=2, data_keys={'cond': str, 'rt  ': float}
+    )
+    with np.load(path) as f:
+        assert list(f['data_cond']) == ['right', 'left'] * 2 + ['right']
+        rt = f['data_rt  ']
+        assert np.isnan(rt[0])
+        assert rt[3] == 0.75
+
+
+def test_parquet_typed_data(tmp_path):
+    pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    path = str(tmp_path / 'events.parquet')
+    export_events(
+        records, path, chunk_size=2, data_keys={'rt  ': float}
+    )
+    f = pq.ParquetFile(path)
+    assert f.metadata.num_row_groups == 3
+    table = f.read()
+    assert table.column('seq').to_pylist() == [0, 1, 2, 3, 4]
+    assert table.column('data_rt  ').to_pylist()[:2] == [None, 0.25]
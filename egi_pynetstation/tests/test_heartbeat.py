@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from egi_pynetstation.NetStation import NetStation
+from egi_pynetstation.heartbeat import (
+    ConnectionHealth, Heartbeat, UNKNOWN, HEALTHY, DEAD
+)
+
+
+def wait_for(condition, timeout: float = 1.0) -> bool:
+    end = time.perf_counter() + timeout
+    while time.perf_counter() < end:
+        if condition():
+            return True
+        time.sleep(0.001)
+    return False
+
+
+def test_health_transitions():
+    h = ConnectionHealth()
+    assert h.state == UNKNOWN
+    h.mark_healthy()
+    assert h.report()['state'] == HEALTHY
+    error = OSError()
+    h.mark_dead(error)
+    assert h.report()['state'] == DEAD
+    assert h.report()['error'] is error
+    h.mark_healthy()
+    assert h.error is None
+
+
+def test_beats_only_when_sent():
+    h = ConnectionHealth()
+    sent = iter([False, True, True])
+    hb = Heartbeat(lambda idle: next(sent, False), h, interval=0.001)
+    hb.start()
+    assert wait_for(lambda: h.beats == 2)
+    hb.stop()
+    assert not hb.is_alive()
+    assert h.state == HEALTHY
+
+
+def test_failed_beat_then_revive():
+    h = ConnectionHealth()
+    revived = []
+
+    def beat(idle):
+        raise ConnectionResetError()
+
+    hb = Heartbeat(beat, h, interval=0.001, revive=lambda: revived.append(1))
+    hb.start()
+    assert wait_for(lambda: revived)
+    hb.stop()
+    assert h.state == DEAD
+    assert isinstance(h.error, ConnectionResetError)
+
+
+def test_start_heartbeat():
+    ns = NetStation('localhost', 0, backend='memory')
+    ns.connect(fast=True)
+    ns.start_heartbeat(interval=0.001)
+    assert wait_for(lambda: ns.health()['beats'] >= 2)
+    ns.stop_heartbeat()
+    assert ns._heartbeat is None
+    assert ns.health()['state'] == HEALTHY
+    commands = bytes(ns.memory_log().commands)
+    assert commands.startswith(b'QAN')
+    assert commands[3:] == b'A' * (len(commands) - 3)
+    assert len(commands) >= 5
+
+
+def test_beat_skipped_while_locked():
+    ns = NetStation('localhost', 0, backend='memory')
+    ns.connect(fast=True)
+    log = ns.memory_log()
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with ns._eci_lock:
+            held.set()
+            release.wait(1)
+
+    t = threading.Thread(target=hold)
+    t.start()
+    held.wait(1)
+    try:
+        assert not ns._beat(0)
+    finally:
+        release.set()
+        t.join()
+    assert bytes(log.commands) == b'QAN'
+    assert ns._beat(0)
+    assert bytes(log.commands) == b'QANA'
+
+
+def test_beat_skipped_unless_idle():
+    ns = NetStation('localhost', 0, backend='memory')
+    ns.connect(fast=True)
+    ns.send_event(event_type='STIM')
+    assert not ns._beat(60)
+    assert bytes(ns.memory_log().commands) == b'QAND'
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import pytest
+from egi_pynetstation.NetStation import NetStation
+from egi_pynetstation.eci import package_event_buffers
+from egi_pynetstation.exceptions import (
+    NetStationConnectionLost, NetStationIllegalArgument
+)
+from egi_pynetstation.memory import MemorySocket
+
+
+def test_dry_run_session():
+    with NetStation.session('localhost', 0, backend='memory') as ns:
+        ns.send_event(
+            event_type='STIM', label='face', start=1.25,
+            data={'cond': 'A', 'rt  ': 0.5, 'n   ': 3, 'ok  ': True}
+        )
+        for _ in range(3):
+            ns.queue_event(event_type='BULK')
+        ns.flush()
+    log = ns.memory_log()
+    assert bytes(log.commands) == b'QAANBDDDDEX'
+    assert log.event_types() == ['STIM', 'BULK', 'BULK', 'BULK']
+    assert log.count('BULK') == 3
+    assert log.find('STIM', 'face') == [0]
+    assert log.find(label='none') == []
+    event = log.event(0)
+    assert event['start'] == 1.25
+    assert event['label'] == 'face'
+    assert event['data'] == {'cond': 'A', 'rt  ': 0.5, 'n   ': 3, 'ok  ': True}
+    assert log.starts('STIM') == [1.25]
+
+
+def test_dry_run_validates():
+    ns = NetStation('localhost', 0, backend='memory')
+    ns.connect(clock='simple', fast=True)
+    with pytest.raises(TypeError):
+        ns.send_event(event_type='TOOLONG')
+    assert len(ns.memory_log()) == 0
+
+
+def test_memory_socket_frames_partial_writes():
+    s = MemorySocket('localhost', 0)
+    s.connect()
+    s.write(b'Q')
+    assert s.read() == b''
+    s.write([b'NTEL', b'S', b'12345678'])
+    assert s.read() == b'I\x04S12345678'
+    s.disconnect()
+    with pytest.raises(ConnectionResetError):
+        s.write(b'A')
+
+
+def test_bad_backend():
+    with pytest.raises(NetStationIllegalArgument):
+        NetStation('localhost', 0, backend='udp')
+    with pytest.raises(NetStationIllegalArgument):
+        NetStation('localhost', 0).memory_log()
+
+
+def test_background_resync():
+    ns = NetStation('localhost', 0, backend='memory', record=True)
+    ns.connect(fast=True)
+    first = ns._sync
+    worker = ns.resync(background=True)
+    ns.wait_resync()
+    assert not worker.is_alive()
+    assert ns._sync is not first
+    assert ns.sync_report()['syncs'] == 2
+    ns.send_event(event_type='STIM')
+    record = ns.history()[0]
+    assert record.sync_epoch == ns._sync.epoch
+    assert bytes(ns.memory_log().commands) == b'QANND'
+
+
+def test_stamp_against_sync_at_write():
+    ns = NetStation('localhost', 0, backend='memory', record=True)
+    ns.connect(fast=True)
+    old = ns._sync
+    buffers = package_event_buffers(2.0, 0.001, 'STIM', ' ', ' ', {})
+    # A sync is published between packing and writing
+    ns._clock_sync(0.0)
+    new = ns._sync
+    (start, sync, _) = ns._command('EventData', buffers, stamp=(2.0, old))
+    assert sync is new
+    assert start == pytest.approx(2.0 + old.epoch - new.epoch)
+    assert ns.memory_log().starts('STIM') == [int(start * 1000) / 1000]
+
+
+def test_background_resync_error():
+    ns = NetStation('localhost', 0, backend='memory')
+    ns.connect(fast=True)
+
+    def fail(idle=False):
+        raise OSError('no route to NTP server')
+
+    ns._ntp_offset = fail
+    ns.resync(background=True).join()
+    with pytest.raises(OSError):
+        ns.wait_resync()
+    # Raised once only
+    ns.wait_resync()
+    ns.resync(background=True).join()
+    with pytest.raises(OSError):
+        ns.resync()
+
+
+def test_error_budget_resync():
+    ns = NetStation('localhost', 0, backend='memory', record=True)
+    ns.connect(fast=True)
+    first = ns._sync
+    # Any drift since the sync exceeds the budget
+    ns.set_error_budget(1e-12)
+    ns.send_event(event_type='STIM')
+    ns.wait_resync()
+    report = ns.sync_report()
+    assert report['syncs'] == 2
+    assert report['worst_error'] > 0
+    assert ns.history()[0].sync_epoch == first.epoch
+    second = ns._sync
+    assert second.epoch > first.epoch
+    ns.send_event(event_type='STIM')
+    ns.wait_resync()
+    record = ns.history()[1]
+    assert record.sync_epoch == second.epoch
+    assert record.start == pytest.approx(record.stamp_time - second.epoch)
+    assert ns.memory_log().starts('STIM')[1] == int(record.start * 1000) / 1000
+
+
+def test_begin_rec_reuses_fresh_sync():
+    ns = NetStation('localhost', 0, backend='memory')
+    ns.connect(fast=True)
+    log = ns.memory_log()
+    first = ns._sync
+    assert ns.begin_rec()
+    assert bytes(log.commands) == b'QANB'
+    assert ns._sync is first
+    assert ns.sync_report()['skipped_syncs'] == 1
+    # A zero maximum age makes every sync stale
+    ns.set_sync_policy(max_age=0)
+    assert not ns.begin_rec()
+    assert bytes(log.commands) == b'QANBANB'
+    assert ns._sync.epoch > first.epoch
+    report = ns.sync_report()
+    assert report['syncs'] == 2
+    assert report['skipped_syncs'] == 1
+
+
+def test_begin_rec_resyncs_at_budget_margin():
+    ns = NetStation('localhost', 0, backend='memory')
+    ns.connect(fast=True)
+    assert ns.begin_rec()
+    # Any drift since the sync reaches the margin of this budget
+    ns.set_error_budget(1e-12)
+    assert not ns.begin_rec()
+    assert bytes(ns.memory_log().commands) == b'QANBANB'
+    report = ns.sync_report()
+    assert report['syncs'] == 2
+    assert report['skipped_syncs'] == 1
+
+
+def test_queued_events_stamped_at_flush():
+    ns = NetStation('localhost', 0, backend='memory', record=True)
+    ns.connect(fast=True)
+    old = ns._sync
+    ns.queue_event(start=5.0, event_type='BULK')
+    ns._clock_sync(0.0)
+    new = ns._sync
+    assert ns.flush() == 1
+    record = ns.history()[0]
+    assert record.sync_epoch == new.epoch
+    assert record.start == pytest.approx(5.0 + old.epoch - new.epoch)
+    assert record.stamp_time == pytest.approx(old.epoch + 5.0)
+    assert ns.memory_log().starts('BULK') == [int(record.start * 1000) / 1000]
+
+
+def test_read_timeout_drops_command():
+    ns = NetStation('localhost', 0, backend='memory')
+    ns.connect(clock='simple', fast=True)
+    read = ns._socket.read
+
+    def timeout():
+        raise TimeoutError('timed out')
+
+    ns._socket.read = timeout
+    with pytest.raises(TimeoutError):
+        ns.send_event(event_type='STIM')
+    # The late reply can never be taken for another command's
+    assert len(ns._protocol) == 0
+    assert ns.session_state() == 'closed'
+    assert ns.health()['state'] == 'dead'
+    with pytest.raises(NetStationConnectionLost) as e:
+        ns.send_event(event_type='STIM')
+    assert 'ensure_connected()' in e.value.message
+    ns._socket.read = read
+    assert ns.ensure_connected()
+    ns.send_event(event_type='STIM')
+    ns.disconnect()
+    assert bytes(ns.memory_log().commands) == b'QATDQATDX'
+
+
+def test_session_after_lost_connection():
+    with pytest.raises(TimeoutError):
+        with NetStation.session('localhost', 0, backend='memory') as ns:
+            def timeout():
+                raise TimeoutError('timed out')
+
+            ns._socket.read = timeout
+            ns.send_event(event_type='STIM')
+    # Cleanup closes the socket without sending EndRecording or Exit
+    assert not ns._connected
+    assert bytes(ns.memory_log().commands) == b'QAANBD'
+
+
+def test_reconnect_resumes_recording():
+    ns = NetStation('localhost', 0, backend='memory')
+    ns.connect()
+    ns.begin_rec()
+    read = ns._socket.read
+
+    def timeout():
+        raise TimeoutError('timed out')
+
+    ns._socket.read = timeout
+    with pytest.raises(TimeoutError):
+        ns.send_event(event_type='STIM')
+    ns._socket.read = read
+    ntp_offset = ns._ntp_offset
+    locked = []
+
+    def offset(idle=False):
+        locked.append(ns._eci_lock._is_owned())
+        return ntp_offset(idle)
+
+    ns._ntp_offset = offset
+    assert ns.ensure_connected()
+    assert locked == [False]
+    ns.send_event(event_type='STIM')
+    assert bytes(ns.memory_log().commands) == b'QAANBDQANBD'
+
+
+def test_transmit_stamp():
+    ns = NetStation('localhost', 0, backend='memory', record=True)
+    ns.connect(fast=True)
+    before = time.time()
+    ns.send_event(event_type='STIM', start='transmit')
+    (intended, actual) = ns.last_stamp()
+    assert before <= intended <= actual <= time.time()
+    start = actual - ns._sync.epoch
+    assert ns.memory_log().starts('STIM') == [int(start * 1000) / 1000]
+    ns.send_event(event_type='STIM', start=0.5)
+    assert ns.last_stamp() == (ns._sync.epoch + 0.5, ns._sync.epoch + 0.5)
+    ns.queue_event(event_type='BULK', start=0.75)
+    ns.flush()
+    # Both times are kept for every event
+    history = ns.history()
+    assert (history[0].intended, history[0].stamp_time) == (intended, actual)
+    assert history[1].intended == ns._sync.epoch + 0.5
+    assert history[2].intended == ns._sync.epoch + 0.75
+    assert list(history.column('intended')) == [
+        r.intended for r in history
+    ]
+
+
+def test_failed_automatic_resync():
+    ns = NetStation('localhost', 0, backend='memory', record=True)
+    ns.connect(fast=True)
+    ntp_offset = ns._ntp_offset
+
+    def fail(idle=False):
+        raise OSError('ntp timeout')
+
+    ns._ntp_offset = fail
+    ns.set_error_budget(1e-12)
+    for n in (1, 2):
+        # The failure never surfaces from the event that triggered it
+        ns.send_event(event_type='STIM')
+        ns._resync_thread.join()
+        assert ns.sync_report()['failed_resyncs'] == n
+    ns.send_event(event_type='STIM')
+    assert ns.memory_log().count('STIM') == 3
+    assert len(ns.history()) == 3
+    # Retried on a later event once NTP is back
+    ns._ntp_offset = ntp_offset
+    ns._resync_thread.join()
+    ns.send_event(event_type='STIM')
+    ns._resync_thread.join()
+    assert ns.sync_report()['syncs'] == 2
+    with pytest.raises(OSError):
+        ns.wait_resync()
+    ns.resync()
+
+
+def test_threaded_history():
+    ns = NetStation('localhost', 0, backend='memory', record=True)
+    ns.connect(clock='simple', fast=True)
+
+    def send(event_type, duration):
+        for _ in range(2000):
+            ns.send_event(
+                event_type=event_type, label=event_type.lower(),
+                duration=duration
+            )
+
+    threads = [
+        threading.Thread(target=send, args=('AAAA', 0.002)),
+        threading.Thread(target=send, args=('BBBB', 0.003)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    history = ns.history()
+    assert len(history) == 4000
+    assert sorted(r.seq for r in history) == list(range(4000))
+    for record in history:
+        duration = 0.002 if record.event_type == 'AAAA' else 0.003
+        assert record.label == record.event_type.lower()
+        assert record.duration == duration
+    assert len(history.of_type('AAAA')) == 2000
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+from egi_pynetstation.exceptions import *
+from egi_pynetstation.util import (
+    get_ntp_byte, get_ntp_float, get_ntp_records, get_ntp_floats, ntp_res
+)
+
+floats = [0.0, 1 + ntp_res, 0.5, 3912345678.123456, 2**32 - 1e-6]
+
+
+def test_records_match_scalar():
+    pytest.importorskip('numpy')
+    records = get_ntp_records(floats)
+    assert records.tobytes() == b''.join(get_ntp_byte(x) for x in floats)
+    ints = [0, 1, 2**32 - 1]
+    expected = b''.join(get_ntp_byte(x) for x in ints)
+    assert get_ntp_records(ints).tobytes() == expected
+
+
+def test_floats_match_scalar():
+    pytest.importorskip('numpy')
+    buffer = b''.join(get_ntp_byte(x) for x in floats)
+    expected = [get_ntp_float(buffer[i:i + 8]) for i in range(0, 40, 8)]
+    assert get_ntp_floats(buffer).tolist() == expected
+    assert get_ntp_floats(get_ntp_records(floats)).tolist() == expected
+
+
+def test_invalid():
+    pytest.importorskip('numpy')
+    with pytest.raises(OverflowError):
+        get_ntp_records([-1.0])
+    with pytest.raises(OverflowError):
+        get_ntp_records([2**32])
+    with pytest.raises(NTPInvalidType):
+        get_ntp_records(['cat'])
+    with pytest.raises(NTPInvalidByte):
+        get_ntp_floats(b'\0' * 12)
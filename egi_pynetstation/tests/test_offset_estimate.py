@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+from egi_pynetstation.NetStation import NetStation
+from egi_pynetstation.sync import (
+    OffsetEstimate, estimate_offset, combine_offsets
+)
+
+
+def test_fastest_round_trips_win():
+    offset = 0.25
+    samples = [
+        # Symmetric 2 ms round trips
+        (10.0, 10.002, 10.001 + offset),
+        (11.0, 11.002, 11.001 + offset),
+        # Delayed on the way back, which would skew the offset
+        (12.0, 12.050, 12.001 + offset),
+        (13.0, 13.040, 13.001 + offset),
+    ]
+    estimate = estimate_offset(samples, keep=0.5)
+    assert estimate.offset == pytest.approx(offset)
+    assert estimate.rtt == pytest.approx(0.002)
+    assert estimate.error == pytest.approx(0.001)
+    assert estimate.samples == 4
+    with pytest.raises(ValueError):
+        estimate_offset([])
+
+
+def test_combine_weights_by_error():
+    eci = OffsetEstimate(0.010, 0.001, 0.002, 8)
+    ntp = OffsetEstimate(0.020, 0.002, 0.004, 1)
+    combined = combine_offsets(eci, ntp)
+    assert combined.offset == pytest.approx(0.012)
+    assert combined.error < eci.error
+    assert combined.samples == 9
+    exact = OffsetEstimate(0.0, 0.0, 0.0, 1)
+    assert combine_offsets(eci, exact) is exact
+
+
+def test_eci_clock():
+    ns = NetStation('localhost', 0, backend='memory')
+    ns.connect(clock='eci', ntp_ip=None)
+    ns.begin_rec()
+    commands = bytes(ns.memory_log().commands)
+    assert commands == b'QAA' + b'S' * NetStation.eci_samples + b'NB'
+    # The memory backend echoes the time sent, so the offset is about 0
+    assert abs(ns._sync.offset) < 0.01
+    report = ns.compare_offsets(samples=3)
+    assert report['eci'].samples == 3
+    assert abs(report['difference']) < 0.01
+    assert report['combined'] == report['ntp']
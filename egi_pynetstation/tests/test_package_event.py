@@ -4,7 +4,9 @@
 from struct import pack
 import pytest
 
-from egi_pynetstation.eci import package_event
+from egi_pynetstation.eci import (
+    package_event, stamp_event, EVENT_START_OFFSET
+)
 
 valid_start = 1.0
 valid_duration = 0.001
@@ -238,3 +240,44 @@ def test_check_valid_output():
     )
 
     assert result == expected
+
+
+def test_stamp_event():
+    placeholder = package_event(
+        0,
+        valid_duration,
+        valid_type,
+        valid_label,
+        valid_description,
+        valid_data
+    )
+    expected = package_event(
+        valid_start,
+        valid_duration,
+        valid_type,
+        valid_label,
+        valid_description,
+        valid_data
+    )
+    # Stamp the datagram as it sits behind the command byte
+    buffer = bytearray(b'D' + placeholder)
+    stamp_event(buffer, EVENT_START_OFFSET + 1, valid_start)
+    assert bytes(buffer) == b'D' + expected
+
+
+def test_start_wraps_clock():
+    """Ensure starts relative to the simple clock wrap at 32 bits"""
+    result = package_event(
+        valid_start,
+        valid_duration,
+        valid_type,
+        valid_label,
+        valid_description,
+        valid_data,
+        2**32 - 500,
+    )
+    assert result[EVENT_START_OFFSET:EVENT_START_OFFSET + 4] == pack('I', 500)
+
+    buffer = bytearray(result)
+    stamp_event(buffer, EVENT_START_OFFSET, 0.25, 2**32 - 1)
+    assert buffer[EVENT_START_OFFSET:EVENT_START_OFFSET + 4] == pack('I', 249)
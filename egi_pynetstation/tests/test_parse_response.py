@@ -68,3 +68,24 @@ def test_parse_gets_NTP():
 
     test = parse_response(id_byte + valid_ntp)
     assert test == correct_ntp
+
+
+def test_parse_gets_trailing_NTP():
+    test = parse_response(valid_ntp + b'Z')
+    assert test == correct_ntp
+
+
+def test_parse_accepts_memoryview():
+    buffer = bytearray(b'Z' + b'I' + sys_to_bytes(2, 1) + valid_ntp)
+    view = memoryview(buffer)
+    assert parse_response(view[0:1]) is True
+    assert parse_response(view[1:3]) == 2
+    assert parse_response(view[3:]) == correct_ntp
+
+    with pytest.raises(ECIFailure):
+        _ = parse_response(memoryview(b'F'))
+
+
+def test_parse_empty():
+    with pytest.raises(InvalidECIResponse):
+        _ = parse_response(b'')
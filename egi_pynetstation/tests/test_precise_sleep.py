@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+from egi_pynetstation.util import PrecisionSleeper, wait_until
+
+
+def test_never_wakes_early():
+    s = PrecisionSleeper()
+    for _ in range(5):
+        deadline = time.perf_counter() + 0.003
+        error = s.sleep_until(deadline)
+        assert error >= 0
+        assert time.perf_counter() >= deadline
+
+
+def test_margin_adapts_within_bounds():
+    s = PrecisionSleeper(margin=0.001, min_margin=0.0005, max_margin=0.002)
+    s._adapt(0.0)
+    assert s.margin >= 0.0005
+    s._adapt(0.5)
+    assert s.margin == 0.002
+
+
+def test_wait_until_other_clock():
+    deadline = time.time() + 0.005
+    wait_until(deadline, clock=time.time)
+    # time.time may step slightly relative to perf_counter; allow 1 ms
+    assert time.time() >= deadline - 0.001
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import struct
+import pytest
+from egi_pynetstation.exceptions import *
+from egi_pynetstation.protocol import (
+    ECIProtocol, CLOSED, CONNECTED, QUERIED, ATTENTIVE, SYNCED, RECORDING
+)
+
+
+def connected() -> ECIProtocol:
+    p = ECIProtocol()
+    p.connection_made()
+    return p
+
+
+# Exception Testing
+def test_send_before_connect():
+    with pytest.raises(NetStationUnconnected):
+        ECIProtocol().send('Attention')
+
+
+def test_send_after_connection_lost():
+    p = connected()
+    p.connection_lost()
+    with pytest.raises(NetStationConnectionLost):
+        p.send('Attention')
+    with pytest.raises(NetStationConnectionLost):
+        p.expect('EventData', 2)
+    p.connection_made()
+    p.send('Attention')
+    assert not p.lost
+
+
+def test_failures_do_not_lose_later_replies():
+    p = connected()
+    p.send('Attention')
+    p.send('BeginRecording')
+    p.send('Attention')
+    replies = p.receive(b'ZRZ')
+    assert [r.error is None for r in replies] == [True, False, True]
+    assert isinstance(replies[1].error, ECINoRecordingDeviceFailure)
+    assert p.state == ATTENTIVE
+
+
+def test_unsolicited_bytes():
+    p = connected()
+    (reply,) = p.receive(b'Z')
+    assert reply.command is None
+    assert isinstance(reply.error, InvalidECIResponse)
+
+
+# Correct functioning testing
+def test_handshake_states():
+    p = connected()
+    assert p.state == CONNECTED
+    for cmd, data, response, state in (
+        ('Query', 'NTEL', b'I\x04', QUERIED),
+        ('Attention', None, b'Z', ATTENTIVE),
+        ('ClockSync', 5, b'Z', SYNCED),
+        ('BeginRecording', None, b'Z', RECORDING),
+        ('Attention', None, b'Z', RECORDING),
+        ('EndRecording', None, b'Z', SYNCED),
+        ('Exit', None, b'Z', CLOSED),
+    ):
+        p.send(cmd, data)
+        (reply,) = p.receive(response)
+        assert reply.command == cmd
+        assert p.state == state
+    assert p.identity == 4
+
+
+def test_framing_across_chunks():
+    p = connected()
+    p.send('Query', 'NTEL')
+    for _ in range(3):
+        p.send('EventData', b'')
+    assert p.receive(b'I') == []
+    replies = p.receive(b'\x04ZZ')
+    assert [r.value for r in replies] == [4, True, True]
+    assert len(p) == 1
+    assert len(p.receive(b'Z')) == 1
+    assert len(p) == 0
+
+
+def test_ntp_return_clock_layouts():
+    ntp = struct.pack('II', 100, 2**31)
+    p = connected()
+    p.send('NTPReturnClock', 1.0)
+    p.send('NTPReturnClock', 1.0)
+    replies = p.receive(b'S' + ntp + ntp)
+    assert [r.value for r in replies] == [100.5, 100.5]
+    # A late trailing 'Z' is discarded rather than reported as unsolicited
+    assert p.receive(b'Z') == []
+    p.send('NTPReturnClock', 1.0)
+    (reply,) = p.receive(ntp + b'Z')
+    assert reply.value == 100.5
+    assert p.receive(b'') == []
+
+
+def test_whole_replies():
+    p = connected()
+    p.send('Query', 'NTEL')
+    (reply,) = p.receive(b'I', whole=True)
+    assert reply.value is True
+    assert p.state == QUERIED
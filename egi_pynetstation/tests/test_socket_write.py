@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import socket
+import threading
+import time
+import pytest
+from egi_pynetstation.exceptions import *
+from egi_pynetstation.socket_wrapper import Socket
+
+
+class ShortWriteSocket():
+    """Stand-in socket which accepts at most a few bytes per call"""
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.received = b''
+
+    def send(self, data) -> int:
+        return self.sendmsg([data])
+
+    def sendmsg(self, buffers) -> int:
+        accepted = b''.join(buffers)[:self.limit]
+        self.received += accepted
+        return len(accepted)
+
+
+def make_socket(fake) -> Socket:
+    s = Socket('127.0.0.1', 0)
+    s._socket = fake
+    return s
+
+
+# Exception Testing
+def test_write_raises_when_nothing_sent():
+    s = make_socket(ShortWriteSocket(0))
+    with pytest.raises(SocketIncompleteTransmission):
+        s.write([b'D', b'abc'])
+
+
+# Correct functioning testing
+def test_write_retries_short_writes():
+    fake = ShortWriteSocket(3)
+    s = make_socket(fake)
+    buffers = [b'D', b'', bytearray(b'event block'), memoryview(b'keys')]
+    s.write(buffers)
+    assert fake.received == b'D' + b'event block' + b'keys'
+
+
+def test_write_single_buffer():
+    fake = ShortWriteSocket(2)
+    s = make_socket(fake)
+    s.write(b'QNTEL')
+    assert fake.received == b'QNTEL'
+
+
+@pytest.mark.skipif(
+    not hasattr(socket.socket, 'sendmsg'), reason='requires sendmsg'
+)
+def test_write_scatter_gather():
+    left, right = socket.socketpair()
+    frames = [bytes([i % 256]) * 1000 for i in range(2000)]
+    expected = b''.join(frames)
+    received = bytearray()
+
+    def reader():
+        while len(received) < len(expected):
+            received.extend(right.recv(65536))
+
+    t = threading.Thread(target=reader)
+    t.start()
+    s = make_socket(left)
+    s.write(frames)
+    t.join(5)
+    left.close()
+    right.close()
+    assert bytes(received) == expected
+
+
+def test_connect_socket_options():
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    s = Socket(*listener.getsockname())
+    s.connect()
+    conn, _ = listener.accept()
+    raw = s._socket
+    assert raw.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+    assert raw.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+    for option, value in (
+        ('TCP_KEEPIDLE', Socket.keepalive_idle),
+        ('TCP_KEEPINTVL', Socket.keepalive_interval),
+        ('TCP_KEEPCNT', Socket.keepalive_count),
+    ):
+        if hasattr(socket, option):
+            assert raw.getsockopt(
+                socket.IPPROTO_TCP, getattr(socket, option)
+            ) == value
+    s.disconnect()
+    conn.close()
+    listener.close()
+
+
+@pytest.mark.skipif(
+    not hasattr(socket, 'MSG_ERRQUEUE'), reason='requires SO_TIMESTAMPING'
+)
+def test_write_tx_timestamps():
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    s = Socket(*listener.getsockname(), tx_timestamps=True)
+    s.connect()
+    conn, _ = listener.accept()
+    before = time.time()
+    s.write([b'D', b'abc'])
+    first = s.last_tx_key
+    s.write(b'A')
+    assert (first, s.last_tx_key) == (3, 4)
+    assert conn.recv(16)
+    t = s.tx_time(first)
+    assert t is not None and before - 0.01 <= t <= time.time() + 0.01
+    assert s.tx_time() >= t
+    # Each timestamp is handed out once
+    assert s.tx_time(first) is None
+    # Asking for a write drops the timestamps of earlier ones
+    s.write(b'A')
+    s.write(b'A')
+    assert conn.recv(16)
+    assert s.tx_time() is not None
+    assert s._tx_times == {}
+    s.disconnect()
+    conn.close()
+    listener.close()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from egi_pynetstation.eci import package_event
+from egi_pynetstation.trace import Tracer, tracer, WRITE
+
+
+def test_disabled_records_nothing():
+    tracer.clear()
+    package_event(1.0, 0.001, 'abcd', 'label', 'desc', {})
+    assert tracer.dump() == []
+
+
+def test_package_event_spans():
+    tracer.enable()
+    try:
+        package_event(1.0, 0.001, 'abcd', 'label', 'desc', {})
+    finally:
+        tracer.disable()
+    spans = tracer.dump()
+    tracer.clear()
+    assert [s.stage for s in spans] == ['validate', 'pack']
+    assert spans[0].end_ns <= spans[1].start_ns
+    assert spans[1].info == (1000, 1)
+
+
+def test_ring_buffer_keeps_latest():
+    t = Tracer(size=3)
+    t.enable()
+    for i in range(5):
+        t.span(WRITE, i, i + 1, i)
+    assert [s.info for s in t.dump()] == [2, 3, 4]
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import math
+import time
+import pytest
+from egi_pynetstation.NetStation import NetStation
+from egi_pynetstation.watchdog import (
+    LatencyWatchdog, NORMAL, DROP_BULK, BATCH, FIRE_AND_FORGET
+)
+
+
+def dry_run(strategy: str, **kwargs) -> NetStation:
+    ns = NetStation('localhost', 0, backend='memory', record=True)
+    ns.connect(clock='simple', fast=True)
+    changes = []
+    ns.set_latency_slo(
+        0.01, strategy, window=5,
+        on_change=lambda mode, latency: changes.append(mode), **kwargs
+    )
+    # Slow acks trip the watchdog
+    for _ in range(5):
+        ns._watchdog.observe(0.1)
+    assert changes == [strategy]
+    ns.changes = changes
+    return ns
+
+
+def test_hysteresis():
+    changes = []
+    w = LatencyWatchdog(
+        0.01, window=4, quantile=1.0, recover=0.5, min_samples=2,
+        on_change=lambda mode, latency: changes.append((mode, latency))
+    )
+    assert w.observe(0.02) is None
+    assert w.observe(0.001) == DROP_BULK
+    assert w.degraded
+    for _ in range(3):
+        # Below the threshold, but not the recovery threshold
+        assert w.observe(0.008) is None
+    assert w.observe(0.008) is None
+    for _ in range(3):
+        w.observe(0.001)
+    assert w.observe(0.001) == NORMAL
+    assert changes == [(DROP_BULK, 0.02), (NORMAL, 0.001)]
+    report = w.report()
+    assert report['breaches'] == 1 and report['recoveries'] == 1
+    assert report['samples'] == 10
+    assert report['degraded_time'] > 0
+
+
+def test_bad_arguments():
+    with pytest.raises(ValueError):
+        LatencyWatchdog(0.01, strategy='panic')
+    with pytest.raises(ValueError):
+        LatencyWatchdog(0)
+
+
+def test_drop_bulk_then_recover():
+    ns = dry_run(DROP_BULK)
+    ns.queue_event(event_type='BULK')
+    ns.queue_event(event_type='HIGH', priority='high')
+    assert ns.flush() == 1
+    ns.send_event(event_type='STIM')
+    assert ns.latency_report()['dropped'] == 1
+    for _ in range(4):
+        # Fast dry-run acks push the slow ones out of the window
+        ns.send_event(event_type='STIM')
+    assert ns.changes == [DROP_BULK, NORMAL]
+    ns.queue_event(event_type='BULK')
+    assert ns.flush() == 1
+    assert ns.memory_log().count('BULK') == 1
+
+
+def test_batch():
+    ns = dry_run(BATCH, batch_size=3)
+    log = ns.memory_log()
+    ns.send_event(event_type='STIM')
+    ns.send_event(event_type='STIM', start='transmit')
+    assert len(log) == 0
+    ns.send_event(event_type='STIM')
+    assert len(log) == 3
+    ns.send_event(event_type='LAST')
+    ns.end_rec()
+    assert log.event_types() == ['STIM', 'STIM', 'STIM', 'LAST']
+    assert bytes(log.commands).endswith(b'DE')
+    assert ns.latency_report()['deferred'] == 4
+    assert [r.seq for r in ns.history()] == [0, 1, 2, 3]
+
+
+def test_batch_transmit_stamped_at_flush():
+    ns = dry_run(BATCH, batch_size=8)
+    ns.send_event(event_type='STIM', start='transmit')
+    assert ns.last_stamp() is None
+    time.sleep(0.01)
+    ns.flush()
+    record = ns.history()[0]
+    assert record.stamp_time - record.intended >= 0.01
+    assert ns.last_stamp() == (record.intended, record.stamp_time)
+    start = ns.memory_log().starts('STIM')[0]
+    assert start == int(record.start * 1000) / 1000
+    assert start >= 0.01
+
+def test_disconnect_sends_deferred():
+    ns = dry_run(BATCH, batch_size=8)
+    log = ns.memory_log()
+    ns.send_event(event_type='STIM')
+    ns.send_event(event_type='STIM')
+    assert len(log) == 0
+    ns.disconnect()
+    assert log.event_types() == ['STIM', 'STIM']
+    assert bytes(log.commands).endswith(b'DDX')
+    assert [r.seq for r in ns.history()] == [0, 1]
+
+
+def test_session_error_sends_deferred():
+    with pytest.raises(RuntimeError):
+        with NetStation.session('localhost', 0, backend='memory') as ns:
+            ns.set_latency_slo(0.01, BATCH, window=5, batch_size=8)
+            for _ in range(5):
+                ns._watchdog.observe(0.1)
+            ns.send_event(event_type='STIM')
+            raise RuntimeError('experiment failed')
+    log = ns.memory_log()
+    assert log.event_types() == ['STIM']
+    assert bytes(log.commands).endswith(b'DEX')
+
+
+def test_fire_and_forget_probes():
+    ns = dry_run(FIRE_AND_FORGET, probe_every=3)
+    for _ in range(6):
+        ns.send_event(event_type='STIM')
+    report = ns.latency_report()
+    assert report['unacked'] == 4
+    assert report['samples'] == 7
+    latencies = [r.ack_latency for r in ns.history()]
+    assert sum(math.isnan(x) for x in latencies) == 4
+    ns.set_latency_slo(None)
+    assert ns.latency_report() is None
+    ns.send_event(event_type='STIM')
+    assert len(ns.memory_log()) == 7
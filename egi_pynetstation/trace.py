@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Stage-level tracing of the event and command paths
+
+Tracing is off by default. When off, each instrumented stage costs a
+single attribute check; when on, each stage appends one tuple of
+perf_counter_ns() timestamps to a ring buffer, with no string formatting,
+so the buffer can be dumped and inspected after a run.
+
+Examples
+--------
+>>> from egi_pynetstation.trace import tracer
+>>> tracer.enable()
+>>> # ... run the experiment ...
+>>> tracer.disable()
+>>> for span in tracer.dump():
+...     print(span.stage, span.end_ns - span.start_ns)
+"""
+
+from itertools import count
+from typing import NamedTuple
+
+# Stage identifiers recorded in the ring buffer; see stage_names
+VALIDATE = 0
+PACK = 1
+WRITE = 2
+READ = 3
+PARSE = 4
+NTP = 5
+SYNC = 6
+
+stage_names = ('validate', 'pack', 'write', 'read', 'parse', 'ntp', 'sync')
+
+
+class Span(NamedTuple):
+    """A traced stage
+
+    Attributes
+    ----------
+    stage: str
+        The name of the stage; one of stage_names
+    start_ns: int
+        perf_counter_ns() when the stage started
+    end_ns: int
+        perf_counter_ns() when the stage ended
+    info: object
+        Stage-specific data recorded as-is, such as the command byte
+        written, the response read, or the (time, offset) of a sync
+    """
+    stage: str
+    start_ns: int
+    end_ns: int
+    info: object
+
+
+class Tracer(object):
+    """Ring buffer of stage spans
+
+    Attributes
+    ----------
+    enabled: bool
+        Whether spans are being recorded; check this before taking
+        timestamps so that disabled tracing costs nothing more
+    """
+    def __init__(self, size: int = 65536) -> None:
+        """Constructor for Tracer
+
+        Parameters
+        ----------
+        size: the number of most recent spans to keep
+        """
+        self.enabled = False
+        self._size = size
+        self._buffer = [None] * size
+        self._counter = count()
+
+    def enable(self, size: int = None) -> None:
+        """Start recording spans
+
+        Parameters
+        ----------
+        size: if given, resize (and clear) the ring buffer
+        """
+        if size is not None:
+            self._size = size
+            self.clear()
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording spans; the buffer is kept for dump"""
+        self.enabled = False
+
+    def clear(self) -> None:
+        """Discard all recorded spans"""
+        self._buffer = [None] * self._size
+        self._counter = count()
+
+    def span(
+        self, stage: int, start_ns: int, end_ns: int, info: object = None
+    ) -> None:
+        """Record a stage
+
+        Parameters
+        ----------
+        stage: the stage identifier, e.g. trace.WRITE
+        start_ns: perf_counter_ns() when the stage started
+        end_ns: perf_counter_ns() when the stage ended
+        info: stage-specific data, recorded without formatting
+        """
+        # next() on itertools.count is atomic, so threads never share a slot
+        i = next(self._counter)
+        self._buffer[i % self._size] = (i, stage, start_ns, end_ns, info)
+
+    def dump(self) -> list:
+        """Get the recorded spans, oldest first
+
+        Returns
+        -------
+        List of Span
+        """
+        records = sorted(r for r in self._buffer if r is not None)
+        return [
+            Span(stage_names[stage], start_ns, end_ns, info)
+            for (_, stage, start_ns, end_ns, info) in records
+        ]
+
+
+# Shared by the eci and NetStation modules
+tracer = Tracer()
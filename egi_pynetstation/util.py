@@ -5,14 +5,19 @@
 
 import sys
 from math import modf
-from typing import Union
+from typing import Callable, Union
 from struct import pack
-from time import strftime, localtime
+from time import strftime, localtime, perf_counter, sleep
 from datetime import datetime, timezone
 from .exceptions import *
 
 ntp_res = 2**-32
+# The ECI millisecond clock and event start fields are 32 bits wide
+ms_wrap = 2**32
 ntp_epoch = datetime(1900, 1, 1, tzinfo=timezone.utc)
+# Fields of a packed NTP record as laid out by get_ntp_byte: native 32-bit
+# seconds then fraction, with no padding
+ntp_record_fields = [('seconds', '=u4'), ('fraction', '=u4')]
 unix_epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
 
@@ -52,6 +57,21 @@ def sys_from_bytes(bytearr: bytes, signed: bool = False) -> int:
     return int.from_bytes(bytearr, sys.byteorder, signed=signed)
 
 
+def wrap_ms(milliseconds: int) -> int:
+    """Wraps a millisecond count into the 32-bit ECI clock range
+
+    Parameters
+    ----------
+    milliseconds: the number of milliseconds; may exceed 32 bits
+
+    Returns
+    -------
+    The count modulo 2**32, as the amp sees it in ClockSync and event
+    start fields
+    """
+    return milliseconds % ms_wrap
+
+
 def get_ntp_byte(number: Union[float, int, bytes]) -> bytes:
     """Converts numbers or bytes into an NTP format.
 
@@ -131,6 +151,81 @@ def get_ntp_float(bytearr: bytes) -> float:
         raise NTPInvalidType(bytearr)
 
 
+def get_ntp_records(numbers):
+    """Converts an array of numbers into packed NTP records
+
+    The vectorized counterpart of get_ntp_byte: element i of the result
+    has the same bytes as get_ntp_byte(numbers[i]).
+
+    Parameters
+    ----------
+    numbers: a NumPy array or sequence of seconds in the NTP epoch, all
+        floats or all integers
+
+    Returns
+    -------
+    Structured NumPy array with ntp_record_fields; .tobytes() gives the
+    records back to back, 8 bytes each
+
+    Raises
+    ------
+    NTPInvalidType if numbers are neither floats nor integers
+    OverflowError if any number of seconds cannot be represented
+    ImportError if numpy is not installed
+    """
+    import numpy as np
+
+    values = np.asarray(numbers)
+    records = np.zeros(values.shape, dtype=np.dtype(ntp_record_fields))
+    if values.dtype.kind in 'iu':
+        if values.size and (values.min() < 0 or values.max() >= 2**32):
+            raise OverflowError('NTP seconds must fit in 32 bits')
+        records['seconds'] = values
+    elif values.dtype.kind == 'f':
+        values = values.astype(np.float64, copy=False)
+        if values.size and not (
+            (values >= 0) & (values < 2**32)
+        ).all():
+            raise OverflowError('NTP seconds must fit in 32 bits')
+        subseconds, seconds = np.modf(values)
+        # Truncation toward zero, as int() does in get_ntp_byte
+        records['seconds'] = seconds.astype(np.uint32)
+        records['fraction'] = (subseconds / ntp_res).astype(np.uint32)
+    else:
+        raise NTPInvalidType(numbers)
+    return records
+
+
+def get_ntp_floats(records):
+    """Converts packed NTP records into seconds in the NTP epoch
+
+    The vectorized counterpart of get_ntp_float: element i of the result
+    equals get_ntp_float on the i-th 8-byte record.
+
+    Parameters
+    ----------
+    records: a bytes-like buffer of records back to back, or a structured
+        array from get_ntp_records
+
+    Returns
+    -------
+    NumPy float64 array of the number of seconds in the NTP epoch
+
+    Raises
+    ------
+    NTPInvalidByte if the buffer is not a whole number of records
+    ImportError if numpy is not installed
+    """
+    import numpy as np
+
+    dtype = np.dtype(ntp_record_fields)
+    if not isinstance(records, np.ndarray):
+        if len(records) % dtype.itemsize:
+            raise NTPInvalidByte(records)
+        records = np.frombuffer(records, dtype=dtype)
+    return records['seconds'] + records['fraction'] * ntp_res
+
+
 def format_time(time: float) -> str:
     """Format the float time in a human readable format
 
@@ -150,3 +245,121 @@ def format_time(time: float) -> str:
     subseconds = int(subseconds)
     fmt = '%Y-%m-%d:%I:%M%:%S'
     return strftime(fmt, localtime(time)) + '.' + str(subseconds)
+
+
+class PrecisionSleeper(object):
+    """Hybrid sleeper: OS sleep for most of the wait, then a short spin
+
+    The OS timer usually wakes a thread late by a fraction of a
+    millisecond (more on some platforms), so the sleeper asks the OS to
+    wake it margin seconds early and spins on perf_counter for the rest.
+    The margin adapts to the lateness actually observed: it tracks a
+    slowly decaying maximum of the OS oversleep, so that the spin covers
+    the usual wake-up jitter without pinning a CPU core for the whole
+    wait.
+
+    Attributes
+    ----------
+    margin: float
+        The current spin margin in seconds
+    min_margin: float
+        The smallest margin used
+    max_margin: float
+        The largest margin used
+    """
+    # Per-sleep decay of the tracked maximum oversleep
+    decay = 0.95
+    # Headroom applied to the tracked oversleep to get the margin
+    headroom = 1.5
+
+    def __init__(
+        self,
+        margin: float = 0.001,
+        min_margin: float = 0.0002,
+        max_margin: float = 0.005,
+    ) -> None:
+        self.margin = margin
+        self.min_margin = min_margin
+        self.max_margin = max_margin
+        self._oversleep = margin / self.headroom
+
+    def sleep_until(self, deadline: float) -> float:
+        """Wait until perf_counter() reaches deadline
+
+        Parameters
+        ----------
+        deadline: the perf_counter() time to wake at
+
+        Returns
+        -------
+        The wake-up error in seconds (how late the wait returned)
+        """
+        coarse = deadline - self.margin - perf_counter()
+        if coarse > 0:
+            target = perf_counter() + coarse
+            sleep(coarse)
+            self._adapt(perf_counter() - target)
+        while perf_counter() < deadline:
+            pass
+        return perf_counter() - deadline
+
+    def sleep(self, duration: float) -> float:
+        """Wait for duration seconds
+
+        Parameters
+        ----------
+        duration: the number of seconds to wait
+
+        Returns
+        -------
+        The wake-up error in seconds (how late the wait returned)
+        """
+        return self.sleep_until(perf_counter() + duration)
+
+    def _adapt(self, oversleep: float) -> None:
+        """Update the margin from the lateness of an OS sleep"""
+        self._oversleep = max(oversleep, self._oversleep * self.decay)
+        self.margin = min(
+            self.max_margin,
+            max(self.min_margin, self._oversleep * self.headroom)
+        )
+
+
+# Shared by precise_sleep and wait_until
+precision_sleeper = PrecisionSleeper()
+
+
+def precise_sleep(duration: float) -> float:
+    """Sleep for duration seconds with sub-millisecond precision
+
+    Parameters
+    ----------
+    duration: the number of seconds to sleep
+
+    Returns
+    -------
+    The wake-up error in seconds
+
+    See Also
+    --------
+    PrecisionSleeper for how the precision is obtained
+    """
+    return precision_sleeper.sleep(duration)
+
+
+def wait_until(deadline: float, clock: Callable[[], float] = perf_counter):
+    """Sleep until clock() reaches deadline, with sub-millisecond precision
+
+    Parameters
+    ----------
+    deadline: the time to wake at, as returned by clock
+    clock: the clock deadline is given in, e.g. time.time; the wait
+        itself always runs on perf_counter
+
+    Returns
+    -------
+    The wake-up error in seconds
+    """
+    if clock is not perf_counter:
+        deadline = perf_counter() + (deadline - clock())
+    return precision_sleeper.sleep_until(deadline)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Latency service-level objective for ECI acknowledgements
+
+LatencyWatchdog keeps a rolling window of acknowledgement latencies and
+switches NetStation into a degraded mode while a quantile of the window
+is above the threshold, then back once it falls below a lower recovery
+threshold. The gap between the two thresholds (hysteresis) keeps a
+latency hovering around the threshold from flapping between modes.
+"""
+
+import threading
+from collections import deque
+from math import ceil
+from time import perf_counter
+from typing import Callable
+
+# Modes; NORMAL plus the degraded strategies
+NORMAL = 'normal'
+DROP_BULK = 'drop_bulk'
+BATCH = 'batch'
+FIRE_AND_FORGET = 'fire_and_forget'
+strategies = (DROP_BULK, BATCH, FIRE_AND_FORGET)
+
+
+class LatencyWatchdog(object):
+    """Rolling ack latency and the mode it calls for
+
+    Attributes
+    ----------
+    threshold: float
+        The latency SLO in seconds
+    strategy: str
+        The mode entered while the SLO is breached; one of strategies
+    mode: str
+        NORMAL, or strategy while the SLO is breached
+    batch_size: int
+        In BATCH mode, the number of events queued before they are sent
+    probe_every: int
+        In FIRE_AND_FORGET mode, every probe_every-th event still waits
+        for its acknowledgement, so latency keeps being measured
+    dropped: int
+        Bulk events dropped in DROP_BULK mode
+    deferred: int
+        Events queued instead of sent in BATCH mode
+    unacked: int
+        Events sent without waiting for acknowledgement
+    unacked_failures: int
+        Events sent without waiting which the amp did not acknowledge
+    """
+    def __init__(
+        self,
+        threshold: float,
+        strategy: str = DROP_BULK,
+        window: int = 20,
+        quantile: float = 0.9,
+        recover: float = 0.8,
+        min_samples: int = 5,
+        batch_size: int = 8,
+        probe_every: int = 10,
+        on_change: Callable[[str, float], None] = None,
+    ) -> None:
+        """Constructor for LatencyWatchdog
+
+        Parameters
+        ----------
+        threshold: the latency SLO in seconds
+        strategy: the degraded mode; one of strategies
+        window: the number of most recent latencies considered
+        quantile: the quantile of the window compared with the
+            thresholds; e.g. 0.9 tolerates one slow ack in ten
+        recover: the fraction of threshold the quantile must fall below
+            to return to NORMAL
+        min_samples: the number of latencies needed before any switch
+        batch_size: see Attributes
+        probe_every: see Attributes
+        on_change: called with the new mode and the rolling latency
+            whenever the mode changes, from the thread which observed the
+            latency; it must not block
+
+        Raises
+        ------
+        ValueError
+            If strategy is unknown, or a parameter is out of range
+        """
+        if strategy not in strategies:
+            raise ValueError(f'Unknown strategy {strategy}')
+        if threshold <= 0:
+            raise ValueError(f'Threshold must be positive, is {threshold}')
+        if not 0 < quantile <= 1:
+            raise ValueError(f'Quantile must be in (0, 1], is {quantile}')
+        if not 0 < recover <= 1:
+            raise ValueError(f'Recover must be in (0, 1], is {recover}')
+        if batch_size < 1 or probe_every < 1:
+            raise ValueError('batch_size and probe_every must be at least 1')
+        self.threshold = threshold
+        self.strategy = strategy
+        self.quantile = quantile
+        self.recover = recover
+        self.min_samples = max(1, min(min_samples, window))
+        self.batch_size = batch_size
+        self.probe_every = probe_every
+        self.on_change = on_change
+        self.mode = NORMAL
+        self.dropped = 0
+        self.deferred = 0
+        self.unacked = 0
+        self.unacked_failures = 0
+        self._samples = deque(maxlen=window)
+        self._n_samples = 0
+        self._breaches = 0
+        self._recoveries = 0
+        self._since = perf_counter()
+        self._degraded_time = 0.0
+        self._skipped = 0
+        self._lock = threading.Lock()
+
+    @property
+    def degraded(self) -> bool:
+        """Whether the SLO is currently breached"""
+        return self.mode != NORMAL
+
+    def observe(self, latency: float) -> str:
+        """Add an ack latency and switch modes if it calls for it
+
+        Parameters
+        ----------
+        latency: seconds from writing a command to reading its reply
+
+        Returns
+        -------
+        The new mode if it changed, otherwise None
+        """
+        with self._lock:
+            self._samples.append(latency)
+            self._n_samples += 1
+            if len(self._samples) < self.min_samples:
+                return None
+            rolling = self._rolling()
+            if self.mode == NORMAL:
+                if rolling <= self.threshold:
+                    return None
+                mode = self.strategy
+                self._breaches += 1
+            else:
+                if rolling >= self.threshold * self.recover:
+                    return None
+                mode = NORMAL
+                self._recoveries += 1
+                self._degraded_time += perf_counter() - self._since
+            self.mode = mode
+            self._since = perf_counter()
+            self._skipped = 0
+        if self.on_change is not None:
+            self.on_change(mode, rolling)
+        return mode
+
+    def skip_ack(self) -> bool:
+        """In FIRE_AND_FORGET mode, whether the next event may skip its ack
+
+        Returns
+        -------
+        False for every probe_every-th call, True otherwise
+        """
+        with self._lock:
+            if self._skipped + 1 >= self.probe_every:
+                self._skipped = 0
+                return False
+            self._skipped += 1
+            return True
+
+    def latency(self) -> float:
+        """Get the rolling latency quantile, or None with no samples"""
+        with self._lock:
+            if not self._samples:
+                return None
+            return self._rolling()
+
+    def report(self) -> dict:
+        """Get the watchdog's state and counters
+
+        Returns
+        -------
+        Dictionary with the mode, the seconds spent in it, the rolling
+        latency, the threshold, the numbers of latencies observed, SLO
+        breaches and recoveries, the total seconds spent degraded, and
+        the dropped, deferred, unacked and unacked_failures counters
+        """
+        with self._lock:
+            now = perf_counter()
+            degraded_time = self._degraded_time
+            if self.mode != NORMAL:
+                degraded_time += now - self._since
+            return {
+                'mode': self.mode,
+                'for': now - self._since,
+                'latency': self._rolling() if self._samples else None,
+                'threshold': self.threshold,
+                'samples': self._n_samples,
+                'breaches': self._breaches,
+                'recoveries': self._recoveries,
+                'degraded_time': degraded_time,
+                'dropped': self.dropped,
+                'deferred': self.deferred,
+                'unacked': self.unacked,
+                'unacked_failures': self.unacked_failures,
+            }
+
+    def _rolling(self) -> float:
+        """Get the quantile of the window; the lock must be held"""
+        ordered = sorted(self._samples)
+        return ordered[ceil(self.quantile * len(ordered)) - 1]
@@ -1,16 +1,9 @@
 from egi_pynetstation.NetStation import NetStation
-from time import time
+from egi_pynetstation.util import precise_sleep
 
 from argparse import ArgumentParser
 
 
-def high_res_sleep(amount: float):
-    """Uses repeated time interrogations to try and sleep precisely"""
-    t0 = time()
-    while (time() - t0) < amount:
-        continue
-
-
 def namer(x: int) -> str:
     return 't %2.2d' % x
 
@@ -47,7 +40,7 @@ def main():
     eci_client.send_event(event_type="STRT", start=0.0)
 
     for i in range(10):
-        high_res_sleep(3)
+        precise_sleep(3)
         name = namer(i)
         eci_client.send_event(event_type=name)
         if (i % 4) == 0:
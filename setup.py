@@ -22,7 +22,13 @@ setuptools.setup(
         'dev': [
             'sphinx',
             'sphinx_rtd_theme',
-        ]
+        ],
+        'numpy': [
+            'numpy>=1.17',
+        ],
+        'parquet': [
+            'pyarrow>=1.0',
+        ],
     },
     python_requires='>=3.7',
 )